@@ -0,0 +1,115 @@
+# Compilación concurrente: cientos de programas generados al azar se compilan
+# con generar_lmc desde un ThreadPoolExecutor y cada LMC se compara byte a
+# byte con el de una compilación en serie. Un intervalo de cambio de hilo muy
+# corto fuerza a los hilos a intercalarse a mitad de cada compilación. Falla
+# (código 1) si algún programa da un LMC distinto
+#
+#   python benchmarks/concurrencia.py --programas 300 --hilos 16
+import argparse
+import os
+import random
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Tuple
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from generator import generar_lmc  # noqa: E402
+from parser import analizar_pseudocodigo  # noqa: E402
+
+VARIABLES = "ABCD"
+COMPARACIONES = (">", "<", "=", ">=", "<=", "!=")
+
+# Opciones del generador: cada programa se compila con una de ellas
+OPCIONES: List[Dict[str, Any]] = [
+    {},
+    {"multiplicacion": "rapida", "division": "rapida"},
+    {"subrutinas": "compartidas"},
+    {"subrutinas": "en_linea"},
+    {"rotar_bucles": False, "plegar_constantes": False},
+    {"presupuesto_buzones": 40},
+]
+
+
+def _operando(r: random.Random) -> str:
+    return r.choice(VARIABLES) if r.random() < 0.7 else str(r.choice((0, 1, 2, 3, 5, 7, 10, 100, 999)))
+
+
+def _bloque(r: random.Random, nivel: int, n: int) -> List[str]:
+    sangria = "  " * nivel
+    lineas = []
+    for _ in range(n):
+        k = r.random()
+        if nivel < 3 and k < 0.15:
+            lineas.append(f"{sangria}SI {_operando(r)} {r.choice(COMPARACIONES)} {_operando(r)} ENTONCES")
+            lineas += _bloque(r, nivel + 1, r.randint(1, 3))
+            if r.random() < 0.5:
+                lineas.append(f"{sangria}SINO")
+                lineas += _bloque(r, nivel + 1, r.randint(1, 3))
+            lineas.append(f"{sangria}FIN SI")
+        elif nivel < 3 and k < 0.25:
+            v = r.choice(VARIABLES)
+            lineas.append(f"{sangria}MIENTRAS {v} < {r.choice((3, 10, 20))} HACER")
+            lineas += _bloque(r, nivel + 1, r.randint(1, 3))
+            lineas.append(f"{sangria}  {v} = {v} + 1")
+            lineas.append(f"{sangria}FIN MIENTRAS")
+        elif k < 0.35:
+            lineas.append(f"{sangria}IMPRIMIR {r.choice(VARIABLES)}")
+        else:
+            lineas.append(f"{sangria}{r.choice(VARIABLES)} = {_operando(r)} {r.choice('+-*/')} {_operando(r)}")
+    return lineas
+
+
+def programa(semilla: int) -> List[str]:
+    # Asignaciones con las cuatro operaciones, SI/SINO y MIENTRAS anidados
+    r = random.Random(semilla)
+    lineas = [f"LEER {v}" for v in VARIABLES]
+    lineas += _bloque(r, 0, r.randint(4, 10))
+    lineas += [f"IMPRIMIR {v}" for v in VARIABLES]
+    return lineas
+
+
+def compilar(caso: Tuple[List[str], Dict[str, Any]]) -> str:
+    lineas, opciones = caso
+    return generar_lmc(analizar_pseudocodigo(lineas), **opciones)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Compara la compilación concurrente con la compilación en serie")
+    ap.add_argument("--programas", type=int, default=300, help="Programas generados (por defecto 300)")
+    ap.add_argument("--hilos", type=int, default=16, help="Hilos del ThreadPoolExecutor (por defecto 16)")
+    ap.add_argument("--rondas", type=int, default=3, help="Veces que se compila todo en paralelo (por defecto 3)")
+    ap.add_argument("--semilla", type=int, default=0, help="Semilla del primer programa")
+    args = ap.parse_args()
+
+    casos = [(programa(args.semilla + i), OPCIONES[i % len(OPCIONES)]) for i in range(args.programas)]
+    inicio = time.perf_counter()
+    serie = [compilar(caso) for caso in casos]
+    print(f"Serie: {len(casos)} programas en {time.perf_counter() - inicio:.1f} s")
+
+    fallas: List[str] = []
+    intervalo = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        for ronda in range(1, args.rondas + 1):
+            inicio = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=args.hilos) as ejecutor:
+                paralelo = list(ejecutor.map(compilar, casos))
+            distintos = [i for i, (a, b) in enumerate(zip(serie, paralelo)) if a != b]
+            estado = f"{len(distintos)} distintos" if distintos else "ok"
+            print(f"Ronda {ronda}: {args.hilos} hilos  {estado}  ({time.perf_counter() - inicio:.1f} s)")
+            for i in distintos[:10]:
+                fallas.append(f"ronda {ronda}: el programa {args.semilla + i} con {casos[i][1]} da un LMC distinto del de la serie")
+    finally:
+        sys.setswitchinterval(intervalo)
+
+    if fallas:
+        print()
+        for falla in fallas:
+            print(falla)
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+# Corrección de la división en todo el rango: cada par dividendo/divisor de
+# 0 a 999 se ejecuta en MaquinaLMC y el cociente y el resto (TMPDIV) se
+# comparan con // y % de Python. Dividir por 0 deja el cociente en 0 y el
+# resto igual al dividendo. Falla (código 1) si algún par no coincide
+#
+#   python benchmarks/division_exhaustiva.py --division rapida
+import argparse
+import os
+import sys
+import time
+from typing import List, Tuple
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from assembler import ensamblar  # noqa: E402
+from generator import MODOS_DIVISION, generar_lmc  # noqa: E402
+from parser import analizar_pseudocodigo  # noqa: E402
+from simulator import MaquinaLMC  # noqa: E402
+
+PROGRAMA = ["LEER A", "LEER B", "C = A / B", "IMPRIMIR C", "IMPRIMIR TMPDIV"]
+
+
+def esperado(a: int, b: int) -> List[int]:
+    return [0, a] if b == 0 else [a // b, a % b]
+
+
+def comprobar(modo: str) -> Tuple[int, List[str], int]:
+    # Pares distintos, los primeros de ellos y ciclos máximos de una ejecución
+    memoria = ensamblar(generar_lmc(analizar_pseudocodigo(PROGRAMA), division=modo))[0]
+    distintos = 0
+    ejemplos: List[str] = []
+    maximo = 0
+    for a in range(1000):
+        for b in range(1000):
+            resultado = MaquinaLMC(memoria).ejecutar([a, b])
+            maximo = max(maximo, resultado.ciclos)
+            if resultado.salidas != esperado(a, b):
+                distintos += 1
+                if len(ejemplos) < 10:
+                    ejemplos.append(f"{modo}: {a} / {b} da {resultado.salidas}, se esperaba {esperado(a, b)}")
+    return distintos, ejemplos, maximo
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Comprueba la división con todos los pares de 0 a 999")
+    ap.add_argument("--division", choices=MODOS_DIVISION, action="append",
+                    help="Modo a comprobar (se puede repetir; por defecto, todos)")
+    args = ap.parse_args()
+
+    fallas: List[str] = []
+    for modo in args.division or MODOS_DIVISION:
+        inicio = time.perf_counter()
+        distintos, ejemplos, maximo = comprobar(modo)
+        fallas += ejemplos
+        estado = f"{distintos} distintos" if distintos else "ok"
+        print(f"{modo:<10} 1000000 pares  {estado:<14} máximo {maximo} ciclos por ejecución  ({time.perf_counter() - inicio:.0f} s)")
+
+    if fallas:
+        print()
+        for falla in fallas:
+            print(falla)
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+# Ciclos por segundo del intérprete de referencia frente al motor compilado
+# (src/jit.py), sobre programas con muchas * y / dentro de MIENTRAS, en las
+# variantes de suite.py. Antes de medir se comprueba que los dos motores den
+# el mismo resultado con todas las entradas de ENTRADAS:
+#
+#   python benchmarks/motores.py --vueltas 60
+import argparse
+import gc
+import os
+import sys
+import time
+from typing import Callable, Dict, List
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from allocator import asignar_buzones  # noqa: E402
+from assembler import TAM_MEMORIA, ensamblar, parsear_lmc  # noqa: E402
+from generator import generar_lmc  # noqa: E402
+from jit import MOTORES  # noqa: E402
+from simulator import ErrorSimulacion  # noqa: E402
+from optimizer import optimizar_lmc  # noqa: E402
+from parser import analizar_pseudocodigo  # noqa: E402
+
+from programas import ENTRADAS  # noqa: E402
+from suite import VARIANTES  # noqa: E402
+
+
+def productos(vueltas: int) -> List[str]:
+    # Cada vuelta multiplica y divide; B grande hace largos los bucles de suma
+    return [
+        "LEER A",
+        "LEER B",
+        "K = A - A",
+        f"K = K + {vueltas}",
+        "C = B - B",
+        "MIENTRAS K > 0 HACER",
+        "  D = K * B",
+        "  E = D / 7",
+        "  C = C + E",
+        "  K = K - 1",
+        "FIN MIENTRAS",
+        "IMPRIMIR C",
+    ]
+
+
+def anidados(vueltas: int) -> List[str]:
+    # Dos MIENTRAS anidados con un producto y un cociente por variable
+    return [
+        "LEER A",
+        "LEER B",
+        "I = A - A",
+        f"I = I + {vueltas}",
+        "S = A - A",
+        "MIENTRAS I > 0 HACER",
+        "  J = I / 3",
+        "  MIENTRAS J > 0 HACER",
+        "    T = J * I",
+        "    S = S + T",
+        "    S = S / 2",
+        "    J = J - 1",
+        "  FIN MIENTRAS",
+        "  I = I - 1",
+        "FIN MIENTRAS",
+        "IMPRIMIR S",
+    ]
+
+
+# Los programas grandes superan el límite por defecto del simulador
+MAX_PASOS = 100_000_000
+
+
+def resultado(simular: Callable, memoria: List[int], entradas) -> object:
+    # El resultado o el error: los dos motores tienen que coincidir también en eso
+    try:
+        return simular(memoria, entradas, MAX_PASOS)
+    except ErrorSimulacion as e:
+        return f"{type(e).__name__}: {e}"
+
+
+def medir(simular: Callable, memoria: List[int], entradas, repeticiones: int) -> float:
+    mejor = float("inf")
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        simular(memoria, entradas, MAX_PASOS)
+        mejor = min(mejor, time.perf_counter() - inicio)
+    return mejor
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark del motor compilado frente al intérprete")
+    ap.add_argument("--vueltas", type=int, default=60, help="Vueltas del MIENTRAS exterior de cada programa")
+    ap.add_argument("--repeticiones", type=int, default=3)
+    args = ap.parse_args()
+
+    programas: Dict[str, List[str]] = {"productos": productos(args.vueltas), "anidados": anidados(args.vueltas)}
+    # Entradas de medición: B grande para que cada * y / tarde
+    medicion = (7, 999)
+    print(f"{'Programa':<24}{'Ciclos':>10}{'Intérprete (ciclos/s)':>24}{'Compilado (ciclos/s)':>24}{'Aceleración':>13}")
+    for nombre, lineas in programas.items():
+        tokens = analizar_pseudocodigo(lineas)
+        for variante, (opciones, optimizar) in VARIANTES.items():
+            lmc = generar_lmc(tokens, **opciones)
+            if optimizar:
+                lmc = optimizar_lmc(asignar_buzones(optimizar_lmc(lmc)))
+            if len(parsear_lmc(lmc)) > TAM_MEMORIA:
+                continue
+            memoria = ensamblar(lmc)[0]
+            for entradas in ENTRADAS + [medicion]:
+                esperado = resultado(MOTORES["interprete"], memoria, entradas)
+                obtenido = resultado(MOTORES["compilado"], memoria, entradas)
+                if obtenido != esperado:
+                    raise SystemExit(f"{nombre}/{variante} con {entradas}: el motor compilado da {obtenido}, el intérprete {esperado}")
+            ciclos = esperado.ciclos
+            gc.collect()
+            gc.disable()
+            try:
+                tiempos = {motor: medir(simular, memoria, medicion, args.repeticiones) for motor, simular in MOTORES.items()}
+            finally:
+                gc.enable()
+            print(f"{nombre + '/' + variante:<24}{ciclos:>10}{ciclos / tiempos['interprete']:>24,.0f}"
+                  f"{ciclos / tiempos['compilado']:>24,.0f}{tiempos['interprete'] / tiempos['compilado']:>12.1f}x")
+
+
+if __name__ == "__main__":
+    main()
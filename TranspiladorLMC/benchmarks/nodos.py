@@ -0,0 +1,80 @@
+# Memoria y tiempo de generación con el árbol de nodos frente al formato de
+# dicts, sobre programas sintéticos grandes:
+#
+#   python benchmarks/nodos.py --bloques 2000
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from generator import generar_lmc  # noqa: E402
+from nodes import a_dicts, como_nodos  # noqa: E402
+from parser import analizar_pseudocodigo  # noqa: E402
+
+BLOQUE = [
+    "LEER A",
+    "MIENTRAS A > 0 HACER",
+    "  SI A >= B ENTONCES",
+    "    C = A * B",
+    "    D = C / 3",
+    "  SINO",
+    "    C = C + A",
+    "",
+    "  A = A - 1",
+    "FIN MIENTRAS",
+    "IMPRIMIR C",
+]
+
+
+def programa_sintetico(bloques: int):
+    return BLOQUE * bloques
+
+
+def medir_memoria(construir):
+    # Bytes que quedan reservados por el resultado
+    tracemalloc.start()
+    resultado = construir()
+    actual, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return resultado, actual
+
+
+def medir_tiempo(funcion, repeticiones: int) -> float:
+    mejor = float("inf")
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        mejor = min(mejor, time.perf_counter() - inicio)
+    return mejor
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark del árbol de nodos")
+    ap.add_argument("--bloques", type=int, default=2000, help="Repeticiones del bloque sintético (11 líneas cada una)")
+    ap.add_argument("--repeticiones", type=int, default=3)
+    args = ap.parse_args()
+
+    lineas = programa_sintetico(args.bloques)
+    # Las dos representaciones se arman a partir de la otra, así comparten las
+    # cadenas y solo se mide lo que ocupa la estructura
+    dicts = a_dicts(analizar_pseudocodigo(lineas))
+    nodos, mem_nodos = medir_memoria(lambda: como_nodos(dicts))
+    dicts, mem_dicts = medir_memoria(lambda: a_dicts(nodos))
+
+    t_analisis = medir_tiempo(lambda: analizar_pseudocodigo(lineas), args.repeticiones)
+    # Sin las pasadas que prueban varias variantes, para medir solo una generación
+    opciones = {"subrutinas": "en_linea"}
+    t_nodos = medir_tiempo(lambda: generar_lmc(nodos, **opciones), args.repeticiones)
+    t_dicts = medir_tiempo(lambda: generar_lmc(dicts, **opciones), args.repeticiones)
+
+    print(f"Programa: {len(lineas)} líneas")
+    print(f"Memoria del árbol:   nodos {mem_nodos / 1024:9.1f} KiB   dicts {mem_dicts / 1024:9.1f} KiB")
+    print(f"Análisis:            {t_analisis * 1000:9.1f} ms")
+    print(f"Generación:          nodos {t_nodos * 1000:9.1f} ms   dicts (con conversión) {t_dicts * 1000:9.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
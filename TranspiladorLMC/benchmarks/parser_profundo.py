@@ -0,0 +1,102 @@
+# El análisis es lineal y no depende de la recursión: programas de 10k a 40k
+# líneas con 60 niveles de anidamiento repetidos, y un solo SI/MIENTRAS de
+# miles de niveles (muy por encima del límite de recursión de Python).
+# Duplicar el programa tiene que duplicar el tiempo: falla (código 1) si el
+# tiempo por línea crece más que la tolerancia entre el tamaño menor y el mayor
+#
+#   python benchmarks/parser_profundo.py
+import argparse
+import gc
+import os
+import sys
+import time
+from typing import List
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from nodes import Instruccion, Mientras, Si  # noqa: E402
+from parser import analizar_pseudocodigo  # noqa: E402
+
+from programas import anidado  # noqa: E402
+
+# Tamaños de cada prueba, en múltiplos del menor
+ESCALAS = (1, 2, 4)
+
+
+def repetido(escala: int) -> List[str]:
+    # Bloques de 60 niveles uno tras otro: ~10k líneas por escala
+    return anidado(60) * (41 * escala)
+
+
+def profundo(escala: int) -> List[str]:
+    # Un solo anidamiento de 2500 niveles por escala. Sin sangría: con ella el
+    # texto crecería con el cuadrado de la profundidad y no se mediría el parser
+    return [linea.strip() for linea in anidado(2500 * escala)]
+
+
+def profundidad(tokens: List[Instruccion]) -> int:
+    # Sin recursión, como el parser
+    maxima = 0
+    pendientes = [(tokens, 0)]
+    while pendientes:
+        bloque, nivel = pendientes.pop()
+        for token in bloque:
+            if isinstance(token, Si):
+                pendientes += [(token.entonces, nivel + 1), (token.sino, nivel + 1)]
+                maxima = max(maxima, nivel + 1)
+            elif isinstance(token, Mientras):
+                pendientes.append((token.cuerpo, nivel + 1))
+                maxima = max(maxima, nivel + 1)
+    return maxima
+
+
+def medir(lineas: List[str], repeticiones: int) -> float:
+    mejor = float("inf")
+    gc.collect()
+    gc.disable()
+    try:
+        for _ in range(repeticiones):
+            inicio = time.perf_counter()
+            analizar_pseudocodigo(lineas)
+            mejor = min(mejor, time.perf_counter() - inicio)
+    finally:
+        gc.enable()
+    return mejor
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Tiempo de análisis de programas grandes y muy anidados")
+    ap.add_argument("--repeticiones", type=int, default=5, help="Se toma el mejor tiempo de estas repeticiones")
+    ap.add_argument("--tolerancia", type=float, default=1.6,
+                    help="Cuántas veces puede crecer el tiempo por línea del tamaño menor al mayor (por defecto 1.6)")
+    args = ap.parse_args()
+
+    fallas = []
+    print(f"{'Programa':<12}{'Líneas':>9}{'Niveles':>9}{'Tiempo (ms)':>14}{'µs/línea':>11}")
+    pruebas: List[tuple] = [("repetido", repetido, 60), ("profundo", profundo, None)]
+    for nombre, generar, niveles in pruebas:
+        por_linea = []
+        for escala in ESCALAS:
+            lineas: List[str] = generar(escala)
+            # Cada nivel de anidado() es un SI o un MIENTRAS
+            esperada = niveles if niveles is not None else 2500 * escala
+            obtenida = profundidad(analizar_pseudocodigo(lineas))
+            if obtenida != esperada:
+                fallas.append(f"{nombre} x{escala}: {obtenida} niveles en el árbol, se esperaban {esperada}")
+            tiempo = medir(lineas, args.repeticiones)
+            por_linea.append(tiempo / len(lineas))
+            print(f"{nombre:<12}{len(lineas):>9}{obtenida:>9}{tiempo * 1000:>14.1f}{tiempo / len(lineas) * 1e6:>11.2f}")
+        crecimiento = por_linea[-1] / por_linea[0]
+        if crecimiento > args.tolerancia:
+            fallas.append(f"{nombre}: el tiempo por línea creció {crecimiento:.2f}x de x{ESCALAS[0]} a x{ESCALAS[-1]} (no es lineal)")
+
+    print()
+    if fallas:
+        for falla in fallas:
+            print(falla)
+        raise SystemExit(1)
+    print("Análisis lineal en todos los tamaños")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+# Programas de los benchmarks: los de input_scripts/ y programas de estrés
+# generados (código lineal largo, anidamiento profundo, muchas * y /)
+import glob
+import os
+from typing import Dict, List, NamedTuple, Tuple
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Entradas fijas para medir ciclos: todos los programas leen A y B
+ENTRADAS: List[Tuple[int, int]] = [(0, 0), (1, 1), (5, 3), (13, 7), (31, 2), (99, 9)]
+
+
+class Programa(NamedTuple):
+    nombre: str
+    lineas: List[str]
+
+
+def recta(n: int) -> List[str]:
+    # n asignaciones seguidas, sin saltos: los valores dependen de las entradas
+    # para que el plegado de constantes no las resuelva en compilación
+    lineas = ["LEER A", "LEER B"]
+    variables = ["A", "B", "C", "D", "E"]
+    for i in range(n):
+        destino = variables[(i + 2) % len(variables)]
+        izquierda = variables[i % len(variables)]
+        derecha = variables[(i + 1) % len(variables)] if i % 3 else str(i % 7 + 1)
+        lineas.append(f"{destino} = {izquierda} {'+-'[i % 2]} {derecha}")
+    lineas += ["IMPRIMIR C", "IMPRIMIR E"]
+    return lineas
+
+
+def anidado(profundidad: int) -> List[str]:
+    # SI y MIENTRAS alternados, uno dentro del otro; cada MIENTRAS da pocas
+    # vueltas (su contador arranca en 2) para que la ejecución termine rápido
+    lineas = ["LEER A", "LEER B"]
+    cierres = []
+    for nivel in range(profundidad):
+        sangria = "  " * nivel
+        if nivel % 2:
+            lineas += [f"{sangria}K{nivel} = B - B", f"{sangria}K{nivel} = K{nivel} + 2",
+                       f"{sangria}MIENTRAS K{nivel} > 0 HACER", f"{sangria}  K{nivel} = K{nivel} - 1"]
+            cierres.append(f"{sangria}FIN MIENTRAS")
+        else:
+            lineas += [f"{sangria}SI A >= B ENTONCES", f"{sangria}  A = A - 1"]
+            cierres.append(f"{sangria}FIN SI")
+    lineas.append("  " * profundidad + "IMPRIMIR A")
+    lineas += reversed(cierres)
+    lineas.append("IMPRIMIR B")
+    return lineas
+
+
+def aritmetica(n: int) -> List[str]:
+    # n productos y cocientes encadenados
+    lineas = ["LEER A", "LEER B", "B = B + 1", "C = A + 1"]
+    for i in range(n):
+        if i % 2:
+            lineas.append("C = C / B")
+        else:
+            lineas.append("C = C * B")
+        lineas.append("C = C + A")
+    lineas.append("IMPRIMIR C")
+    return lineas
+
+
+def literales() -> List[str]:
+    # Condiciones entre dos constantes, con 0 a cada lado y en los dos órdenes:
+    # el plegado las resuelve, pero sin él (variante sin_plegado) llegan al
+    # generador. Cada SI imprime A si se cumple y B si no
+    condiciones = ["0 >= 7", "7 <= 0", "0 < 7", "7 > 0", "0 > 7", "7 >= 0", "0 = 0", "0 != 0", "5 >= 5"]
+    lineas = ["LEER A", "LEER B"]
+    for condicion in condiciones:
+        lineas += [f"SI {condicion} ENTONCES", "  IMPRIMIR A", "SINO", "  IMPRIMIR B", "FIN SI"]
+    # Un MIENTRAS con una condición falsa no da ninguna vuelta
+    lineas += ["MIENTRAS 0 >= 7 HACER", "  A = A + 1", "FIN MIENTRAS", "IMPRIMIR A"]
+    return lineas
+
+
+def programas_calidad() -> List[Programa]:
+    # Se ejecutan y se miden buzones y ciclos en cada variante de suite.py.
+    # Caben en los 100 buzones salvo aritmetica_3 con * y / rápidas: esa
+    # variante queda en la línea base como "no cabe" (sin buzones ni ciclos)
+    programas = []
+    for ruta in sorted(glob.glob(os.path.join(RAIZ, "input_scripts", "*.txt"))):
+        with open(ruta, "r", encoding="utf-8") as f:
+            programas.append(Programa(os.path.splitext(os.path.basename(ruta))[0], f.read().splitlines()))
+    programas += [
+        Programa("recta_20", recta(20)),
+        Programa("anidado_4", anidado(4)),
+        Programa("aritmetica_3", aritmetica(3)),
+        Programa("literales", literales()),
+    ]
+    return programas
+
+
+def programas_velocidad(escala: int = 1) -> Dict[str, List[str]]:
+    # Grandes, solo para medir líneas por segundo (no caben en la memoria LMC)
+    return {
+        "recta": recta(5000 * escala),
+        "anidado": anidado(60) * (20 * escala),
+        "aritmetica": aritmetica(1000 * escala),
+    }
@@ -0,0 +1,251 @@
+# Benchmarks del transpilador contra una línea base guardada:
+#
+#   python benchmarks/suite.py               # compara y falla (código 1) si algo empeoró
+#   python benchmarks/suite.py --actualizar  # guarda los resultados como nueva línea base
+#
+# Velocidad: líneas por segundo del análisis y de la generación sobre programas
+# de estrés grandes. Calidad: buzones del LMC emitido y ciclos ejecutados con
+# entradas fijas, para input_scripts/ y programas de estrés chicos. La calidad
+# es determinista y no admite empeorar nada; la velocidad se corrige por la de
+# la máquina (una calibración fija en Python puro) y tiene tolerancia
+import argparse
+import gc
+import json
+import os
+import platform
+import sys
+import time
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from allocator import asignar_buzones  # noqa: E402
+from assembler import TAM_MEMORIA, parsear_lmc  # noqa: E402
+from generator import generar_lmc  # noqa: E402
+from optimizer import optimizar_lmc  # noqa: E402
+from parser import analizar_pseudocodigo  # noqa: E402
+from simulator import ErrorSimulacion, simular  # noqa: E402
+
+from programas import ENTRADAS, programas_calidad, programas_velocidad  # noqa: E402
+
+LINEA_BASE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "linea_base.json")
+
+# Opciones del generador y si se pasa el optimizador (como --optimizar)
+VARIANTES: Dict[str, Tuple[Dict[str, Any], bool]] = {
+    "compacta": ({}, False),
+    "optimizada": ({}, True),
+    "rapida": ({"multiplicacion": "rapida", "division": "rapida"}, True),
+    # Sin plegado las condiciones entre constantes llegan al generador
+    "sin_plegado": ({"plegar_constantes": False}, False),
+}
+
+
+# Cómo se muestra en la tabla un programa que no cabe en los 100 buzones
+NO_CABE = "no cabe"
+
+
+class Comparacion(NamedTuple):
+    medida: str
+    base: Any
+    actual: Any
+    estado: str  # "ok", "mejor", "nuevo" o "REGRESIÓN"
+
+
+def _calibracion() -> None:
+    # Trabajo fijo en Python puro (dicts y cadenas, como el compilador): mide
+    # qué tan rápida está la máquina en este momento
+    tabla: Dict[str, int] = {}
+    for i in range(50000):
+        clave = "T" + str(i % 97)
+        tabla[clave] = tabla.get(clave, 0) + len(clave)
+
+
+class Velocidad(NamedTuple):
+    lineas_por_segundo: Dict[str, Dict[str, int]]
+    # Mejor tiempo de _calibracion durante la medición, en segundos
+    calibracion: float
+
+
+def medir_velocidad(repeticiones: int) -> Velocidad:
+    # Como timeit, sin el recolector de basura y con el mejor tiempo. Cada
+    # repetición recorre todos los programas y cada medición va precedida de
+    # la calibración: así una racha lenta de la máquina no afecta a un solo
+    # programa, y la calibración refleja toda la corrida
+    programas = [(nombre, lineas, analizar_pseudocodigo(lineas)) for nombre, lineas in programas_velocidad().items()]
+    mejores: Dict[Tuple[str, str], float] = {}
+    calibracion = float("inf")
+    gc.collect()
+    gc.disable()
+    try:
+        for _ in range(repeticiones):
+            for nombre, lineas, tokens in programas:
+                for fase, funcion in (("analisis", lambda: analizar_pseudocodigo(lineas)), ("generacion", lambda: generar_lmc(tokens))):
+                    inicio = time.perf_counter()
+                    _calibracion()
+                    medio = time.perf_counter()
+                    funcion()
+                    fin = time.perf_counter()
+                    calibracion = min(calibracion, medio - inicio)
+                    mejores[nombre, fase] = min(mejores.get((nombre, fase), float("inf")), fin - medio)
+    finally:
+        gc.enable()
+    resultados: Dict[str, Dict[str, int]] = {}
+    for nombre, lineas, _ in programas:
+        resultados[nombre] = {fase: round(len(lineas) / mejores[nombre, fase]) for fase in ("analisis", "generacion")}
+    return Velocidad(resultados, calibracion)
+
+
+def medir_calidad() -> Dict[str, Dict[str, Any]]:
+    resultados = {}
+    for programa in programas_calidad():
+        tokens = analizar_pseudocodigo(programa.lineas)
+        for variante, (opciones, optimizar) in VARIANTES.items():
+            lmc = generar_lmc(tokens, **opciones)
+            if optimizar:
+                lmc = optimizar_lmc(asignar_buzones(optimizar_lmc(lmc)))
+            buzones: Optional[int] = len(parsear_lmc(lmc))
+            ciclos: Optional[int] = None
+            salidas: Optional[List[List[Any]]] = None
+            # Si no cabe en la memoria no se puede ejecutar, y cuántos buzones
+            # pasa de 100 no es una medida: se guarda como que no cabe (None)
+            if buzones > TAM_MEMORIA:
+                buzones = None
+            else:
+                try:
+                    ejecuciones = [simular(lmc, entradas) for entradas in ENTRADAS]
+                    ciclos = sum(r.ciclos for r in ejecuciones)
+                    salidas = [r.salidas for r in ejecuciones]
+                except ErrorSimulacion as e:
+                    # Un LMC que no termina o falla: sin ciclos, y el error en
+                    # lugar de las salidas para que no coincida con nada
+                    salidas = [[f"{type(e).__name__}: {e}"]]
+            resultados[f"{programa.nombre}/{variante}"] = {"buzones": buzones, "ciclos": ciclos, "salidas": salidas}
+    return resultados
+
+
+def _comparar_costo(medida: str, base: Optional[int], actual: Optional[int]) -> Comparacion:
+    # Menos es mejor; None (no cabe en memoria) es peor que cualquier número.
+    # Que siga sin caber es el resultado esperado
+    if base == actual:
+        estado = "ok"
+    elif actual is None or (base is not None and actual > base):
+        estado = "REGRESIÓN"
+    else:
+        estado = "mejor"
+    return Comparacion(medida, NO_CABE if base is None else base, NO_CABE if actual is None else actual, estado)
+
+
+def comparar(base: Dict[str, Any], actual: Dict[str, Any], tolerancia: float) -> List[Comparacion]:
+    comparaciones = []
+    # Las velocidades guardadas se escalan a la velocidad actual de la máquina
+    escala = 1.0
+    if "calibracion" in actual and "calibracion" in base:
+        escala = base["calibracion"] / actual["calibracion"]
+    for programa, fases in actual.get("velocidad", {}).items():
+        for fase, lps in fases.items():
+            medida = f"velocidad {programa}/{fase} (líneas/s)"
+            previo = base.get("velocidad", {}).get(programa, {}).get(fase)
+            if previo is not None:
+                previo = round(previo * escala)
+            if previo is None:
+                estado = "nuevo"
+            elif lps < previo * (1 - tolerancia):
+                estado = "REGRESIÓN"
+            elif lps > previo * (1 + tolerancia):
+                estado = "mejor"
+            else:
+                estado = "ok"
+            comparaciones.append(Comparacion(medida, previo, lps, estado))
+    for clave, medidas in actual["calidad"].items():
+        previo = base.get("calidad", {}).get(clave)
+        if previo is None:
+            comparaciones.append(Comparacion(f"{clave} buzones", None, medidas["buzones"], "nuevo"))
+            continue
+        comparaciones.append(_comparar_costo(f"{clave} buzones", previo["buzones"], medidas["buzones"]))
+        comparaciones.append(_comparar_costo(f"{clave} ciclos", previo["ciclos"], medidas["ciclos"]))
+        # Un programa que antes corría y ahora da otras salidas es un error del compilador
+        if previo["salidas"] is not None and medidas["salidas"] is not None and previo["salidas"] != medidas["salidas"]:
+            comparaciones.append(Comparacion(f"{clave} salidas", "iguales", "distintas", "REGRESIÓN"))
+    # Todas las variantes de un programa tienen que dar las mismas salidas
+    # (las opciones cambian el código, no el resultado)
+    referencias: Dict[str, Tuple[str, Any]] = {}
+    for clave, medidas in actual["calidad"].items():
+        programa, variante = clave.rsplit("/", 1)
+        if medidas["salidas"] is None:
+            continue
+        if programa not in referencias:
+            referencias[programa] = (variante, medidas["salidas"])
+        elif medidas["salidas"] != referencias[programa][1]:
+            comparaciones.append(Comparacion(f"{clave} salidas", f"las de {referencias[programa][0]}", "distintas", "REGRESIÓN"))
+    return comparaciones
+
+
+def tabla(comparaciones: List[Comparacion]) -> str:
+    filas = [("Medida", "Línea base", "Actual", "Estado")]
+    for c in comparaciones:
+        filas.append((c.medida, "-" if c.base is None else str(c.base), "-" if c.actual is None else str(c.actual), c.estado))
+    anchos = [max(len(f[i]) for f in filas) for i in range(4)]
+    lineas = []
+    for k, fila in enumerate(filas):
+        lineas.append("  ".join(c.ljust(a) if i in (0, 3) else c.rjust(a) for i, (c, a) in enumerate(zip(fila, anchos))).rstrip())
+        if k == 0:
+            lineas.append("  ".join("-" * a for a in anchos))
+    return "\n".join(lineas)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmarks de velocidad del transpilador y calidad del LMC emitido")
+    ap.add_argument("--linea-base", default=LINEA_BASE, help="Archivo JSON con la línea base")
+    ap.add_argument("--actualizar", action="store_true", help="Guarda los resultados actuales como línea base")
+    ap.add_argument("--tolerancia", type=float, default=0.3,
+                    help="Fracción de velocidad que se puede perder sin contar como regresión (por defecto 0.3)")
+    ap.add_argument("--repeticiones", type=int, default=10, help="Se toma el mejor tiempo de estas repeticiones")
+    ap.add_argument("--solo-calidad", action="store_true",
+                    help="No mide velocidad (la línea base de velocidad depende de la máquina)")
+    args = ap.parse_args()
+
+    actual: Dict[str, Any] = {"python": platform.python_version()}
+    if not args.solo_calidad:
+        velocidad = medir_velocidad(args.repeticiones)
+        actual["calibracion"] = velocidad.calibracion
+        actual["velocidad"] = velocidad.lineas_por_segundo
+    actual["calidad"] = medir_calidad()
+
+    if args.actualizar:
+        if args.solo_calidad and os.path.isfile(args.linea_base):
+            # Se conserva la velocidad guardada
+            with open(args.linea_base, "r", encoding="utf-8") as f:
+                guardada = json.load(f)
+            for clave in ("calibracion", "velocidad"):
+                if clave in guardada:
+                    actual[clave] = guardada[clave]
+            # En el mismo orden que una línea base completa
+            actual = {clave: actual[clave] for clave in ("python", "calibracion", "velocidad", "calidad") if clave in actual}
+        with open(args.linea_base, "w", encoding="utf-8") as f:
+            f.write(json.dumps(actual, indent=2, ensure_ascii=False) + "\n")
+        print(f"Línea base guardada en: {args.linea_base}")
+        return
+
+    if not os.path.isfile(args.linea_base):
+        raise SystemExit(f"No existe la línea base: {args.linea_base} (créela con --actualizar)")
+    with open(args.linea_base, "r", encoding="utf-8") as f:
+        base = json.load(f)
+    if not args.solo_calidad:
+        if base.get("python") != actual["python"]:
+            print(f"Aviso: la línea base se tomó con Python {base.get('python')}; las velocidades pueden no ser comparables")
+        if "calibracion" in base:
+            print(f"Velocidad de la máquina respecto de la línea base: {base['calibracion'] / actual['calibracion']:.2f}x "
+                  "(las velocidades de la línea base se escalan por este factor)")
+
+    comparaciones = comparar(base, actual, args.tolerancia)
+    print(tabla(comparaciones))
+    regresiones = [c for c in comparaciones if c.estado == "REGRESIÓN"]
+    print()
+    if regresiones:
+        print(f"{len(regresiones)} regresiones respecto de la línea base")
+        raise SystemExit(1)
+    print("Sin regresiones respecto de la línea base")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,237 @@
+from typing import Dict, List, Set, Tuple
+
+from assembler import Instruccion, formatear_lmc, parsear_lmc
+from optimizer import SALTOS, eliminar_instrucciones, etiquetas_referenciadas
+
+
+def _es_numero(token: str) -> bool:
+    return token.isdigit()
+
+
+def _valor_dat(ins: Instruccion) -> int:
+    return int(ins.operando) if ins.operando is not None else 0
+
+
+def _analizar_flujo(instrucciones: List[Instruccion]) -> Tuple[List[List[int]], List[bool]]:
+    # Sucesores de cada instrucción y cuáles son alcanzables desde la dirección 0
+    direccion = {ins.etiqueta: i for i, ins in enumerate(instrucciones) if ins.etiqueta is not None}
+    escritas = {ins.operando for ins in instrucciones if ins.mnemonico == "STA"}
+    n = len(instrucciones)
+
+    def sucesores(i: int, retornos: Set[int]) -> List[int]:
+        ins = instrucciones[i]
+        if ins.etiqueta is not None and ins.etiqueta in escritas and ins.mnemonico != "DAT":
+            # Celda automodificada: puede convertirse en un salto de retorno
+            return [j for j in [i + 1, *retornos] if j < n]
+        m = ins.mnemonico
+        if m == "BRA":
+            return [direccion[ins.operando]]
+        if m in ("BRZ", "BRP"):
+            return [direccion[ins.operando]] + ([i + 1] if i + 1 < n else [])
+        if m in ("HLT", "DAT"):
+            return []
+        return [i + 1] if i + 1 < n else []
+
+    # Primero sin retornos para saber qué celdas no se ejecutan (datos como RETn)
+    alcanzable = [False] * n
+    retornos: Set[int] = set()
+    while True:
+        alcanzable = [False] * n
+        pila = [0] if n else []
+        while pila:
+            i = pila.pop()
+            if alcanzable[i]:
+                continue
+            alcanzable[i] = True
+            pila.extend(sucesores(i, retornos))
+        # Destinos de los saltos guardados como datos (no ejecutados)
+        nuevos = {
+            direccion[ins.operando]
+            for i, ins in enumerate(instrucciones)
+            if not alcanzable[i] and ins.mnemonico in SALTOS and ins.operando in direccion
+        }
+        if nuevos <= retornos:
+            break
+        retornos |= nuevos
+    return [sucesores(i, retornos) if alcanzable[i] else [] for i in range(n)], alcanzable
+
+
+def _deduplicar_constantes(instrucciones: List[Instruccion], constantes: Set[str], fijas: Set[str]) -> List[Instruccion]:
+    # Una sola celda por valor constante (preferentemente la que no se puede mover)
+    por_valor: Dict[int, List[str]] = {}
+    for ins in instrucciones:
+        if ins.mnemonico == "DAT" and ins.etiqueta in constantes:
+            por_valor.setdefault(_valor_dat(ins), []).append(ins.etiqueta)
+    alias: Dict[str, str] = {}
+    for etiquetas in por_valor.values():
+        if len(etiquetas) < 2:
+            continue
+        fijas_grupo = [e for e in etiquetas if e in fijas]
+        destino = fijas_grupo[0] if fijas_grupo else etiquetas[0]
+        for e in etiquetas:
+            if e != destino and e not in fijas:
+                alias[e] = destino
+    if not alias:
+        return instrucciones
+    return [
+        ins._replace(operando=alias.get(ins.operando, ins.operando)) if ins.mnemonico != "DAT" else ins
+        for ins in instrucciones
+        if not (ins.mnemonico == "DAT" and ins.etiqueta in alias)
+    ]
+
+
+def _inicializar_con_dat(instrucciones: List[Instruccion], constantes: Set[str], variables: Set[str]) -> List[Instruccion]:
+    # "LDA CTEk / STA X" al inicio del programa (antes de cualquier salto o
+    # destino de salto) se ejecuta una sola vez: basta con "X DAT k"
+    referenciadas = etiquetas_referenciadas(instrucciones)
+    valores = {ins.etiqueta: _valor_dat(ins) for ins in instrucciones if ins.mnemonico == "DAT"}
+    usadas: Set[str] = set()
+    iniciales: Dict[str, int] = {}
+    borrar: Set[int] = set()
+    i = 0
+    while i + 2 < len(instrucciones):
+        ins = instrucciones[i]
+        if (ins.etiqueta is not None and ins.etiqueta in referenciadas) or ins.mnemonico in SALTOS or ins.mnemonico in ("HLT", "DAT"):
+            break
+        sig, despues = instrucciones[i + 1], instrucciones[i + 2]
+        if (
+            ins.mnemonico == "LDA" and ins.operando in constantes
+            and sig.mnemonico == "STA" and sig.operando in variables and sig.operando not in usadas
+            and (sig.etiqueta is None or sig.etiqueta not in referenciadas)
+            and despues.mnemonico in ("LDA", "INP")
+        ):
+            iniciales[sig.operando] = valores[ins.operando]
+            usadas.add(sig.operando)
+            borrar.update((i, i + 1))
+            i += 2
+            continue
+        if ins.operando is not None:
+            usadas.add(ins.operando)
+        i += 1
+    if not borrar:
+        return instrucciones
+    instrucciones = eliminar_instrucciones(instrucciones, borrar)
+    return [
+        ins._replace(operando=str(iniciales[ins.etiqueta])) if ins.mnemonico == "DAT" and ins.etiqueta in iniciales else ins
+        for ins in instrucciones
+    ]
+
+
+def _coalescer_variables(instrucciones: List[Instruccion], variables: List[str]) -> List[Instruccion]:
+    # Análisis de vida (hacia atrás) con conjuntos de bits y coloreo voraz del
+    # grafo de interferencia: las variables que nunca están vivas a la vez
+    # comparten buzón
+    sucesores, alcanzable = _analizar_flujo(instrucciones)
+    bit = {v: 1 << k for k, v in enumerate(variables)}
+    n = len(instrucciones)
+    usos = [0] * n
+    defs = [0] * n
+    for i, ins in enumerate(instrucciones):
+        if not alcanzable[i] or ins.operando not in bit:
+            continue
+        if ins.mnemonico == "STA":
+            defs[i] = bit[ins.operando]
+        else:
+            usos[i] = bit[ins.operando]
+    vivas_entrada = [0] * n
+    vivas_salida = [0] * n
+    cambios = True
+    while cambios:
+        cambios = False
+        for i in range(n - 1, -1, -1):
+            if not alcanzable[i]:
+                continue
+            salida = 0
+            for j in sucesores[i]:
+                salida |= vivas_entrada[j]
+            entrada = usos[i] | (salida & ~defs[i])
+            if salida != vivas_salida[i] or entrada != vivas_entrada[i]:
+                vivas_salida[i] = salida
+                vivas_entrada[i] = entrada
+                cambios = True
+
+    interferencia = {v: 0 for v in variables}
+    for i in range(n):
+        if defs[i]:
+            v = instrucciones[i].operando
+            otras = vivas_salida[i] & ~defs[i]
+            interferencia[v] |= otras
+            for w in variables:
+                if otras & bit[w]:
+                    interferencia[w] |= defs[i]
+    # Las vivas al inicio conservan a la vez su valor inicial (DAT)
+    al_inicio = vivas_entrada[0] if n else 0
+    for v in variables:
+        if al_inicio & bit[v]:
+            interferencia[v] |= al_inicio & ~bit[v]
+
+    grupos: List[Tuple[str, int]] = []  # (representante, bits de sus miembros)
+    alias: Dict[str, str] = {}
+    for v in variables:
+        for k, (rep, miembros) in enumerate(grupos):
+            if not interferencia[v] & miembros:
+                grupos[k] = (rep, miembros | bit[v])
+                alias[v] = rep
+                break
+        else:
+            grupos.append((v, bit[v]))
+    if not alias:
+        return instrucciones
+
+    # El buzón compartido toma el valor inicial del miembro vivo al inicio
+    valores = {ins.etiqueta: ins.operando for ins in instrucciones if ins.mnemonico == "DAT"}
+    iniciales: Dict[str, str] = {}
+    for v in variables:
+        if al_inicio & bit[v] and v in alias:
+            iniciales[alias[v]] = valores[v]
+    resultado: List[Instruccion] = []
+    for ins in instrucciones:
+        if ins.mnemonico == "DAT":
+            if ins.etiqueta in alias:
+                continue
+            if ins.etiqueta in iniciales:
+                ins = ins._replace(operando=iniciales[ins.etiqueta])
+        elif ins.operando in alias:
+            ins = ins._replace(operando=alias[ins.operando])
+        resultado.append(ins)
+    return resultado
+
+
+def _clasificar(instrucciones: List[Instruccion]) -> Tuple[Set[str], Set[str], Set[str]]:
+    _, alcanzable = _analizar_flujo(instrucciones)
+    escritas = {ins.operando for i, ins in enumerate(instrucciones) if alcanzable[i] and ins.mnemonico == "STA"}
+    # Celdas nombradas desde instrucciones que son datos (POTINI, RETn): base de
+    # una tabla recorrida con código automodificable; desde ahí nada se mueve
+    leidas_por_datos = {
+        ins.operando for i, ins in enumerate(instrucciones)
+        if not alcanzable[i] and ins.mnemonico != "DAT" and ins.operando is not None
+    }
+    datos = [(i, ins.etiqueta) for i, ins in enumerate(instrucciones) if ins.mnemonico == "DAT" and ins.etiqueta is not None]
+    bases = [i for i, etq in datos if etq in leidas_por_datos]
+    limite = min(bases) if bases else len(instrucciones)
+    fijas = {etq for i, etq in datos if i >= limite}
+    variables = {etq for _, etq in datos if etq in escritas and etq not in fijas}
+    constantes = {etq for _, etq in datos if etq not in escritas}
+    return variables, constantes, fijas
+
+
+def asignar_instrucciones(instrucciones: List[Instruccion]) -> List[Instruccion]:
+    # Con direcciones numéricas en el código no se pueden mover celdas
+    if any(ins.mnemonico != "DAT" and ins.operando is not None and _es_numero(ins.operando) for ins in instrucciones):
+        return instrucciones
+    variables, constantes, fijas = _clasificar(instrucciones)
+    instrucciones = _deduplicar_constantes(instrucciones, constantes, fijas)
+    instrucciones = _inicializar_con_dat(instrucciones, constantes, variables)
+    variables, constantes, fijas = _clasificar(instrucciones)
+    orden = [ins.etiqueta for ins in instrucciones if ins.mnemonico == "DAT" and ins.etiqueta in variables]
+    instrucciones = _coalescer_variables(instrucciones, orden)
+    # Celdas que ya nadie nombra (salvo las de una tabla)
+    referenciadas = etiquetas_referenciadas(instrucciones)
+    return [
+        ins for ins in instrucciones
+        if not (ins.mnemonico == "DAT" and ins.etiqueta is not None and ins.etiqueta not in referenciadas and ins.etiqueta not in fijas)
+    ]
+
+
+def asignar_buzones(texto: str) -> str:
+    return formatear_lmc(asignar_instrucciones(parsear_lmc(texto)))
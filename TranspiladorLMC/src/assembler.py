@@ -0,0 +1,140 @@
+import json
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+TAM_MEMORIA = 100
+
+# Códigos de operación LMC: el operando (dirección) se suma al código base
+OPCODES: Dict[str, int] = {
+    "ADD": 100,
+    "SUB": 200,
+    "STA": 300,
+    "LDA": 500,
+    "BRA": 600,
+    "BRZ": 700,
+    "BRP": 800,
+}
+# Instrucciones sin operando
+OPCODES_FIJOS: Dict[str, int] = {
+    "INP": 901,
+    "OUT": 902,
+    "HLT": 0,
+}
+
+
+class ErrorEnsamblado(ValueError):
+    pass
+
+
+class Instruccion(NamedTuple):
+    etiqueta: Optional[str]
+    mnemonico: str
+    operando: Optional[str]
+    # Línea del pseudocódigo que la produjo (ver sourcemap.py); las pasadas
+    # del optimizador la conservan al copiar la instrucción
+    fuente: Optional[int] = None
+
+
+def _es_mnemonico(palabra: str) -> bool:
+    p = palabra.upper()
+    return p in OPCODES or p in OPCODES_FIJOS or p == "DAT"
+
+
+def parsear_lmc(texto: str) -> List[Instruccion]:
+    instrucciones: List[Instruccion] = []
+    for num, linea in enumerate(texto.splitlines(), start=1):
+        # Comentarios al estilo de los simuladores LMC
+        linea = linea.split("//", 1)[0].split(";", 1)[0]
+        partes = linea.split()
+        if not partes:
+            continue
+        etiqueta: Optional[str] = None
+        if not _es_mnemonico(partes[0]):
+            etiqueta = partes.pop(0)
+            if not partes:
+                raise ErrorEnsamblado(f"Línea {num}: etiqueta '{etiqueta}' sin instrucción")
+        mnemonico = partes[0].upper()
+        if not _es_mnemonico(mnemonico):
+            raise ErrorEnsamblado(f"Línea {num}: instrucción desconocida '{partes[0]}'")
+        if len(partes) > 2:
+            raise ErrorEnsamblado(f"Línea {num}: demasiados operandos")
+        operando = partes[1] if len(partes) == 2 else None
+        if mnemonico in OPCODES and operando is None:
+            raise ErrorEnsamblado(f"Línea {num}: '{mnemonico}' requiere un operando")
+        if mnemonico in OPCODES_FIJOS and operando is not None:
+            raise ErrorEnsamblado(f"Línea {num}: '{mnemonico}' no admite operando")
+        instrucciones.append(Instruccion(etiqueta, mnemonico, operando))
+    return instrucciones
+
+
+def formatear_lmc(instrucciones: List[Instruccion]) -> str:
+    lineas: List[str] = []
+    for ins in instrucciones:
+        partes = [p for p in (ins.etiqueta, ins.mnemonico, ins.operando) if p is not None]
+        lineas.append(" ".join(partes))
+    return "\n".join(lineas)
+
+
+def ensamblar_instrucciones(instrucciones: List[Instruccion]) -> Tuple[List[int], Dict[str, int]]:
+    if len(instrucciones) > TAM_MEMORIA:
+        raise ErrorEnsamblado(
+            f"El programa ocupa {len(instrucciones)} buzones; el máximo de LMC es {TAM_MEMORIA}"
+        )
+    simbolos: Dict[str, int] = {}
+    for direccion, ins in enumerate(instrucciones):
+        if ins.etiqueta is not None:
+            if ins.etiqueta in simbolos:
+                raise ErrorEnsamblado(f"Etiqueta duplicada: '{ins.etiqueta}'")
+            simbolos[ins.etiqueta] = direccion
+
+    def resolver(operando: str) -> int:
+        if operando.isdigit():
+            return int(operando)
+        if operando not in simbolos:
+            raise ErrorEnsamblado(f"Etiqueta no definida: '{operando}'")
+        return simbolos[operando]
+
+    memoria = [0] * TAM_MEMORIA
+    for direccion, ins in enumerate(instrucciones):
+        if ins.mnemonico == "DAT":
+            valor = resolver(ins.operando) if ins.operando is not None else 0
+        elif ins.mnemonico in OPCODES_FIJOS:
+            valor = OPCODES_FIJOS[ins.mnemonico]
+        else:
+            operando = resolver(ins.operando)
+            # Con más de dos cifras el operando invadiría el código de
+            # operación: LDA 150 sería 650, un BRA
+            if operando >= TAM_MEMORIA:
+                raise ErrorEnsamblado(
+                    f"Dirección fuera de rango (0-{TAM_MEMORIA - 1}) en la dirección {direccion}: {ins.mnemonico} {ins.operando}"
+                )
+            valor = OPCODES[ins.mnemonico] + operando
+        if not 0 <= valor <= 999:
+            raise ErrorEnsamblado(f"Valor fuera de rango en la dirección {direccion}: {valor}")
+        memoria[direccion] = valor
+    return memoria, simbolos
+
+
+def ensamblar(texto: str) -> Tuple[List[int], Dict[str, int]]:
+    return ensamblar_instrucciones(parsear_lmc(texto))
+
+
+def imagen_json(memoria: List[int], simbolos: Dict[str, int]) -> str:
+    return json.dumps({"memoria": memoria, "simbolos": simbolos}, separators=(",", ":"))
+
+
+def cargar_imagen(ruta: str) -> Tuple[List[int], Dict[str, int]]:
+    with open(ruta, "r", encoding="utf-8") as f:
+        try:
+            datos = json.load(f)
+        except ValueError as e:
+            raise ErrorEnsamblado(f"Imagen de memoria inválida: no es JSON ({e})")
+    # Se acepta también un arreglo simple de enteros. Los valores de cada
+    # buzón los valida MaquinaLMC al cargarla
+    if isinstance(datos, list):
+        return datos, {}
+    if not isinstance(datos, dict) or not isinstance(datos.get("memoria"), list):
+        raise ErrorEnsamblado("Imagen de memoria inválida: se esperaba un arreglo o un objeto con 'memoria'")
+    simbolos = datos.get("simbolos", {})
+    if not isinstance(simbolos, dict):
+        raise ErrorEnsamblado("Imagen de memoria inválida: 'simbolos' debe ser un objeto")
+    return datos["memoria"], simbolos
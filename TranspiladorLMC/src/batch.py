@@ -0,0 +1,201 @@
+import glob
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from typing import Any, Dict, List, NamedTuple, Optional
+
+from parser import analizar_pseudocodigo
+from generator import generar_lmc
+from cache import CacheCompilacion
+from assembler import ensamblar, imagen_json
+from optimizer import optimizar_lmc
+from allocator import asignar_buzones
+from profiling import Perfil
+from utils import leer_lineas, escribir_texto, asegurar_directorio
+
+MANIFIESTO = "manifiesto.json"
+
+
+class ResultadoLote(NamedTuple):
+    archivo: str
+    estado: str  # "compilado", "sin cambios" o "error"
+    segundos: float
+    buzones: Optional[int]
+    error: Optional[str] = None
+    lmc: Optional[str] = None
+    memoria: Optional[str] = None
+    huella: Optional[str] = None
+
+
+def compilar_fuente(
+    lineas: List[str],
+    opciones: Dict[str, Any],
+    optimizar: bool = False,
+    cache: Optional[CacheCompilacion] = None,
+    perfil: Optional[Perfil] = None,
+) -> str:
+    if perfil is not None:
+        # Al medir se compila sin caché: con un acierto no habría fases
+        with perfil.fase("analizar_pseudocodigo"):
+            tokens = analizar_pseudocodigo(lineas)
+        with perfil.fase("generar_lmc"):
+            lmc = generar_lmc(tokens, **opciones)
+    elif cache is not None:
+        lmc = cache.compilar(lineas, opciones)
+    else:
+        lmc = generar_lmc(analizar_pseudocodigo(lineas), **opciones)
+    if optimizar:
+        # La asignación de buzones deja copias redundantes (STA X / STA X) que
+        # la segunda pasada de mirilla elimina
+        with perfil.fase("optimizar") if perfil is not None else nullcontext():
+            lmc = optimizar_lmc(asignar_buzones(optimizar_lmc(lmc)))
+    return lmc
+
+
+def huella_fuente(texto: str, opciones: Dict[str, Any], optimizar: bool) -> str:
+    # Cambiar las opciones también obliga a recompilar
+    config = json.dumps({"opciones": opciones, "optimizar": optimizar}, sort_keys=True)
+    return hashlib.sha256(f"{config}\n{texto}".encode("utf-8")).hexdigest()
+
+
+def expandir_entradas(patron: str) -> List[str]:
+    # Un directorio toma todos sus .txt; si no, se interpreta como glob
+    if os.path.isdir(patron):
+        patron = os.path.join(patron, "*.txt")
+    return sorted(r for r in glob.glob(patron) if os.path.isfile(r))
+
+
+def raiz_entradas(rutas: List[str]) -> str:
+    # La carpeta común a todas las entradas: los nombres del manifiesto y de la
+    # salida son relativos a ella, así dos archivos con el mismo nombre en
+    # subcarpetas distintas no se pisan
+    return os.path.commonpath([os.path.dirname(os.path.abspath(r)) for r in rutas])
+
+
+def nombre_relativo(ruta: str, raiz: str) -> str:
+    # Con / en cualquier sistema, para que el manifiesto sea portable
+    return os.path.relpath(os.path.abspath(ruta), raiz).replace(os.sep, "/")
+
+
+def salida_base(out_dir: str, nombre: str) -> str:
+    # Ruta de salida sin extensión: la subcarpeta de la entrada se repite
+    return os.path.join(out_dir, *os.path.splitext(nombre)[0].split("/"))
+
+
+def cargar_manifiesto(directorio: str) -> Dict[str, Dict[str, Any]]:
+    ruta = os.path.join(directorio, MANIFIESTO)
+    if not os.path.isfile(ruta):
+        return {}
+    try:
+        with open(ruta, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        # Un manifiesto dañado solo obliga a recompilar todo
+        return {}
+
+
+def guardar_manifiesto(directorio: str, manifiesto: Dict[str, Dict[str, Any]]) -> None:
+    escribir_texto(os.path.join(directorio, MANIFIESTO), json.dumps(manifiesto, indent=2, sort_keys=True, ensure_ascii=False))
+
+
+def compilar_archivo(ruta: str, nombre: str, opciones: Dict[str, Any], optimizar: bool, dir_cache: Optional[str] = None) -> ResultadoLote:
+    # Se ejecuta en un proceso del pool: devuelve el texto y la imagen, y el
+    # proceso principal es el único que escribe archivos. Los procesos
+    # comparten solo el nivel en disco de la caché
+    inicio = time.perf_counter()
+    try:
+        lineas = leer_lineas(ruta)
+        cache = CacheCompilacion(directorio=dir_cache) if dir_cache is not None else None
+        lmc = compilar_fuente(lineas, opciones, optimizar, cache)
+        memoria, simbolos = ensamblar(lmc)
+    except Exception as e:
+        return ResultadoLote(nombre, "error", time.perf_counter() - inicio, None, str(e))
+    huella = huella_fuente("\n".join(lineas), opciones, optimizar)
+    return ResultadoLote(
+        nombre,
+        "compilado",
+        time.perf_counter() - inicio,
+        len(lmc.splitlines()),
+        lmc=lmc,
+        memoria=imagen_json(memoria, simbolos),
+        huella=huella,
+    )
+
+
+def compilar_lote(
+    rutas: List[str],
+    out_dir: str,
+    opciones: Dict[str, Any],
+    optimizar: bool = False,
+    procesos: Optional[int] = None,
+    dir_cache: Optional[str] = None,
+) -> List[ResultadoLote]:
+    asegurar_directorio(out_dir)
+    manifiesto = cargar_manifiesto(out_dir)
+    raiz = raiz_entradas(rutas) if rutas else out_dir
+    nombres = {ruta: nombre_relativo(ruta, raiz) for ruta in rutas}
+    resultados: Dict[str, ResultadoLote] = {}
+    pendientes: List[str] = []
+    # Salida (sin extensión) de cada archivo: a.txt y a.pseudo darían el mismo .lmc
+    salidas: Dict[str, str] = {}
+    for ruta in rutas:
+        nombre = nombres[ruta]
+        base = salida_base(out_dir, nombre)
+        if base in salidas:
+            resultados[ruta] = ResultadoLote(nombre, "error", 0.0, None, f"su salida coincide con la de {salidas[base]}")
+            continue
+        salidas[base] = nombre
+        registro = manifiesto.get(nombre)
+        huella = huella_fuente("\n".join(leer_lineas(ruta)), opciones, optimizar)
+        if (
+            registro is not None
+            and registro.get("huella") == huella
+            and os.path.isfile(f"{base}.lmc")
+            and os.path.isfile(f"{base}.mem")
+        ):
+            resultados[ruta] = ResultadoLote(nombre, "sin cambios", 0.0, registro.get("buzones"))
+        else:
+            pendientes.append(ruta)
+
+    if pendientes:
+        with ProcessPoolExecutor(max_workers=procesos) as pool:
+            futuros = {ruta: pool.submit(compilar_archivo, ruta, nombres[ruta], opciones, optimizar, dir_cache) for ruta in pendientes}
+            for ruta, futuro in futuros.items():
+                resultados[ruta] = futuro.result()
+
+    for ruta in pendientes:
+        r = resultados[ruta]
+        if r.estado != "compilado":
+            # Un archivo con errores se vuelve a intentar la próxima vez
+            manifiesto.pop(r.archivo, None)
+            continue
+        base = salida_base(out_dir, r.archivo)
+        escribir_texto(f"{base}.lmc", r.lmc)
+        escribir_texto(f"{base}.mem", r.memoria)
+        manifiesto[r.archivo] = {"huella": r.huella, "buzones": r.buzones}
+    guardar_manifiesto(out_dir, manifiesto)
+    return [resultados[ruta] for ruta in rutas]
+
+
+def tabla_resumen(resultados: List[ResultadoLote]) -> str:
+    filas = [("Archivo", "Estado", "Tiempo (ms)", "Buzones")]
+    for r in resultados:
+        buzones = "-" if r.buzones is None else str(r.buzones)
+        tiempo = "-" if r.estado == "sin cambios" else f"{r.segundos * 1000:.1f}"
+        filas.append((r.archivo, r.estado, tiempo, buzones))
+    anchos = [max(len(f[i]) for f in filas) for i in range(4)]
+    lineas = []
+    for k, fila in enumerate(filas):
+        lineas.append("  ".join(c.ljust(a) if i < 2 else c.rjust(a) for i, (c, a) in enumerate(zip(fila, anchos))))
+        if k == 0:
+            lineas.append("  ".join("-" * a for a in anchos))
+    errores = [r for r in resultados if r.estado == "error"]
+    compilados = sum(1 for r in resultados if r.estado == "compilado")
+    lineas.append("")
+    lineas.append(f"{compilados} compilados, {len(resultados) - compilados - len(errores)} sin cambios, {len(errores)} con errores")
+    for r in errores:
+        lineas.append(f"  {r.archivo}: {r.error}")
+    return "\n".join(lineas)
@@ -0,0 +1,217 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from parser import analizar_pseudocodigo
+from generator import generar_lmc
+from nodes import Instruccion, a_dicts, como_nodos
+from utils import asegurar_directorio
+
+# Módulos cuyo código decide el resultado: si cambian, las entradas guardadas
+# en disco dejan de valer
+_MODULOS_COMPILADOR = ("lexer.py", "nodes.py", "parser.py", "incremental.py", "folding.py", "ir.py", "generator.py", "assembler.py",
+                       "costs.py", "optimizer.py")
+_huella_compilador: Optional[str] = None
+
+# Entradas (archivos) que guarda como mucho el nivel en disco: al pasarse se
+# borran las de fecha de modificación más vieja, y un acierto la renueva
+MAX_ARCHIVOS_DISCO = 512
+
+
+def huella_compilador() -> str:
+    global _huella_compilador
+    if _huella_compilador is None:
+        h = hashlib.sha256()
+        base = os.path.dirname(os.path.abspath(__file__))
+        for nombre in _MODULOS_COMPILADOR:
+            with open(os.path.join(base, nombre), "rb") as f:
+                h.update(f.read())
+        _huella_compilador = h.hexdigest()
+    return _huella_compilador
+
+
+def normalizar_fuente(lineas: List[str]) -> str:
+    # La sangría y los espacios al final no cambian el programa; las líneas en
+    # blanco sí (cierran un SINO), salvo las del final del archivo
+    texto = "\n".join(linea.strip() for linea in lineas)
+    return texto.rstrip("\n")
+
+
+def _hash(texto: str) -> str:
+    return hashlib.sha256(texto.encode("utf-8")).hexdigest()
+
+
+def _tokens_json(contenido: str) -> List[Instruccion]:
+    # En disco los tokens van en el formato de dicts
+    try:
+        return como_nodos(json.loads(contenido))
+    except (KeyError, TypeError) as e:
+        raise ValueError(f"Tokens mal formados: {e}")
+
+
+class _LRU:
+    def __init__(self, capacidad: int):
+        self.capacidad = capacidad
+        self.datos: "OrderedDict[str, Any]" = OrderedDict()
+
+    def obtener(self, clave: str) -> Optional[Any]:
+        valor = self.datos.get(clave)
+        if valor is not None:
+            self.datos.move_to_end(clave)
+        return valor
+
+    def guardar(self, clave: str, valor: Any) -> None:
+        self.datos[clave] = valor
+        self.datos.move_to_end(clave)
+        while len(self.datos) > self.capacidad:
+            self.datos.popitem(last=False)
+
+
+class CacheCompilacion:
+    # Caché direccionada por contenido: la clave es el hash de la fuente
+    # normalizada (tokens) o de la fuente más las opciones (LMC). Un nivel en
+    # memoria acotado (LRU) y, si se indica un directorio, otro en disco que
+    # comparten varias ejecuciones o procesos
+    def __init__(self, capacidad: int = 256, directorio: Optional[str] = None, max_disco: int = MAX_ARCHIVOS_DISCO):
+        self._tokens = _LRU(capacidad)
+        self._lmc = _LRU(capacidad)
+        self._cerrojo = threading.Lock()
+        self.directorio = directorio
+        self.max_disco = max_disco
+        if directorio is not None:
+            try:
+                asegurar_directorio(directorio)
+            except OSError:
+                # No se puede crear: queda solo el nivel en memoria
+                self.directorio = None
+        self.aciertos = 0
+        self.aciertos_disco = 0
+        self.fallos = 0
+
+    def estadisticas(self) -> Dict[str, int]:
+        with self._cerrojo:
+            return {
+                "aciertos": self.aciertos,
+                "aciertos_disco": self.aciertos_disco,
+                "fallos": self.fallos,
+                "entradas": len(self._lmc.datos),
+            }
+
+    def _ruta(self, clave: str, extension: str) -> str:
+        return os.path.join(self.directorio, f"{clave}.{extension}")
+
+    def _leer_disco(self, clave: str, extension: str) -> Optional[str]:
+        if self.directorio is None:
+            return None
+        ruta = self._ruta(clave, extension)
+        try:
+            with open(ruta, "r", encoding="utf-8") as f:
+                contenido = f.read()
+        except OSError:
+            return None
+        try:
+            # Usada hace poco: queda entre las últimas en borrarse
+            os.utime(ruta)
+        except OSError:
+            pass
+        return contenido
+
+    def _escribir_disco(self, clave: str, extension: str, contenido: str) -> None:
+        if self.directorio is None:
+            return
+        # Se escribe aparte y se renombra: otro proceso nunca lee un archivo a medias
+        ruta = self._ruta(clave, extension)
+        temporal = f"{ruta}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(temporal, "w", encoding="utf-8") as f:
+                f.write(contenido)
+            os.replace(temporal, ruta)
+            self._recortar_disco()
+        except OSError:
+            # Disco lleno, sin permisos, etc.: el valor ya quedó en memoria y
+            # la compilación sigue como con la caché solo en memoria
+            try:
+                os.remove(temporal)
+            except OSError:
+                pass
+
+    def _recortar_disco(self) -> None:
+        # Otro proceso puede estar borrando a la vez: lo que ya no está se salta
+        fechas: List[Tuple[float, str]] = []
+        with os.scandir(self.directorio) as entradas:
+            for entrada in entradas:
+                if entrada.name.endswith((".lmc", ".tokens.json")):
+                    try:
+                        fechas.append((entrada.stat().st_mtime, entrada.path))
+                    except OSError:
+                        pass
+        if len(fechas) <= self.max_disco:
+            return
+        fechas.sort()
+        for _, ruta in fechas[: len(fechas) - self.max_disco]:
+            try:
+                os.remove(ruta)
+            except OSError:
+                pass
+
+    def _buscar(self, nivel: _LRU, clave: str, extension: str, decodificar) -> Tuple[Optional[Any], bool]:
+        # (valor, si vino del disco); None si no está en ningún nivel
+        with self._cerrojo:
+            valor = nivel.obtener(clave)
+        if valor is not None:
+            return valor, False
+        contenido = self._leer_disco(clave, extension)
+        if contenido is None:
+            return None, False
+        try:
+            valor = decodificar(contenido)
+        except ValueError:
+            # Entrada dañada: se recalcula
+            return None, False
+        with self._cerrojo:
+            nivel.guardar(clave, valor)
+        return valor, True
+
+    def analizar(self, lineas: List[str]) -> List[Instruccion]:
+        fuente = normalizar_fuente(lineas)
+        clave = _hash(f"{huella_compilador()}\n{fuente}")
+        tokens, _ = self._buscar(self._tokens, clave, "tokens.json", _tokens_json)
+        if tokens is None:
+            tokens = analizar_pseudocodigo(fuente.splitlines())
+            with self._cerrojo:
+                self._tokens.guardar(clave, tokens)
+            self._escribir_disco(clave, "tokens.json", json.dumps(a_dicts(tokens), ensure_ascii=False))
+        return tokens
+
+    def compilar(
+        self,
+        lineas: List[str],
+        opciones: Optional[Dict[str, Any]] = None,
+        tokens: Optional[List[Instruccion]] = None,
+    ) -> str:
+        # Equivale a generar_lmc(analizar_pseudocodigo(lineas), **opciones); con
+        # otras opciones sobre la misma fuente se reutilizan los tokens. Quien ya
+        # tiene el análisis (la GUI, con el incremental) puede pasarlo en `tokens`
+        opciones = opciones or {}
+        fuente = normalizar_fuente(lineas)
+        config = json.dumps(opciones, sort_keys=True)
+        clave = _hash(f"{huella_compilador()}\n{config}\n{fuente}")
+        lmc, de_disco = self._buscar(self._lmc, clave, "lmc", str)
+        with self._cerrojo:
+            if lmc is None:
+                self.fallos += 1
+            else:
+                self.aciertos += 1
+                self.aciertos_disco += de_disco
+        if lmc is not None:
+            return lmc
+        if tokens is None:
+            tokens = self.analizar(lineas)
+        lmc = generar_lmc(tokens, **opciones)
+        with self._cerrojo:
+            self._lmc.guardar(clave, lmc)
+        self._escribir_disco(clave, "lmc", lmc)
+        return lmc
@@ -0,0 +1,740 @@
+import re
+from typing import Dict, List, NamedTuple, Optional, Set, Tuple, Union
+
+from assembler import Instruccion, parsear_lmc
+from optimizer import SALTOS
+
+# Costo simbólico en ciclos (una instrucción LMC = un ciclo): coeficiente de
+# cada producto de factores. Un factor es una expresión sobre buzones ("B",
+# "min(A,B)", "C/B") o las vueltas de un bucle que no se pueden deducir
+# ("n(MIENTRAS1)"); la tupla vacía es la parte constante
+Costo = Dict[Tuple[str, ...], int]
+# Expresión escalar: un número o una cadena como "min(A,B)"
+Expresion = Union[int, str]
+# Valor simbólico del acumulador: ("var", X), ("resta", X, Y), ("suma", X, Y),
+# ("entrada",) o ("celda", d): lo que carga la instrucción automodificable d
+Valor = Optional[Tuple]
+
+
+class BloqueLMC(NamedTuple):
+    inicio: int
+    fin: int  # exclusivo
+    etiqueta: str
+    instrucciones: int
+    bucle: Optional[str]  # cabecera del bucle más interno que lo contiene
+    rutina: Optional[str]
+
+
+class Bucle(NamedTuple):
+    cabecera: str
+    direccion: int
+    profundidad: int
+    por_vuelta: Costo
+    vueltas: Costo
+    costo: Costo
+    rutina: Optional[str]
+    # Direcciones de comienzo de los bloques del cuerpo
+    bloques: Tuple[int, ...]
+
+
+class Llamada(NamedTuple):
+    direccion: int
+    rutina: str
+    costo: Costo
+
+
+class EstimacionCostos(NamedTuple):
+    bloques: List[BloqueLMC]
+    bucles: List[Bucle]
+    llamadas: List[Llamada]
+    # Cota del camino más caro desde la dirección 0 hasta HLT
+    total: Costo
+
+
+def _sumar(a: Costo, b: Costo) -> Costo:
+    r = dict(a)
+    for k, v in b.items():
+        r[k] = r.get(k, 0) + v
+    return r
+
+
+def _maximo(a: Costo, b: Costo) -> Costo:
+    # Término a término: con coeficientes positivos es una cota de los dos
+    r = dict(a)
+    for k, v in b.items():
+        r[k] = max(r.get(k, 0), v)
+    return r
+
+
+def _multiplicar(a: Costo, b: Costo) -> Costo:
+    r: Costo = {}
+    for ka, va in a.items():
+        for kb, vb in b.items():
+            clave = tuple(sorted(ka + kb))
+            if va * vb:
+                r[clave] = r.get(clave, 0) + va * vb
+    return r
+
+
+def _como_costo(e: Optional[Expresion]) -> Optional[Costo]:
+    if e is None or isinstance(e, int):
+        return None if e is None else {(): e}
+    return {(e,): 1}
+
+
+def _sustituir(c: Costo, cambios: Dict[str, str]) -> Costo:
+    # Renombra buzones dentro de los factores (argumentos de una rutina por
+    # los de la llamada); los factores que quedan numéricos pasan al coeficiente
+    if not cambios:
+        return c
+    patron = re.compile(r"\b(" + "|".join(re.escape(x) for x in cambios) + r")\b")
+    r: Costo = {}
+    for k, v in c.items():
+        factores = []
+        for f in k:
+            f = patron.sub(lambda m: cambios[m.group(1)], f)
+            if f.isdigit():
+                v *= int(f)
+            else:
+                factores.append(f)
+        clave = tuple(sorted(factores))
+        if v:
+            r[clave] = r.get(clave, 0) + v
+    return r
+
+
+def _factor(f: str) -> str:
+    # Entre paréntesis si tiene operadores fuera de paréntesis
+    nivel = 0
+    for ch in f:
+        if ch == "(":
+            nivel += 1
+        elif ch == ")":
+            nivel -= 1
+        elif nivel == 0 and ch in "+-/":
+            return f"({f})"
+    return f
+
+
+def formatear_costo(c: Costo) -> str:
+    terminos = []
+    for k in sorted((k for k in c if k and c[k]), key=lambda k: (-len(k), k)):
+        if c[k] == 1 and len(k) == 1:
+            terminos.append(k[0])
+        else:
+            producto = "·".join(_factor(f) for f in k)
+            terminos.append(producto if c[k] == 1 else f"{c[k]}·{producto}")
+    if c.get((), 0) or not terminos:
+        terminos.append(str(c.get((), 0)))
+    return " + ".join(terminos)
+
+
+def _resta(a: Expresion, b: Expresion) -> Expresion:
+    if b == 0:
+        return a
+    if isinstance(a, int) and isinstance(b, int):
+        return max(a - b, 0)
+    return f"{a}-{_factor(str(b))}"
+
+
+def _dividir(a: Expresion, b: Expresion) -> Optional[Expresion]:
+    if b == 1:
+        return a
+    if isinstance(a, int) and isinstance(b, int):
+        return a // b if b else None
+    return f"{_factor(str(a))}/{_factor(str(b))}"
+
+
+class _Analizador:
+    # Grafo de bloques básicos del programa y de cada rutina compartida. Una
+    # llamada ("LDA RETn / STA xRET / BRA SUBx", donde RETn guarda "BRA
+    # VUELTAn") se trata como una instrucción que sigue en VUELTAn y cuesta lo
+    # que la rutina, desde su entrada hasta la celda de retorno
+    def __init__(self, instrucciones: List[Instruccion]):
+        self.ins = instrucciones
+        n = len(instrucciones)
+        self.direccion = {i.etiqueta: k for k, i in enumerate(instrucciones) if i.etiqueta is not None}
+        self.escritas = {i.operando for i in instrucciones if i.mnemonico == "STA"}
+        # Buzones de datos que nunca se escriben
+        self.constantes: Dict[str, int] = {}
+        for i in instrucciones:
+            if i.mnemonico == "DAT" and i.etiqueta is not None and i.etiqueta not in self.escritas:
+                if i.operando is None or i.operando.isdigit():
+                    self.constantes[i.etiqueta] = int(i.operando or 0)
+
+        self.llamadas: Dict[int, Tuple[int, int]] = {}  # dirección del salto -> (entrada, vuelta)
+        self.retornos: Set[int] = set()
+        for p in range(1, n):
+            sta, lda = instrucciones[p], instrucciones[p - 1]
+            if sta.mnemonico != "STA" or lda.mnemonico != "LDA":
+                continue
+            celda, fuente = self._destino(sta.operando), self._destino(lda.operando)
+            if celda is None or fuente is None or instrucciones[fuente].mnemonico != "BRA" or instrucciones[celda].mnemonico == "DAT":
+                continue
+            vuelta = self._destino(instrucciones[fuente].operando)
+            self.retornos.add(celda)
+            for q in range(p + 1, n):
+                m = instrucciones[q].mnemonico
+                if m in SALTOS or m == "HLT":
+                    if m == "BRA" and vuelta is not None and self._destino(instrucciones[q].operando) is not None:
+                        self.llamadas[q] = (self._destino(instrucciones[q].operando), vuelta)
+                    break
+
+        # Celdas alcanzables y entradas de rutinas
+        alcanzable: Set[int] = set()
+        self.rutinas: List[int] = []
+        pila = [0] if n else []
+        while pila:
+            k = pila.pop()
+            if k in alcanzable:
+                continue
+            alcanzable.add(k)
+            if k in self.llamadas and self.llamadas[k][0] not in self.rutinas:
+                self.rutinas.append(self.llamadas[k][0])
+                pila.append(self.llamadas[k][0])
+            pila.extend(self._sucesores(k))
+
+        # Bloques básicos
+        lideres = {0, *self.rutinas}
+        for k in alcanzable:
+            suc = self._sucesores(k)
+            lideres.update(s for s in suc if s != k + 1)
+            if suc != [k + 1] or k in self.llamadas:
+                lideres.add(k + 1)
+        self.bloques: List[Tuple[int, int]] = []
+        for k in sorted(alcanzable):
+            if k in lideres or not self.bloques or self.bloques[-1][1] != k:
+                self.bloques.append((k, k + 1))
+            else:
+                self.bloques[-1] = (self.bloques[-1][0], k + 1)
+        self.bloque_de = {k: b for b, (inicio, fin) in enumerate(self.bloques) for k in range(inicio, fin)}
+        self.suc: List[List[int]] = [
+            [self.bloque_de[s] for s in self._sucesores(fin - 1) if s in self.bloque_de] for _, fin in self.bloques
+        ]
+        self.pred: List[List[int]] = [[] for _ in self.bloques]
+        for b, sucesores in enumerate(self.suc):
+            for s in sucesores:
+                self.pred[s].append(b)
+
+        self.bucles: List[Bucle] = []
+        self.bucle_de: Dict[int, Tuple[int, str]] = {}  # bloque -> (tamaño, cabecera) del más interno
+        self.rutina_de: Dict[int, str] = {}
+        self.costos_rutina: Dict[int, Costo] = {}
+        self.lista_llamadas: List[Llamada] = []
+
+    def _destino(self, operando: Optional[str]) -> Optional[int]:
+        if operando is None:
+            return None
+        if operando.isdigit():
+            return int(operando) if int(operando) < len(self.ins) else None
+        return self.direccion.get(operando)
+
+    def _sucesores(self, k: int) -> List[int]:
+        n = len(self.ins)
+        if k in self.retornos:
+            return []
+        if k in self.llamadas:
+            return [self.llamadas[k][1]]
+        ins = self.ins[k]
+        if ins.mnemonico == "BRA":
+            d = self._destino(ins.operando)
+            return [] if d is None else [d]
+        if ins.mnemonico in ("BRZ", "BRP"):
+            d = self._destino(ins.operando)
+            return ([] if d is None else [d]) + ([k + 1] if k + 1 < n else [])
+        if ins.mnemonico in ("HLT", "DAT"):
+            return []
+        return [k + 1] if k + 1 < n else []
+
+    def nombre(self, b: int) -> str:
+        inicio = self.bloques[b][0]
+        return self.ins[inicio].etiqueta or f"@{inicio}"
+
+    # --- Valores simbólicos ---
+
+    def _acumulador(self, b: int, j: int, profundidad: int = 0) -> Valor:
+        # Valor del acumulador tras ejecutar hasta la instrucción j del bloque b
+        inicio = self.bloques[b][0]
+        while j >= inicio:
+            ins = self.ins[j]
+            m = ins.mnemonico
+            if j in self.llamadas:
+                return None
+            if m in SALTOS or m in ("STA", "OUT"):
+                j -= 1
+                continue
+            if m == "LDA":
+                if ins.etiqueta is not None and ins.etiqueta in self.escritas:
+                    return ("celda", j)
+                return ("var", ins.operando)
+            if m == "INP":
+                return ("entrada",)
+            if m in ("ADD", "SUB"):
+                previo = self._acumulador(b, j - 1, profundidad)
+                if previo is not None and previo[0] == "var":
+                    return ("resta" if m == "SUB" else "suma", previo[1], ins.operando)
+            return None
+        # Comienzo del bloque: el mismo valor desde todos los predecesores
+        if profundidad >= 8 or not self.pred[b]:
+            return None
+        valores = {self._acumulador(p, self.bloques[p][1] - 1, profundidad + 1) for p in self.pred[b]}
+        return valores.pop() if len(valores) == 1 else None
+
+    def _simbolo(self, x: str) -> Expresion:
+        return self.constantes.get(x, x)
+
+    def _valor_inicial(self, x: str, cabecera: int, cuerpo: Set[int], dom: Dict[int, Set[int]]) -> Expresion:
+        # Valor de x al entrar al bucle: la última escritura en cada camino que
+        # llega desde afuera. Si hay dos y las elige un "LDA P / SUB Q / BRP",
+        # el valor es el mínimo o el máximo de P y Q; si no, se acota por el máximo
+        fuentes: Dict[int, Expresion] = {}
+        vistos: Set[int] = set()
+        pila = [p for p in self.pred[cabecera] if p not in cuerpo]
+        while pila:
+            b = pila.pop()
+            if b in vistos or b in cuerpo:
+                continue
+            vistos.add(b)
+            inicio, fin = self.bloques[b]
+            k = next((k for k in range(fin - 1, inicio - 1, -1) if self.ins[k].mnemonico == "STA" and self.ins[k].operando == x), None)
+            if k is None:
+                if not self.pred[b]:
+                    fuentes[b] = self._simbolo(x)
+                pila.extend(self.pred[b])
+                continue
+            valor = self._acumulador(b, k - 1)
+            fuentes[b] = self._simbolo(valor[1]) if valor is not None and valor[0] == "var" else x
+        valores = set(fuentes.values())
+        if not valores:
+            return x
+        if len(valores) == 1:
+            return valores.pop()
+        if len(valores) == 2:
+            # Bifurcación más cercana que domina a la cabecera
+            for d in sorted(dom.get(cabecera, ()), key=lambda d: -len(dom[d])):
+                inicio, fin = self.bloques[d]
+                ultima = self.ins[fin - 1]
+                valor = self._acumulador(d, fin - 1)
+                if ultima.mnemonico != "BRP" or valor is None or valor[0] != "resta":
+                    continue
+                p, q = self._simbolo(valor[1]), self._simbolo(valor[2])
+                if {p, q} != valores:
+                    continue
+                tomado = self.bloque_de.get(self._destino(ultima.operando))
+                # Lo que se guarda si P - Q >= 0
+                en_tomado = [v for b, v in fuentes.items() if tomado is not None and tomado in dom.get(b, ())]
+                if en_tomado:
+                    return f"{'min' if en_tomado[0] == q else 'max'}({p},{q})"
+        return f"max({','.join(sorted(str(v) for v in valores))})"
+
+    def _paso(self, x: str, cuerpo: Set[int]) -> Optional[Tuple[int, str]]:
+        # (+1 o -1, buzón sumado o restado) si x se escribe una sola vez por vuelta
+        escrituras = [
+            (b, k)
+            for b in cuerpo
+            for k in range(*self.bloques[b])
+            if self.ins[k].mnemonico == "STA" and self.ins[k].operando == x
+        ]
+        if len(escrituras) != 1:
+            return None
+        b, k = escrituras[0]
+        valor = self._acumulador(b, k - 1)
+        if valor is None:
+            return None
+        if valor[0] == "resta" and valor[1] == x:
+            return (-1, valor[2])
+        if valor[0] == "suma" and x in valor[1:]:
+            return (1, valor[2] if valor[1] == x else valor[1])
+        if valor[0] == "celda":
+            return (0, str(valor[1]))
+        return None
+
+    def _tabla(self, x: str, cota: str, cabecera: int, cuerpo: Set[int], dom: Dict[int, Set[int]]) -> Optional[int]:
+        # x se carga con una instrucción automodificable "LDA TABLA+i" cuyo
+        # operando avanza en 1 por vuelta (la tabla de potencias): el bucle
+        # termina al leer el valor de `cota`
+        paso = self._paso(x, cuerpo)
+        if paso is None or paso[0] != 0:
+            return None
+        celda = self.ins[int(paso[1])].etiqueta
+        avance = self._paso(celda, cuerpo)
+        if avance is None or avance[0] != 1 or self.constantes.get(avance[1]) != 1 or cota not in self.constantes:
+            return None
+        inicial = self._valor_inicial(celda, cabecera, cuerpo, dom)
+        cargada = self._destino(str(inicial)) if isinstance(inicial, str) else None
+        if cargada is None or self.ins[cargada].mnemonico != "LDA":
+            return None
+        k = self._destino(self.ins[cargada].operando)
+        leidas = 0
+        while k is not None and k < len(self.ins) and self.ins[k].mnemonico == "DAT":
+            leidas += 1
+            if self.constantes.get(self.ins[k].etiqueta or "") == self.constantes[cota]:
+                # La última lectura termina el bucle sin volver a la cabecera
+                return leidas - 1
+            k += 1
+        return None
+
+    def _salida(self, b: int, cuerpo: Set[int]) -> Optional[str]:
+        # Cuándo sale el bucle por el bloque b según el valor comparado: "cero",
+        # "negativo" o "no_negativo"
+        ultima = self.ins[self.bloques[b][1] - 1]
+        if ultima.mnemonico in ("BRZ", "BRP") and self.bloque_de.get(self._destino(ultima.operando)) not in cuerpo:
+            return "cero" if ultima.mnemonico == "BRZ" else "no_negativo"
+        if ultima.mnemonico == "BRP":
+            # Sale por la instrucción siguiente
+            return "negativo"
+        if ultima.mnemonico not in ("BRZ", "BRA"):
+            return None
+        # Se sale cuando fallan los saltos anteriores ("BRP DIVOK / BRZ DIVOK /
+        # BRA FINDIV")
+        while len(self.pred[b]) == 1 and self.bloques[self.pred[b][0]][1] == self.bloques[b][0]:
+            b = self.pred[b][0]
+            previa = self.ins[self.bloques[b][1] - 1]
+            if previa.mnemonico == "BRP":
+                return "negativo"
+            if previa.mnemonico != "BRZ":
+                break
+        return None
+
+    def _vueltas(self, cabecera: int, cuerpo: Set[int], dom: Dict[int, Set[int]]) -> Optional[Costo]:
+        # Vueltas (saltos de regreso a la cabecera) a partir de la condición de
+        # salida: el valor comparado (x o x - y), cuánto cambia en cada vuelta
+        # y si el bucle termina al llegar a 0 o al pasar a negativo
+        for b in sorted(cuerpo):
+            if all(s in cuerpo for s in self.suc[b]):
+                continue
+            valor = self._acumulador(b, self.bloques[b][1] - 1)
+            salida = self._salida(b, cuerpo)
+            if valor is None or salida is None:
+                continue
+            if valor[0] == "var":
+                x, y = valor[1], None
+            elif valor[0] == "resta":
+                x, y = valor[1], valor[2]
+            else:
+                continue
+            paso_x = self._paso(x, cuerpo)
+            paso_y = self._paso(y, cuerpo) if y is not None else None
+            x0 = self._valor_inicial(x, cabecera, cuerpo, dom)
+            y0 = self._valor_inicial(y, cabecera, cuerpo, dom) if y is not None else 0
+            if paso_x is not None and paso_x[0] == -1 and paso_x[1] == y and paso_y is None and salida == "negativo":
+                # x -= y mientras x >= y: el cociente
+                return _como_costo(_dividir(x0, y0))
+            # Cuánto baja el valor comparado en cada vuelta
+            if paso_x is not None and paso_x[0] in (-1, 1) and paso_y is None:
+                baja, paso = paso_x[0] == -1, paso_x[1]
+            elif paso_y is not None and paso_y[0] in (-1, 1) and paso_x is None:
+                baja, paso = paso_y[0] == 1, paso_y[1]
+            else:
+                vueltas = self._tabla(x, y, cabecera, cuerpo, dom) if y is not None else None
+                if vueltas is not None:
+                    return {(): vueltas}
+                continue
+            k = self._simbolo(paso)
+            if baja and salida in ("cero", "negativo"):
+                # Baja hasta 0; si sigue mientras no sea negativo, una vuelta más
+                vueltas = _como_costo(_dividir(_resta(x0, y0), k))
+                if vueltas is not None and salida == "negativo":
+                    vueltas = _sumar(vueltas, {(): 1})
+                return vueltas
+            if not baja and salida in ("cero", "no_negativo") and y is not None:
+                # Sube hasta 0
+                return _como_costo(_dividir(_resta(y0, x0), k))
+        return None
+
+    # --- Costos ---
+
+    def _costo_bloque(self, b: int) -> Costo:
+        inicio, fin = self.bloques[b]
+        costo: Costo = {(): fin - inicio}
+        if fin - 1 in self.llamadas:
+            costo = _sumar(costo, self._costo_llamada(fin - 1))
+        return costo
+
+    def _costo_llamada(self, k: int) -> Costo:
+        entrada = self.llamadas[k][0]
+        if entrada not in self.costos_rutina:
+            self.costos_rutina[entrada] = {}  # sin recursión
+            self.costos_rutina[entrada] = self.region(self.bloque_de[entrada], self.ins[entrada].etiqueta or f"@{entrada}")
+        # Argumentos: "LDA V / STA X" antes del salto
+        inicio = self.bloques[self.bloque_de[k]][0]
+        cambios: Dict[str, str] = {}
+        for j in range(inicio + 1, k):
+            if self.ins[j].mnemonico == "STA" and self.ins[j - 1].mnemonico == "LDA":
+                cambios[self.ins[j].operando] = str(self._simbolo(self.ins[j - 1].operando))
+        costo = _sustituir(self.costos_rutina[entrada], cambios)
+        if not any(ll.direccion == k for ll in self.lista_llamadas):
+            self.lista_llamadas.append(Llamada(k, self.ins[entrada].etiqueta or f"@{entrada}", costo))
+        return costo
+
+    def region(self, entrada: int, rutina: Optional[str] = None) -> Costo:
+        # Costo del camino más caro desde `entrada` hasta el final (HLT o la
+        # celda de retorno de la rutina), con los bucles colapsados
+        nodos: List[int] = []
+        vistos = {entrada}
+        pila = [entrada]
+        while pila:
+            b = pila.pop()
+            nodos.append(b)
+            for s in self.suc[b]:
+                if s not in vistos:
+                    vistos.add(s)
+                    pila.append(s)
+        for b in nodos:
+            if rutina is not None:
+                self.rutina_de[b] = rutina
+
+        # Dominadores
+        dom: Dict[int, Set[int]] = {b: set(nodos) for b in nodos}
+        dom[entrada] = {entrada}
+        cambio = True
+        while cambio:
+            cambio = False
+            for b in nodos:
+                if b == entrada:
+                    continue
+                preds = [p for p in self.pred[b] if p in vistos]
+                nuevo = set.intersection(*(dom[p] for p in preds)) | {b} if preds else {b}
+                if nuevo != dom[b]:
+                    dom[b], cambio = nuevo, True
+
+        # Bucles naturales, agrupados por cabecera
+        cuerpos: Dict[int, Set[int]] = {}
+        for u in nodos:
+            for h in self.suc[u]:
+                if h in dom[u]:
+                    cuerpo = cuerpos.setdefault(h, {h})
+                    pila = [u]
+                    while pila:
+                        b = pila.pop()
+                        if b not in cuerpo:
+                            cuerpo.add(b)
+                            pila.extend(p for p in self.pred[b] if p in vistos)
+        padre: Dict[int, Optional[int]] = {}
+        for h, cuerpo in cuerpos.items():
+            contenedores = [g for g, otro in cuerpos.items() if g != h and h in otro and cuerpo <= otro]
+            padre[h] = min(contenedores, key=lambda g: len(cuerpos[g])) if contenedores else None
+        for h, cuerpo in cuerpos.items():
+            for b in cuerpo:
+                if b not in self.bucle_de or len(cuerpo) < self.bucle_de[b][0]:
+                    self.bucle_de[b] = (len(cuerpo), self.nombre(h))
+
+        costos_bucle: Dict[int, Costo] = {}
+
+        def representante(b: int, contexto: Optional[int]) -> int:
+            # El bucle hijo del contexto que contiene a b (por su cabecera), o b
+            r = b
+            for h, cuerpo in cuerpos.items():
+                if padre[h] == contexto and b in cuerpo:
+                    r = h
+            return r
+
+        def costo(r: int, contexto: Optional[int]) -> Costo:
+            if r in cuerpos and r != contexto:
+                return costos_bucle[r]
+            return self._costo_bloque(r)
+
+        def caminos(contexto: Optional[int], inicio: int) -> Tuple[Dict[int, Costo], Dict[int, List[int]]]:
+            # Costo acumulado hasta cada nodo (el camino más caro) y sus
+            # sucesores, dentro del contexto y sin los regresos a su cabecera
+            dentro = cuerpos[contexto] if contexto is not None else vistos
+            sucesores: Dict[int, List[int]] = {}
+            pendientes = [inicio]
+            while pendientes:
+                r = pendientes.pop()
+                miembros = cuerpos[r] if r in cuerpos and r != contexto else {r}
+                destinos = set()
+                for b in miembros:
+                    for s in self.suc[b]:
+                        if s in miembros or s not in dentro or s == contexto:
+                            continue
+                        destinos.add(representante(s, contexto))
+                sucesores[r] = sorted(destinos)
+                for s in sucesores[r]:
+                    if s not in sucesores and s not in pendientes:
+                        pendientes.append(s)
+            entrantes = {r: 0 for r in sucesores}
+            for r in sucesores:
+                for s in sucesores[r]:
+                    entrantes[s] += 1
+            listos = [inicio]
+            acumulado: Dict[int, Costo] = {inicio: {}}
+            procesados = 0
+            while listos:
+                r = listos.pop()
+                procesados += 1
+                acumulado[r] = _sumar(acumulado.get(r, {}), costo(r, contexto))
+                for s in sucesores[r]:
+                    acumulado[s] = _maximo(acumulado.get(s, {}), acumulado[r])
+                    entrantes[s] -= 1
+                    if entrantes[s] == 0:
+                        listos.append(s)
+            if procesados < len(sucesores):
+                # Ciclo que no es un bucle natural: cota con todos los nodos
+                todo: Costo = {}
+                for r in sucesores:
+                    todo = _sumar(todo, costo(r, contexto))
+                acumulado = {r: todo for r in sucesores}
+            return acumulado, sucesores
+
+        # De los bucles más internos a los externos
+        for h in sorted(cuerpos, key=lambda h: len(cuerpos[h])):
+            cuerpo = cuerpos[h]
+            acumulado, _ = caminos(h, h)
+            por_vuelta: Costo = {}
+            salida: Costo = {}
+            for r, c in acumulado.items():
+                miembros = cuerpos[r] if r in cuerpos and r != h else {r}
+                destinos = {s for b in miembros for s in self.suc[b]}
+                if h in destinos:
+                    por_vuelta = _maximo(por_vuelta, c)
+                if any(s not in cuerpo for s in destinos) or not destinos:
+                    salida = _maximo(salida, c)
+            vueltas = self._vueltas(h, cuerpo, dom)
+            if vueltas is None:
+                vueltas = {(f"n({self.nombre(h)})",): 1}
+            costos_bucle[h] = _sumar(_multiplicar(por_vuelta, vueltas), salida)
+            profundidad = 1
+            g = padre[h]
+            while g is not None:
+                profundidad += 1
+                g = padre[g]
+            self.bucles.append(
+                Bucle(
+                    self.nombre(h),
+                    self.bloques[h][0],
+                    profundidad,
+                    por_vuelta,
+                    vueltas,
+                    costos_bucle[h],
+                    rutina,
+                    tuple(sorted(self.bloques[b][0] for b in cuerpo)),
+                )
+            )
+
+        inicio = representante(entrada, None)
+        acumulado, sucesores = caminos(None, inicio)
+        total: Costo = {}
+        for r, c in acumulado.items():
+            if not sucesores[r]:
+                total = _maximo(total, c)
+        return total
+
+
+def estimar_costos(texto: str) -> EstimacionCostos:
+    # Análisis estático del LMC (generado o escrito a mano): instrucciones por
+    # bloque básico, vueltas de cada bucle en función de los buzones que lo
+    # controlan y una cota del costo total
+    analizador = _Analizador(parsear_lmc(texto))
+    total = analizador.region(0) if analizador.bloques else {}
+    for entrada in analizador.rutinas:
+        if entrada not in analizador.costos_rutina:
+            analizador.costos_rutina[entrada] = analizador.region(analizador.bloque_de[entrada], analizador.nombre(analizador.bloque_de[entrada]))
+    bloques = [
+        BloqueLMC(
+            inicio,
+            fin,
+            analizador.nombre(b),
+            fin - inicio,
+            analizador.bucle_de[b][1] if b in analizador.bucle_de else None,
+            analizador.rutina_de.get(b),
+        )
+        for b, (inicio, fin) in enumerate(analizador.bloques)
+    ]
+    bucles = sorted(analizador.bucles, key=lambda b: b.direccion)
+    llamadas = sorted(analizador.lista_llamadas, key=lambda ll: ll.direccion)
+    return EstimacionCostos(bloques, bucles, llamadas, total)
+
+
+def veces_ejecutada(estimacion: EstimacionCostos, direccion: int) -> Costo:
+    # Cuántas veces se ejecuta la instrucción de esa dirección: el producto de
+    # las vueltas de los bucles que la contienen (1 fuera de todo bucle)
+    bloque = next((b.inicio for b in estimacion.bloques if b.inicio <= direccion < b.fin), None)
+    veces: Costo = {(): 1}
+    for bucle in estimacion.bucles:
+        if bloque in bucle.bloques:
+            veces = _multiplicar(veces, bucle.vueltas)
+    return veces
+
+
+def llamadas_ejecutadas(estimacion: EstimacionCostos) -> Costo:
+    # Total de llamadas a rutinas compartidas que hace el programa
+    total: Costo = {}
+    for llamada in estimacion.llamadas:
+        total = _sumar(total, veces_ejecutada(estimacion, llamada.direccion))
+    return total
+
+
+def cota_numerica(c: Costo, maximo: int = 999) -> int:
+    # El costo en el peor caso: cada factor vale a lo sumo lo que cabe en un
+    # buzón (X/K a lo sumo maximo/K), también las vueltas que no se deducen
+    total = 0
+    for factores, coeficiente in c.items():
+        for f in factores:
+            divisor = re.fullmatch(r".*/(\d+)", f)
+            coeficiente *= maximo // int(divisor.group(1)) if divisor and int(divisor.group(1)) else maximo
+        total += coeficiente
+    return total
+
+
+def _tabla(filas: List[Tuple[str, ...]]) -> List[str]:
+    anchos = [max(len(f[i]) for f in filas) for i in range(len(filas[0]))]
+    lineas = []
+    for k, fila in enumerate(filas):
+        lineas.append("  ".join(c.ljust(a) for c, a in zip(fila, anchos)).rstrip())
+        if k == 0:
+            lineas.append("  ".join("-" * a for a in anchos))
+    return lineas
+
+
+def informe_costos(estimacion: EstimacionCostos) -> str:
+    lineas = [f"Costo estimado: {formatear_costo(estimacion.total)} ciclos (cota del camino más caro)"]
+    if estimacion.bucles:
+        lineas += ["", "Bucles:"]
+        filas = [("Cabecera", "Dirección", "Nivel", "Por vuelta", "Vueltas", "Costo", "Rutina")]
+        for b in estimacion.bucles:
+            filas.append((b.cabecera, str(b.direccion), str(b.profundidad), formatear_costo(b.por_vuelta), formatear_costo(b.vueltas), formatear_costo(b.costo), b.rutina or ""))
+        lineas += _tabla(filas)
+    if estimacion.llamadas:
+        lineas += ["", "Llamadas:"]
+        filas = [("Dirección", "Rutina", "Costo por llamada")]
+        for ll in estimacion.llamadas:
+            filas.append((str(ll.direccion), ll.rutina, formatear_costo(ll.costo)))
+        lineas += _tabla(filas)
+    lineas += ["", "Bloques:"]
+    filas = [("Dirección", "Etiqueta", "Instrucciones", "Bucle", "Rutina")]
+    for b in estimacion.bloques:
+        filas.append((f"{b.inicio}-{b.fin - 1}", b.etiqueta, str(b.instrucciones), b.bucle or "", b.rutina or ""))
+    lineas += _tabla(filas)
+    if any(f.startswith("n(") for b in estimacion.bucles for k in b.vueltas for f in k):
+        lineas += ["", "n(X): vueltas del bucle X, que no se deducen del código (dependen de los datos)"]
+    return "\n".join(lineas)
+
+
+def comentar_costos(texto: str, estimacion: Optional[EstimacionCostos] = None) -> str:
+    # El mismo LMC con el costo de cada bloque, bucle y llamada en comentarios
+    # "//", que el ensamblador ignora
+    if estimacion is None:
+        estimacion = estimar_costos(texto)
+    notas: Dict[int, List[str]] = {}
+    for b in estimacion.bloques:
+        notas.setdefault(b.inicio, []).append(f"bloque: {b.instrucciones} instr.")
+    for b in estimacion.bucles:
+        notas.setdefault(b.direccion, []).append(
+            f"bucle: {formatear_costo(b.por_vuelta)} por vuelta × {formatear_costo(b.vueltas)} ≈ {formatear_costo(b.costo)}"
+        )
+    for ll in estimacion.llamadas:
+        notas.setdefault(ll.direccion, []).append(f"llamada a {ll.rutina} ≈ {formatear_costo(ll.costo)}")
+    lineas = texto.splitlines()
+    ancho = min(max((len(l) for l in lineas), default=0), 24)
+    resultado = [f"// Costo estimado: {formatear_costo(estimacion.total)} ciclos"]
+    direccion = 0
+    for linea in lineas:
+        if not linea.split("//", 1)[0].split(";", 1)[0].strip():
+            resultado.append(linea)
+            continue
+        if direccion in notas:
+            linea = f"{linea.ljust(ancho)}  // {'; '.join(notas[direccion])}"
+        resultado.append(linea)
+        direccion += 1
+    return "\n".join(resultado)
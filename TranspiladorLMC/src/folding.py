@@ -0,0 +1,169 @@
+from typing import Dict, Iterable, List, Optional, Set, Union
+
+from nodes import Asignacion, Condicion, Instruccion, Leer, Mientras, Si, Token, como_nodos
+
+# Celdas que escribe el propio código generado (resto de la división,
+# argumentos de las rutinas): su valor nunca se conoce en compilación
+_PREFIJOS_RESERVADOS = ("TMP", "MULARG", "DIVARG")
+
+_COMPARADORES = {
+    ">": lambda a, b: a > b,
+    "<": lambda a, b: a < b,
+    "=": lambda a, b: a == b,
+    ">=": lambda a, b: a >= b,
+    "<=": lambda a, b: a <= b,
+    "!=": lambda a, b: a != b,
+}
+_ESPEJO = {">": "<", "<": ">", ">=": "<=", "<=": ">=", "=": "=", "!=": "!="}
+
+
+def _es_numero(token: str) -> bool:
+    return token.isdigit()
+
+
+def _es_reservada(nombre: str) -> bool:
+    return nombre.upper().startswith(_PREFIJOS_RESERVADOS)
+
+
+def _variables(operaciones: List[Instruccion], conjunto: Optional[Set[str]] = None) -> Set[str]:
+    if conjunto is None:
+        conjunto = set()
+    for op in operaciones:
+        if isinstance(op, Asignacion):
+            operandos = [op.destino, op.izquierda, op.derecha]
+        elif isinstance(op, Si):
+            operandos = [op.condicion.izquierda, op.condicion.derecha]
+            _variables(op.entonces, conjunto)
+            _variables(op.sino, conjunto)
+        elif isinstance(op, Mientras):
+            operandos = [op.condicion.izquierda, op.condicion.derecha]
+            _variables(op.cuerpo, conjunto)
+        else:
+            operandos = [op.var]
+        conjunto.update(o.upper() for o in operandos if not _es_numero(o))
+    return conjunto
+
+
+def _asignadas(operaciones: List[Instruccion], conjunto: Optional[Set[str]] = None) -> Set[str]:
+    if conjunto is None:
+        conjunto = set()
+    for op in operaciones:
+        if isinstance(op, Leer):
+            conjunto.add(op.var.upper())
+        elif isinstance(op, Asignacion):
+            conjunto.add(op.destino.upper())
+        elif isinstance(op, Si):
+            _asignadas(op.entonces, conjunto)
+            _asignadas(op.sino, conjunto)
+        elif isinstance(op, Mientras):
+            _asignadas(op.cuerpo, conjunto)
+    return conjunto
+
+
+def _plegar(izquierda: int, op: str, derecha: int) -> Optional[int]:
+    # Solo se pliega si el resultado queda en el rango de LMC (0-999) sin
+    # desbordar; si no, la operación se deja para la ejecución
+    if op == "+":
+        r = izquierda + derecha
+    elif op == "-":
+        r = izquierda - derecha
+    elif op == "*":
+        r = izquierda * derecha
+    else:
+        # El código generado deja cociente 0 al dividir por 0
+        r = izquierda // derecha if derecha else 0
+    return r if 0 <= r <= 999 else None
+
+
+def _valor(token: str, conocidos: Dict[str, int]) -> str:
+    if _es_numero(token):
+        return str(int(token))
+    k = conocidos.get(token.upper())
+    return str(k) if k is not None else token
+
+
+def _condicion(condicion: Condicion, conocidos: Dict[str, int]) -> Condicion:
+    return Condicion(_valor(condicion.izquierda, conocidos), condicion.op, _valor(condicion.derecha, conocidos))
+
+
+def _cumple(condicion: Condicion) -> Optional[bool]:
+    # None si no se puede saber en compilación
+    izq, cmp, der = condicion.izquierda, condicion.op, condicion.derecha
+    if _es_numero(izq) and _es_numero(der):
+        return _COMPARADORES[cmp](int(izq), int(der))
+    # Todo valor está entre 0 y 999: "a >= 0" siempre se cumple, "a < 0" nunca
+    if _es_numero(izq):
+        izq, der, cmp = der, izq, _ESPEJO[cmp]
+    if _es_numero(der) and int(der) in (0, 999):
+        extremo = {(0, ">="): True, (0, "<"): False, (999, "<="): True, (999, ">"): False}
+        return extremo.get((int(der), cmp))
+    return None
+
+
+def _propagar_asignacion(op: Asignacion, conocidos: Dict[str, int], plegar_division: bool) -> Asignacion:
+    destino = op.destino.upper()
+    izquierda = _valor(op.izquierda, conocidos)
+    derecha = _valor(op.derecha, conocidos)
+    r = None
+    if _es_numero(izquierda) and _es_numero(derecha) and (op.op != "/" or plegar_division):
+        r = _plegar(int(izquierda), op.op, int(derecha))
+    if r is None or _es_reservada(destino):
+        conocidos.pop(destino, None)
+        # Un factor conocido permite al generador desenrollar la multiplicación
+        return op._replace(izquierda=izquierda, derecha=derecha)
+    conocidos[destino] = r
+    # "D = r + 0": el generador lo emite como LDA CTEr / STA D
+    return op._replace(izquierda=str(r), op="+", derecha="0")
+
+
+def _propagar_bloque(operaciones: List[Instruccion], conocidos: Dict[str, int], plegar_division: bool) -> List[Instruccion]:
+    resultado: List[Instruccion] = []
+    for op in operaciones:
+        if isinstance(op, Leer):
+            conocidos.pop(op.var.upper(), None)
+            resultado.append(op)
+        elif isinstance(op, Asignacion):
+            resultado.append(_propagar_asignacion(op, conocidos, plegar_division))
+        elif isinstance(op, Si):
+            cond = _condicion(op.condicion, conocidos)
+            cumple = _cumple(cond)
+            if cumple is not None:
+                # Condición conocida: solo queda la rama que se ejecuta
+                rama = op.entonces if cumple else op.sino
+                resultado.extend(_propagar_bloque(rama, conocidos, plegar_division))
+                continue
+            en_sino = dict(conocidos)
+            entonces = _propagar_bloque(op.entonces, conocidos, plegar_division)
+            sino = _propagar_bloque(op.sino, en_sino, plegar_division)
+            # Tras el SI solo se conoce lo que vale lo mismo por ambas ramas
+            for v in list(conocidos):
+                if en_sino.get(v) != conocidos[v]:
+                    del conocidos[v]
+            resultado.append(op._replace(condicion=cond, entonces=entonces, sino=sino))
+        elif isinstance(op, Mientras):
+            # Lo que el cuerpo modifica no se conoce en ninguna vuelta
+            en_vueltas = dict(conocidos)
+            for v in _asignadas(op.cuerpo):
+                en_vueltas.pop(v, None)
+            cond = _condicion(op.condicion, en_vueltas)
+            if _cumple(cond) is False:
+                # No se entra nunca: el bucle desaparece
+                continue
+            cuerpo = _propagar_bloque(op.cuerpo, dict(en_vueltas), plegar_division)
+            conocidos.clear()
+            conocidos.update(en_vueltas)
+            resultado.append(op._replace(condicion=cond, cuerpo=cuerpo))
+        else:
+            resultado.append(op)
+    return resultado
+
+
+def propagar_constantes(operaciones: Iterable[Union[Instruccion, Token]]) -> List[Instruccion]:
+    operaciones = como_nodos(operaciones)
+    # Las variables empiezan en 0 (DAT sin valor); las reservadas se desconocen
+    variables = _variables(operaciones)
+    conocidos = {v: 0 for v in variables if not _es_reservada(v)}
+    # Plegar una división no deja el resto en TMPDIV: si el programa lo lee,
+    # las divisiones se mantienen
+    plegar_division = "TMPDIV" not in variables
+    return _propagar_bloque(operaciones, conocidos, plegar_division)
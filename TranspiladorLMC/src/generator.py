@@ -1,64 +1,24 @@
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Iterable, Optional, Tuple, Union
+
+from assembler import OPCODES, OPCODES_FIJOS, TAM_MEMORIA
+from costs import cota_numerica, estimar_costos, llamadas_ejecutadas
+from folding import propagar_constantes
+from ir import NEGACION, SALTOS_CONDICION, Bloque, Operacion, construir_ir, disponer_bloques, simplificar_saltos
+from nodes import Asignacion, Instruccion, Mientras, Si, Token, como_nodos
+from profiling import contar
+
+# Los helpers de asignación reciben tanto una Asignacion del árbol como una
+# Operacion del IR: usan solo destino, izquierda, op y derecha
+Calculo = Union[Asignacion, Operacion]
 
 
 def _es_numero(token: str) -> bool:
     return token.isdigit()
 
 
-def _recolectar_simbolos(operaciones: List[Dict[str, Any]]) -> Tuple[set, Dict[int, str]]:
-    conjunto_vars = set()
-    constantes: Dict[int, str] = {}
-
-    def agregar_token(tok: str):
-        nonlocal conjunto_vars, constantes
-        if _es_numero(tok):
-            valor = int(tok)
-            if valor not in constantes:
-                constantes[valor] = f"CTE{valor}"
-        else:
-            conjunto_vars.add(tok.upper())
-
-    for op in operaciones:
-        t = op["tipo"]
-        if t == "leer" or t == "imprimir":
-            agregar_token(op["var"])
-        elif t == "asignacion":
-            agregar_token(op["destino"])
-            agregar_token(op["izquierda"])
-            agregar_token(op["derecha"])
-            if op.get("op") == "*":
-                # Temporal para multiplicación y constantes 0 y 1
-                conjunto_vars.add("TMPMUL")
-                if 0 not in constantes:
-                    constantes[0] = "CTE0"
-                if 1 not in constantes:
-                    constantes[1] = "CTE1"
-            if op.get("op") == "/":
-                # Temporal para división y constantes 0 y 1
-                conjunto_vars.add("TMPDIV")
-                if 0 not in constantes:
-                    constantes[0] = "CTE0"
-                if 1 not in constantes:
-                    constantes[1] = "CTE1"
-        elif t == "si":
-            agregar_token(op["condicion"]["izquierda"])
-            agregar_token(op["condicion"]["derecha"])
-            vars_int, consts_int = _recolectar_simbolos(op["entonces"])
-            conjunto_vars |= vars_int
-            for k, v in consts_int.items():
-                constantes.setdefault(k, v)
-            vars_int, consts_int = _recolectar_simbolos(op["sino"])
-            conjunto_vars |= vars_int
-            for k, v in consts_int.items():
-                constantes.setdefault(k, v)
-        elif t == "mientras":
-            agregar_token(op["condicion"]["izquierda"])
-            agregar_token(op["condicion"]["derecha"])
-            vars_int, consts_int = _recolectar_simbolos(op["cuerpo"])
-            conjunto_vars |= vars_int
-            for k, v in consts_int.items():
-                constantes.setdefault(k, v)
-    return conjunto_vars, constantes
+def _es_neutro(op: Calculo) -> bool:
+    # "D = X + 0" o "D = X - 0": basta con copiar X
+    return op.op in ("+", "-") and _es_numero(op.derecha) and int(op.derecha) == 0
 
 
 def _etiqueta_mem(token: str, constantes: Dict[int, str]) -> str:
@@ -67,371 +27,708 @@ def _etiqueta_mem(token: str, constantes: Dict[int, str]) -> str:
     return token.upper()
 
 
-def _gen_asignacion(op: Dict[str, Any], constantes: Dict[int, str]) -> List[str]:
+def _gen_asignacion(op: Calculo, constantes: Dict[int, str]) -> List[str]:
     lineas: List[str] = []
-    lineas.append(f"LDA {_etiqueta_mem(op['izquierda'], constantes)}")
-    if op["op"] == "+":
-        lineas.append(f"ADD {_etiqueta_mem(op['derecha'], constantes)}")
-    elif op["op"] == "-":
-        lineas.append(f"SUB {_etiqueta_mem(op['derecha'], constantes)}")
+    lineas.append(f"LDA {_etiqueta_mem(op.izquierda, constantes)}")
+    if _es_neutro(op):
+        # Copia: sumar o restar 0 no cambia el valor
+        pass
+    elif op.op == "+":
+        lineas.append(f"ADD {_etiqueta_mem(op.derecha, constantes)}")
+    elif op.op == "-":
+        lineas.append(f"SUB {_etiqueta_mem(op.derecha, constantes)}")
     else:  # '*' y '/' manejados fuera
         return []
-    lineas.append(f"STA {_etiqueta_mem(op['destino'], constantes)}")
+    lineas.append(f"STA {_etiqueta_mem(op.destino, constantes)}")
     return lineas
 
 
-def _gen_multiplicacion(op: Dict[str, Any], constantes: Dict[int, str]) -> List[str]:
-    destino = _etiqueta_mem(op['destino'], constantes)
-    izq = _etiqueta_mem(op['izquierda'], constantes)  # multiplicando
-    der = _etiqueta_mem(op['derecha'], constantes)    # multiplicador
-
-    # Asegurar CTE0 y CTE1
-    if 0 not in constantes:
-        constantes[0] = "CTE0"
-    if 1 not in constantes:
-        constantes[1] = "CTE1"
+MODOS_MULTIPLICACION = ("compacta", "rapida")
+
+# Tabla de potencias de dos (de mayor a menor, en buzones consecutivos) que
+# recorre la multiplicación rápida mediante una instrucción automodificable
+POTENCIAS = [512, 256, 128, 64, 32, 16, 8, 4, 2, 1]
+
+
+# Buzones del bucle de multiplicación con un operando constante, por modo:
+# una multiplicación desenrollada que no ocupa más que esto siempre conviene
+BUZONES_MULTIPLICACION_BUCLE = {"compacta": 14, "rapida": 28}
+
+
+def _factor_constante(op: Calculo) -> Optional[Tuple[str, int]]:
+    # (otro operando, constante) si uno de los factores es un literal; con dos
+    # literales, la constante es el menor
+    izq, der = op.izquierda, op.derecha
+    if _es_numero(izq) and (not _es_numero(der) or int(izq) < int(der)):
+        return der, int(izq)
+    if _es_numero(der):
+        return izq, int(der)
+    return None
+
+
+def _cadena_multiplicacion(x: str, k: int, cero: str) -> List[str]:
+    # x * k sin bucle (deja el producto en el acumulador): sumas repetidas
+    # (x + x + ...) o duplicaciones sobre los bits de k (Horner), la más corta
+    if k == 0:
+        return [f"LDA {cero}"]
+    sumas = [f"LDA {x}"] + [f"ADD {x}"] * (k - 1)
+    duplicaciones = [f"LDA {x}"]
+    for i, bit in enumerate(bin(k)[3:]):
+        # La primera duplicación es x + x; las demás pasan por TMPMUL
+        duplicaciones.extend([f"ADD {x}"] if i == 0 else ["STA TMPMUL", "ADD TMPMUL"])
+        if bit == "1":
+            duplicaciones.append(f"ADD {x}")
+    return min(sumas, duplicaciones, key=len)
+
+
+def _desenrollable(op: Calculo, limite: int) -> bool:
+    factor = _factor_constante(op)
+    return factor is not None and len(_cadena_multiplicacion("X", factor[1], "CTE0")) + 1 <= limite
+
+
+MODOS_DIVISION = ("compacta", "rapida")
+
+
+def _gen_division_por_cero(dividendo: str, destino: str, constantes: Dict[int, str]) -> List[str]:
+    # Divisor literal 0: cociente 0 y el dividendo queda como resto
+    return [
+        f"LDA {dividendo}",
+        "STA TMPDIV",
+        f"LDA {constantes[0]}",
+        f"STA {destino}",
+    ]
+
+
+def _gen_salto(cmp: str, izquierda: str, derecha: str, destino: str, siguiente: str) -> List[str]:
+    # Salta a destino si se cumple la comparación; si no, continúa en siguiente.
+    # Sin derecha se compara izquierda contra 0: basta con cargarla (LDA deja
+    # el indicador de negativo apagado, así que BRP siempre salta)
+    if not derecha:
+        lineas = [f"LDA {izquierda}"]
+        if cmp == "<":
+            # Nunca se cumple
+            return lineas
+        if cmp == ">=":
+            return lineas + [f"BRA {destino}"]
+        return lineas + [f"{m} {destino if al_destino else siguiente}" for m, al_destino in SALTOS_CONDICION[cmp][1]]
+    invertir, saltos = SALTOS_CONDICION[cmp]
+    a, b = (derecha, izquierda) if invertir else (izquierda, derecha)
+    lineas = [f"LDA {a}", f"SUB {b}"]
+    for mnemonico, al_destino in saltos:
+        lineas.append(f"{mnemonico} {destino if al_destino else siguiente}")
+    return lineas
 
-    tmp = "TMPMUL"
-    # Etiquetas únicas
-    idx = _gen_op._ix_etq
-    etq_loop = f"MULT{idx}"
-    etq_fin = f"FINMULT{idx}"
-    _gen_op._ix_etq += 1
 
-    lineas: List[str] = []
-    # destino = 0
-    lineas.append(f"LDA {constantes[0]}")
-    lineas.append(f"STA {destino}")
-    # tmp = der
-    lineas.append(f"LDA {der}")
-    lineas.append(f"STA {tmp}")
-    # loop
-    lineas.append(f"{etq_loop} LDA {tmp}")
-    lineas.append(f"BRZ {etq_fin}")
-    lineas.append(f"LDA {destino}")
-    lineas.append(f"ADD {izq}")
-    lineas.append(f"STA {destino}")
-    lineas.append(f"LDA {tmp}")
-    lineas.append(f"SUB {constantes[1]}")
-    lineas.append(f"STA {tmp}")
-    lineas.append(f"BRA {etq_loop}")
-    lineas.append(f"{etq_fin} LDA {destino}")  # etiqueta de fin (no cambia valor)
+def _gen_terminador(bloque: Bloque, siguiente: Optional[Bloque], constantes: Dict[int, str]) -> List[str]:
+    # Saltos al final del bloque: el sucesor que queda a continuación en
+    # memoria no necesita salto
+    t = bloque.terminador
+    if t.tipo == "fin":
+        return ["HLT"]
+    if t.tipo == "ir":
+        return [] if t.verdadero is siguiente else [f"BRA {t.verdadero.etiqueta}"]
+    cmp, izquierda, derecha = t.comparacion
+    izquierda = _etiqueta_mem(izquierda, constantes)
+    derecha = "" if _es_numero(derecha) and int(derecha) == 0 else _etiqueta_mem(derecha, constantes)
+    verdadero, falso = t.verdadero.etiqueta, t.falso.etiqueta
+    if t.falso is siguiente:
+        return _gen_salto(cmp, izquierda, derecha, verdadero, falso)
+    if t.verdadero is siguiente:
+        return _gen_salto(NEGACION[cmp], izquierda, derecha, falso, verdadero)
+    lineas = _gen_salto(cmp, izquierda, derecha, verdadero, falso)
+    if not lineas[-1].startswith("BRA "):
+        lineas.append(f"BRA {falso}")
     return lineas
 
 
-def _gen_division(op: Dict[str, Any], constantes: Dict[int, str]) -> List[str]:
-    destino = _etiqueta_mem(op['destino'], constantes)  # cociente
-    dividendo = _etiqueta_mem(op['izquierda'], constantes)
-    divisor = _etiqueta_mem(op['derecha'], constantes)
+def _tiene_etiqueta(linea: str) -> bool:
+    primera = linea.split()[0].upper()
+    return not (primera in OPCODES or primera in OPCODES_FIJOS or primera == "DAT")
 
-    if 0 not in constantes:
-        constantes[0] = "CTE0"
-    if 1 not in constantes:
-        constantes[1] = "CTE1"
 
-    tmp = "TMPDIV"
-    idx = _gen_op._ix_etq
-    etq_loop = f"DIV{idx}"
-    etq_fin = f"FINDIV{idx}"
-    etq_ok = f"DIVOK{idx}"
-    _gen_op._ix_etq += 1
+MODOS_SUBRUTINAS = ("auto", "en_linea", "compartidas")
 
-    lineas: List[str] = []
-    # cociente = 0
-    lineas.append(f"LDA {constantes[0]}")
-    lineas.append(f"STA {destino}")
-    # tmp = dividendo
-    lineas.append(f"LDA {dividendo}")
-    lineas.append(f"STA {tmp}")
-    # Si divisor == 0 -> terminar (deja cociente=0)
-    lineas.append(f"LDA {divisor}")
-    lineas.append(f"BRZ {etq_fin}")
-    # loop: mientras tmp - divisor >= 0
-    lineas.append(f"{etq_loop} LDA {tmp}")
-    lineas.append(f"SUB {divisor}")
-    lineas.append(f"BRP {etq_ok}")
-    lineas.append(f"BRZ {etq_ok}")
-    lineas.append(f"BRA {etq_fin}")
-    # ok: tmp = tmp - divisor; cociente += 1
-    lineas.append(f"{etq_ok} STA {tmp}")
-    lineas.append(f"LDA {destino}")
-    lineas.append(f"ADD {constantes[1]}")
-    lineas.append(f"STA {destino}")
-    lineas.append(f"BRA {etq_loop}")
-    lineas.append(f"{etq_fin} LDA {destino}")
-    return lineas
+# Ciclos extra de una llamada frente al código en línea: copiar los dos
+# argumentos, preparar el retorno, saltar y volver
+CICLOS_LLAMADA = 8
 
 
-def _gen_si(op: Dict[str, Any], indice_etq: int, constantes: Dict[int, str]) -> Tuple[List[str], int]:
-    lineas: List[str] = []
-    izquierda = _etiqueta_mem(op["condicion"]["izquierda"], constantes)
-    derecha = _etiqueta_mem(op["condicion"]["derecha"], constantes)
-    etq_entonces = f"ENTONCES{indice_etq}"
-    etq_sino = f"SINO{indice_etq}"
-    etq_finsi = f"FINSI{indice_etq}"
-    cmp = op["condicion"]["op"]
-    if cmp == ">":
-        lineas.append(f"LDA {izquierda}")
-        lineas.append(f"SUB {derecha}")
-        lineas.append(f"BRZ {etq_sino}")
-        lineas.append(f"BRP {etq_entonces}")
-        primero = True
-        for interior in op["sino"]:
-            gen = _gen_op(interior, constantes)
-            if gen:
-                if primero:
-                    gen[0] = f"{etq_sino} {gen[0]}"
-                    primero = False
-                lineas.extend(gen)
-        lineas.append(f"BRA {etq_finsi}")
-        primero = True
-        for interior in op["entonces"]:
-            gen = _gen_op(interior, constantes)
-            if gen:
-                if primero:
-                    gen[0] = f"{etq_entonces} {gen[0]}"
-                    primero = False
-                lineas.extend(gen)
-        _gen_op._etiquetas_pendientes.append(etq_finsi)
-    elif cmp == "<":
-        lineas.append(f"LDA {derecha}")
-        lineas.append(f"SUB {izquierda}")
-        lineas.append(f"BRZ {etq_sino}")
-        lineas.append(f"BRP {etq_entonces}")
-        primero = True
-        for interior in op["sino"]:
-            gen = _gen_op(interior, constantes)
-            if gen:
-                if primero:
-                    gen[0] = f"{etq_sino} {gen[0]}"
-                    primero = False
-                lineas.extend(gen)
-        lineas.append(f"BRA {etq_finsi}")
-        primero = True
-        for interior in op["entonces"]:
-            gen = _gen_op(interior, constantes)
-            if gen:
-                if primero:
-                    gen[0] = f"{etq_entonces} {gen[0]}"
-                    primero = False
-                lineas.extend(gen)
-        _gen_op._etiquetas_pendientes.append(etq_finsi)
-    elif cmp == "=":
-        lineas.append(f"LDA {izquierda}")
-        lineas.append(f"SUB {derecha}")
-        lineas.append(f"BRZ {etq_entonces}")
-        lineas.append(f"BRA {etq_sino}")
-        primero = True
-        for interior in op["entonces"]:
-            gen = _gen_op(interior, constantes)
-            if gen:
-                if primero:
-                    gen[0] = f"{etq_entonces} {gen[0]}"
-                    primero = False
-                lineas.extend(gen)
-        lineas.append(f"BRA {etq_finsi}")
-        primero = True
-        for interior in op["sino"]:
-            gen = _gen_op(interior, constantes)
-            if gen:
-                if primero:
-                    gen[0] = f"{etq_sino} {gen[0]}"
-                    primero = False
-                lineas.extend(gen)
-        _gen_op._etiquetas_pendientes.append(etq_finsi)
-    elif cmp == ">=":
-        lineas.append(f"LDA {izquierda}")
-        lineas.append(f"SUB {derecha}")
-        lineas.append(f"BRZ {etq_entonces}")
-        lineas.append(f"BRP {etq_entonces}")
-        lineas.append(f"BRA {etq_sino}")
-        primero = True
-        for interior in op["entonces"]:
-            gen = _gen_op(interior, constantes)
-            if gen:
-                if primero:
-                    gen[0] = f"{etq_entonces} {gen[0]}"
-                    primero = False
-                lineas.extend(gen)
-        lineas.append(f"BRA {etq_finsi}")
-        primero = True
-        for interior in op["sino"]:
-            gen = _gen_op(interior, constantes)
-            if gen:
-                if primero:
-                    gen[0] = f"{etq_sino} {gen[0]}"
-                    primero = False
-                lineas.extend(gen)
-        _gen_op._etiquetas_pendientes.append(etq_finsi)
-    elif cmp == "<=":
-        lineas.append(f"LDA {derecha}")
-        lineas.append(f"SUB {izquierda}")
-        lineas.append(f"BRZ {etq_entonces}")
-        lineas.append(f"BRP {etq_entonces}")
-        lineas.append(f"BRA {etq_sino}")
-        primero = True
-        for interior in op["entonces"]:
-            gen = _gen_op(interior, constantes)
-            if gen:
-                if primero:
-                    gen[0] = f"{etq_entonces} {gen[0]}"
-                    primero = False
-                lineas.extend(gen)
-        lineas.append(f"BRA {etq_finsi}")
-        primero = True
-        for interior in op["sino"]:
-            gen = _gen_op(interior, constantes)
-            if gen:
-                if primero:
-                    gen[0] = f"{etq_sino} {gen[0]}"
-                    primero = False
-                lineas.extend(gen)
-        _gen_op._etiquetas_pendientes.append(etq_finsi)
-    elif cmp == "!=":
-        lineas.append(f"LDA {izquierda}")
-        lineas.append(f"SUB {derecha}")
-        lineas.append(f"BRZ {etq_sino}")
-        lineas.append(f"BRA {etq_entonces}")
-        primero = True
-        for interior in op["entonces"]:
-            gen = _gen_op(interior, constantes)
-            if gen:
-                if primero:
-                    gen[0] = f"{etq_entonces} {gen[0]}"
-                    primero = False
-                lineas.extend(gen)
-        lineas.append(f"BRA {etq_finsi}")
-        primero = True
-        for interior in op["sino"]:
-            gen = _gen_op(interior, constantes)
-            if gen:
-                if primero:
-                    gen[0] = f"{etq_sino} {gen[0]}"
-                    primero = False
-                lineas.extend(gen)
-        _gen_op._etiquetas_pendientes.append(etq_finsi)
-    return lineas, indice_etq + 1
-
-
-def _gen_mientras(op: Dict[str, Any], indice_etq: int, constantes: Dict[int, str]) -> Tuple[List[str], int]:
-    lineas: List[str] = []
-    izquierda = _etiqueta_mem(op["condicion"]["izquierda"], constantes)
-    derecha = _etiqueta_mem(op["condicion"]["derecha"], constantes)
-    cmp = op["condicion"]["op"]
-
-    etq_loop = f"MIENTRAS{indice_etq}"
-    etq_body = f"DO{indice_etq}"
-    etq_fin = f"FINMIENTRAS{indice_etq}"
-
-    # Punto de comprobación
-    if cmp == ">":
-        lineas.append(f"{etq_loop} LDA {izquierda}")
-        lineas.append(f"SUB {derecha}")
-        # BRP incluye cero; primero filtrar cero con BRZ
-        lineas.append(f"BRZ {etq_fin}")
-        lineas.append(f"BRP {etq_body}")
-        lineas.append(f"BRA {etq_fin}")
-    elif cmp == "<":
-        lineas.append(f"{etq_loop} LDA {derecha}")
-        lineas.append(f"SUB {izquierda}")
-        # BRP incluye cero; primero filtrar cero con BRZ
-        lineas.append(f"BRZ {etq_fin}")
-        lineas.append(f"BRP {etq_body}")
-        lineas.append(f"BRA {etq_fin}")
-    elif cmp == "=":
-        lineas.append(f"{etq_loop} LDA {izquierda}")
-        lineas.append(f"SUB {derecha}")
-        lineas.append(f"BRZ {etq_body}")
-        lineas.append(f"BRA {etq_fin}")
-    elif cmp == ">=":
-        lineas.append(f"{etq_loop} LDA {izquierda}")
-        lineas.append(f"SUB {derecha}")
-        lineas.append(f"BRZ {etq_body}")
-        lineas.append(f"BRP {etq_body}")
-        lineas.append(f"BRA {etq_fin}")
-    elif cmp == "<=":
-        lineas.append(f"{etq_loop} LDA {derecha}")
-        lineas.append(f"SUB {izquierda}")
-        lineas.append(f"BRZ {etq_body}")
-        lineas.append(f"BRP {etq_body}")
-        lineas.append(f"BRA {etq_fin}")
-    elif cmp == "!=":
-        lineas.append(f"{etq_loop} LDA {izquierda}")
-        lineas.append(f"SUB {derecha}")
-        lineas.append(f"BRZ {etq_fin}")
-        lineas.append(f"BRA {etq_body}")
-
-    # Cuerpo del bucle
-    primero = True
-    for interior in op["cuerpo"]:
-        gen = _gen_op(interior, constantes)
-        if gen:
-            if primero:
-                gen[0] = f"{etq_body} {gen[0]}"
-                primero = False
-            lineas.extend(gen)
-    # Volver a comprobar
-    lineas.append(f"BRA {etq_loop}")
-    _gen_op._etiquetas_pendientes.append(etq_fin)
-    return lineas, indice_etq + 1
-
-
-def _gen_op(op: Dict[str, Any], constantes: Dict[int, str]) -> List[str]:
-    t = op["tipo"]
-    if t == "leer":
-        lineas = ["INP", f"STA {_etiqueta_mem(op['var'], constantes)}"]
-        return _adjuntar_etiqueta_pendiente(lineas)
-    if t == "imprimir":
-        lineas = [f"LDA {_etiqueta_mem(op['var'], constantes)}", "OUT"]
-        return _adjuntar_etiqueta_pendiente(lineas)
-    if t == "asignacion":
-        if op["op"] == "*":
-            # Añadir tmp y constantes a símbolos para DAT
-            _gen_op._vars_tmp.add("TMPMUL")
-            lineas = _gen_multiplicacion(op, constantes)
-            return _adjuntar_etiqueta_pendiente(lineas)
-        elif op["op"] == "/":
-            _gen_op._vars_tmp.add("TMPDIV")
-            lineas = _gen_division(op, constantes)
-            return _adjuntar_etiqueta_pendiente(lineas)
+def ciclos_llamadas(lmc: str) -> int:
+    # Ciclos que agregan las llamadas frente al código en línea, en el peor
+    # caso: CICLOS_LLAMADA por cada vez que se ejecuta cada llamada (según las
+    # vueltas de los bucles que la contienen, ver costs.py)
+    return CICLOS_LLAMADA * cota_numerica(llamadas_ejecutadas(estimar_costos(lmc)))
+
+
+# Rutina compartida por operador: nombre y método que genera el cuerpo
+_RUTINAS = {"*": ("MUL", "_gen_multiplicacion"), "/": ("DIV", "_gen_division")}
+
+
+def _contar_operadores(operaciones: List[Instruccion], limite: int, cuenta: Optional[Dict[str, int]] = None) -> Dict[str, int]:
+    # Las multiplicaciones que se desenrollan con el límite dado no llaman a
+    # la rutina compartida
+    if cuenta is None:
+        cuenta = {"*": 0, "/": 0}
+    for op in operaciones:
+        if isinstance(op, Asignacion):
+            if op.op in cuenta and not (op.op == "*" and _desenrollable(op, limite)):
+                cuenta[op.op] += 1
+        elif isinstance(op, Si):
+            _contar_operadores(op.entonces, limite, cuenta)
+            _contar_operadores(op.sino, limite, cuenta)
+        elif isinstance(op, Mientras):
+            _contar_operadores(op.cuerpo, limite, cuenta)
+    return cuenta
+
+
+class GeneradorLMC:
+    # Estado de una compilación (contador de etiquetas, temporales, rutinas y
+    # retornos usados): cada una tiene el suyo, así que varias pueden correr a
+    # la vez en hilos distintos
+    def __init__(self, multiplicacion: str, division: str, compartidas: set, max_desenrollado: int):
+        self.ix_etq = 1
+        self.vars_tmp: set = set()
+        self.multiplicacion = multiplicacion
+        self.division = division
+        self.usa_potencias = False
+        self.compartidas = compartidas
+        self.retornos: List[Tuple[str, str]] = []
+        self.max_desenrollado = max_desenrollado
+        self.rutinas_usadas: set = set()
+        # Mapa de fuente del último código generado: la línea del pseudocódigo
+        # de cada buzón, o None (rutinas compartidas, datos, HLT final)
+        self.mapa: List[Optional[int]] = []
+
+    def generar(self, operaciones: List[Instruccion], rotar_bucles: bool = True) -> str:
+        # Pasadas: construcción del IR, simplificación de saltos, disposición de
+        # los bloques en memoria y bajada a LMC
+        programa = construir_ir(operaciones)
+        simplificar_saltos(programa)
+        orden = disponer_bloques(programa, rotar_bucles)
+        constantes = programa.simbolos.constantes
+        self.mapa = []
+        codigo = self._bajar(orden, constantes)
+        codigo.extend(self._gen_rutinas(constantes))
+        # Incluir temporales si se usaron
+        conjunto_total = programa.simbolos.variables | self.vars_tmp
+        for v in sorted(conjunto_total):
+            codigo.append(f"{v} DAT")
+        # Solo las constantes que el código nombra (un factor desenrollado o una
+        # comparación ajustada pueden dejar alguna sin usar)
+        nombradas = {linea.split()[-1] for linea in codigo}
+        for valor, etq in sorted(constantes.items()):
+            if etq in nombradas:
+                codigo.append(f"{etq} DAT {valor}")
+        for etq_ret, etq_vuelta in self.retornos:
+            codigo.append(f"{etq_ret} BRA {etq_vuelta}")
+        if self.usa_potencias:
+            # La tabla debe quedar contigua y en orden descendente
+            for p in POTENCIAS:
+                codigo.append(f"POT{p} DAT {p}")
+            codigo.append(f"POTINI LDA POT{POTENCIAS[0]}")
+        self.mapa.extend([None] * (len(codigo) - len(self.mapa)))
+        # Con "auto" se generan varias variantes: se cuentan todas
+        contar("instrucciones_emitidas", len(codigo))
+        return "\n".join(codigo)
+
+    def _bajar(self, orden: List[Bloque], constantes: Dict[int, str]) -> List[str]:
+        # Código de los bloques en el orden dado. La etiqueta de cada bloque va en
+        # su primera línea; si el bloque no genera código, pasa a la siguiente
+        # línea que se emita, y cuando varias coinciden en una misma línea las
+        # demás se redirigen a la que quedó
+        codigo: List[str] = []
+        pendientes: List[str] = []
+        alias: Dict[str, str] = {}
+        for i, bloque in enumerate(orden):
+            siguiente = orden[i + 1] if i + 1 < len(orden) else None
+            pendientes.append(bloque.etiqueta)
+            partes = [(self._gen_op(ins, constantes), ins.linea) for ins in bloque.operaciones]
+            partes.append((_gen_terminador(bloque, siguiente, constantes), bloque.terminador.linea))
+            for lineas, linea_fuente in partes:
+                if not lineas:
+                    continue
+                if pendientes:
+                    if _tiene_etiqueta(lineas[0]):
+                        etq = lineas[0].split()[0]
+                    else:
+                        etq = pendientes[0]
+                        lineas[0] = f"{etq} {lineas[0]}"
+                    for otra in pendientes:
+                        if otra != etq:
+                            alias[otra] = etq
+                    pendientes = []
+                codigo.extend(lineas)
+                self.mapa.extend([linea_fuente] * len(lineas))
+
+        # Operandos redirigidos; las etiquetas de bloque que nadie nombra se quitan
+        resultado: List[str] = []
+        for linea in codigo:
+            partes_linea = linea.split()
+            if len(partes_linea) > 1 and partes_linea[-1] in alias:
+                partes_linea[-1] = alias[partes_linea[-1]]
+            resultado.append(partes_linea)
+        nombradas = {p[-1] for p in resultado if len(p) > 1}
+        de_bloque = {b.etiqueta for b in orden}
+        return [
+            " ".join(p[1:] if p[0] in de_bloque and p[0] not in nombradas else p)
+            for p in resultado
+        ]
+
+    def _gen_op(self, ins: Operacion, constantes: Dict[int, str]) -> List[str]:
+        # Instrucción de tres direcciones a LMC
+        if ins.op == "leer":
+            return ["INP", f"STA {_etiqueta_mem(ins.destino, constantes)}"]
+        if ins.op == "imprimir":
+            return [f"LDA {_etiqueta_mem(ins.destino, constantes)}", "OUT"]
+        if ins.op == "*":
+            # Por constante: cadena de sumas si cabe; si no, bucle o rutina
+            lineas = self._desenrollar(ins, constantes)
+            if lineas is None:
+                if "*" in self.compartidas:
+                    lineas = self._gen_llamada("MUL", ins, constantes)
+                else:
+                    lineas = self._gen_multiplicacion(ins, constantes)
+            return lineas
+        if ins.op == "/":
+            # TMPDIV guarda el resto, aunque la división vaya en una rutina
+            self.vars_tmp.add("TMPDIV")
+            if "/" in self.compartidas:
+                return self._gen_llamada("DIV", ins, constantes)
+            return self._gen_division(ins, constantes)
+        return _gen_asignacion(ins, constantes)
+
+    def _desenrollar(self, op: Calculo, constantes: Dict[int, str]) -> Optional[List[str]]:
+        # La cadena se usa si entra en el límite de buzones de la compilación
+        if not _desenrollable(op, self.max_desenrollado):
+            return None
+        x, k = _factor_constante(op)
+        if k == 0 and 0 not in constantes:
+            constantes[0] = "CTE0"
+        cadena = _cadena_multiplicacion(_etiqueta_mem(x, constantes), k, constantes.get(0, "CTE0"))
+        if "STA TMPMUL" in cadena:
+            self.vars_tmp.add("TMPMUL")
+        cadena.append(f"STA {_etiqueta_mem(op.destino, constantes)}")
+        return cadena
+
+    def _gen_multiplicacion(self, op: Calculo, constantes: Dict[int, str]) -> List[str]:
+        if self.multiplicacion == "rapida":
+            return self._gen_multiplicacion_rapida(op, constantes)
+        return self._gen_multiplicacion_compacta(op, constantes)
+
+    def _gen_multiplicacion_compacta(self, op: Calculo, constantes: Dict[int, str]) -> List[str]:
+        # Sumas sucesivas: un ciclo por unidad del operando que hace de contador
+        destino = _etiqueta_mem(op.destino, constantes)
+        izq = _etiqueta_mem(op.izquierda, constantes)  # multiplicando
+        der = _etiqueta_mem(op.derecha, constantes)    # multiplicador
+
+        # Asegurar CTE0 y CTE1
+        if 0 not in constantes:
+            constantes[0] = "CTE0"
+        if 1 not in constantes:
+            constantes[1] = "CTE1"
+
+        tmp = "TMPMUL"
+        self.vars_tmp.add(tmp)
+        # Etiquetas únicas
+        idx = self.ix_etq
+        etq_loop = f"MULT{idx}"
+        etq_fin = f"FINMULT{idx}"
+        self.ix_etq += 1
+
+        lineas: List[str] = []
+        sumando = izq
+        if not _es_numero(op.izquierda) and not _es_numero(op.derecha):
+            # Ambos son variables: el menor se usa como contador en tiempo de ejecución
+            etq_cambio = f"MULSW{idx}"
+            etq_sumando = f"MULSUM{idx}"
+            sumando = "TMPMULA"
+            self.vars_tmp.add(sumando)
+            lineas.append(f"LDA {izq}")
+            lineas.append(f"SUB {der}")
+            lineas.append(f"BRP {etq_cambio}")
+            lineas.append(f"LDA {izq}")
+            lineas.append(f"STA {tmp}")
+            lineas.append(f"LDA {der}")
+            lineas.append(f"BRA {etq_sumando}")
+            lineas.append(f"{etq_cambio} LDA {der}")
+            lineas.append(f"STA {tmp}")
+            lineas.append(f"LDA {izq}")
+            lineas.append(f"{etq_sumando} STA {sumando}")
         else:
-            lineas = _gen_asignacion(op, constantes)
-            return _adjuntar_etiqueta_pendiente(lineas)
-    if t == "si":
-        lineas, nuevo_ix = _gen_si(op, _gen_op._ix_etq, constantes)
-        _gen_op._ix_etq = nuevo_ix
+            # tmp = der
+            lineas.append(f"LDA {der}")
+            lineas.append(f"STA {tmp}")
+            if izq == destino:
+                # El multiplicando se sobrescribe al poner destino = 0: usar una copia
+                sumando = "TMPMULA"
+                self.vars_tmp.add(sumando)
+                lineas.append(f"LDA {izq}")
+                lineas.append(f"STA {sumando}")
+        # destino = 0
+        lineas.append(f"LDA {constantes[0]}")
+        lineas.append(f"STA {destino}")
+        # loop
+        lineas.append(f"{etq_loop} LDA {tmp}")
+        lineas.append(f"BRZ {etq_fin}")
+        lineas.append(f"LDA {destino}")
+        lineas.append(f"ADD {sumando}")
+        lineas.append(f"STA {destino}")
+        lineas.append(f"LDA {tmp}")
+        lineas.append(f"SUB {constantes[1]}")
+        lineas.append(f"STA {tmp}")
+        lineas.append(f"BRA {etq_loop}")
+        lineas.append(f"{etq_fin} LDA {destino}")  # etiqueta de fin (no cambia valor)
         return lineas
-    if t == "mientras":
-        lineas, nuevo_ix = _gen_mientras(op, _gen_op._ix_etq, constantes)
-        _gen_op._ix_etq = nuevo_ix
+
+    def _gen_multiplicacion_rapida(self, op: Calculo, constantes: Dict[int, str]) -> List[str]:
+        # Esquema de Horner sobre los bits del multiplicador: en cada paso
+        # resultado = 2 * resultado (sumándose a sí mismo) y, si el multiplicador
+        # restante alcanza la potencia actual, se resta y se suma el multiplicando.
+        # Son 10 iteraciones fijas (2^9 = 512 <= 999) en lugar de una por unidad.
+        destino = _etiqueta_mem(op.destino, constantes)
+        izq = _etiqueta_mem(op.izquierda, constantes)  # multiplicando
+        der = _etiqueta_mem(op.derecha, constantes)    # multiplicador
+
+        if 0 not in constantes:
+            constantes[0] = "CTE0"
+        if 1 not in constantes:
+            constantes[1] = "CTE1"
+
+        tmp = "TMPMUL"         # resultado parcial
+        resto = "TMPMULB"      # multiplicador restante
+        potencia = "TMPPOT"    # potencia de dos actual
+        self.vars_tmp.update((tmp, resto, potencia))
+        self.usa_potencias = True
+
+        idx = self.ix_etq
+        etq_loop = f"MULT{idx}"
+        etq_pot = f"MULK{idx}"
+        etq_suma = f"MULS{idx}"
+        etq_sig = f"MULN{idx}"
+        etq_fin = f"FINMULT{idx}"
+        self.ix_etq += 1
+
+        lineas: List[str] = []
+        lineas.append(f"LDA {der}")
+        lineas.append(f"STA {resto}")
+        lineas.append(f"LDA {constantes[0]}")
+        lineas.append(f"STA {tmp}")
+        # Reiniciar la instrucción que recorre la tabla de potencias
+        lineas.append("LDA POTINI")
+        lineas.append(f"STA {etq_pot}")
+        # loop: resultado = 2 * resultado
+        lineas.append(f"{etq_loop} LDA {tmp}")
+        lineas.append(f"ADD {tmp}")
+        lineas.append(f"STA {tmp}")
+        lineas.append(f"{etq_pot} LDA POT{POTENCIAS[0]}")
+        lineas.append(f"STA {potencia}")
+        lineas.append(f"LDA {resto}")
+        lineas.append(f"SUB {potencia}")
+        lineas.append(f"BRP {etq_suma}")
+        # Avanzar a la siguiente potencia; terminar después de la potencia 1
+        lineas.append(f"{etq_sig} LDA {etq_pot}")
+        lineas.append(f"ADD {constantes[1]}")
+        lineas.append(f"STA {etq_pot}")
+        lineas.append(f"LDA {potencia}")
+        lineas.append(f"SUB {constantes[1]}")
+        lineas.append(f"BRZ {etq_fin}")
+        lineas.append(f"BRA {etq_loop}")
+        # Bit en 1: restar la potencia y sumar el multiplicando
+        lineas.append(f"{etq_suma} STA {resto}")
+        lineas.append(f"LDA {tmp}")
+        lineas.append(f"ADD {izq}")
+        lineas.append(f"STA {tmp}")
+        lineas.append(f"BRA {etq_sig}")
+        lineas.append(f"{etq_fin} LDA {tmp}")
+        lineas.append(f"STA {destino}")
         return lineas
-    return []
 
-_gen_op._ix_etq = 1
-_gen_op._etiquetas_pendientes = []
-_gen_op._vars_tmp = set()
+    def _gen_division(self, op: Calculo, constantes: Dict[int, str]) -> List[str]:
+        if self.division == "rapida":
+            return self._gen_division_rapida(op, constantes)
+        return self._gen_division_compacta(op, constantes)
+
+    def _gen_division_compacta(self, op: Calculo, constantes: Dict[int, str]) -> List[str]:
+        # Restas sucesivas: un ciclo por unidad del cociente. Al terminar, TMPDIV
+        # contiene el resto.
+        destino = _etiqueta_mem(op.destino, constantes)  # cociente
+        dividendo = _etiqueta_mem(op.izquierda, constantes)
+        divisor = _etiqueta_mem(op.derecha, constantes)
+
+        if 0 not in constantes:
+            constantes[0] = "CTE0"
+        if 1 not in constantes:
+            constantes[1] = "CTE1"
+        # Con un divisor constante no hace falta comprobar el cero en ejecución
+        constante = _es_numero(op.derecha)
+        if constante and int(op.derecha) == 0:
+            return _gen_division_por_cero(dividendo, destino, constantes)
+
+        tmp = "TMPDIV"
+        idx = self.ix_etq
+        etq_loop = f"DIV{idx}"
+        etq_fin = f"FINDIV{idx}"
+        etq_ok = f"DIVOK{idx}"
+        self.ix_etq += 1
+
+        lineas: List[str] = []
+        # tmp = dividendo
+        lineas.append(f"LDA {dividendo}")
+        lineas.append(f"STA {tmp}")
+        if divisor == destino:
+            # El divisor se sobrescribe al poner cociente = 0: usar una copia
+            lineas.append(f"LDA {divisor}")
+            divisor = "TMPDIVD"
+            self.vars_tmp.add(divisor)
+            lineas.append(f"STA {divisor}")
+        # cociente = 0
+        lineas.append(f"LDA {constantes[0]}")
+        lineas.append(f"STA {destino}")
+        if not constante:
+            # Si divisor == 0 -> terminar (deja cociente=0)
+            lineas.append(f"LDA {divisor}")
+            lineas.append(f"BRZ {etq_fin}")
+        # loop: mientras tmp - divisor >= 0
+        lineas.append(f"{etq_loop} LDA {tmp}")
+        lineas.append(f"SUB {divisor}")
+        lineas.append(f"BRP {etq_ok}")
+        lineas.append(f"BRZ {etq_ok}")
+        lineas.append(f"BRA {etq_fin}")
+        # ok: tmp = tmp - divisor; cociente += 1
+        lineas.append(f"{etq_ok} STA {tmp}")
+        lineas.append(f"LDA {destino}")
+        lineas.append(f"ADD {constantes[1]}")
+        lineas.append(f"STA {destino}")
+        lineas.append(f"BRA {etq_loop}")
+        lineas.append(f"{etq_fin} LDA {destino}")
+        return lineas
 
+    def _gen_division_rapida(self, op: Calculo, constantes: Dict[int, str]) -> List[str]:
+        # División larga binaria: se recorren los bits del dividendo con la tabla de
+        # potencias (10 iteraciones fijas). En cada paso resto = 2 * resto + bit y,
+        # si alcanza al divisor, se le resta y se agrega un 1 al cociente.
+        # Para no desbordar 999 se compara resto + bit contra divisor - resto.
+        # Al terminar, TMPDIV contiene el resto.
+        destino = _etiqueta_mem(op.destino, constantes)  # cociente
+        dividendo = _etiqueta_mem(op.izquierda, constantes)
+        divisor = _etiqueta_mem(op.derecha, constantes)
+
+        if 0 not in constantes:
+            constantes[0] = "CTE0"
+        if 1 not in constantes:
+            constantes[1] = "CTE1"
+        # Con un divisor constante no hace falta comprobar el cero en ejecución
+        constante = _es_numero(op.derecha)
+        if constante and int(op.derecha) == 0:
+            return _gen_division_por_cero(dividendo, destino, constantes)
+
+        resto = "TMPDIV"
+        cociente = "TMPDIVQ"
+        bits = "TMPDIVN"       # bits del dividendo aún no procesados
+        falta = "TMPDIVX"      # divisor - resto
+        parcial = "TMPDIVY"    # resto + bit
+        potencia = "TMPPOT"
+        self.vars_tmp.update((cociente, bits, falta, parcial, potencia))
+        self.usa_potencias = True
+
+        idx = self.ix_etq
+        etq_loop = f"DIV{idx}"
+        etq_pot = f"DIVK{idx}"
+        etq_bit = f"DIVB{idx}"
+        etq_cmp = f"DIVC{idx}"
+        etq_resta = f"DIVS{idx}"
+        etq_sig = f"DIVN{idx}"
+        etq_cero = f"DIVCERO{idx}"
+        etq_fin = f"FINDIV{idx}"
+        self.ix_etq += 1
+
+        lineas: List[str] = []
+        if not constante:
+            # Si divisor == 0 -> cociente = 0 y resto = dividendo
+            lineas.append(f"LDA {divisor}")
+            lineas.append(f"BRZ {etq_cero}")
+        lineas.append(f"LDA {dividendo}")
+        lineas.append(f"STA {bits}")
+        lineas.append(f"LDA {constantes[0]}")
+        lineas.append(f"STA {resto}")
+        lineas.append(f"STA {cociente}")
+        lineas.append("LDA POTINI")
+        lineas.append(f"STA {etq_pot}")
+        # loop: cociente = 2 * cociente; falta = divisor - resto
+        lineas.append(f"{etq_loop} LDA {cociente}")
+        lineas.append(f"ADD {cociente}")
+        lineas.append(f"STA {cociente}")
+        lineas.append(f"LDA {divisor}")
+        lineas.append(f"SUB {resto}")
+        lineas.append(f"STA {falta}")
+        # Siguiente bit del dividendo
+        lineas.append(f"{etq_pot} LDA POT{POTENCIAS[0]}")
+        lineas.append(f"STA {potencia}")
+        lineas.append(f"LDA {bits}")
+        lineas.append(f"SUB {potencia}")
+        lineas.append(f"BRP {etq_bit}")
+        lineas.append(f"LDA {resto}")
+        lineas.append(f"BRA {etq_cmp}")
+        lineas.append(f"{etq_bit} STA {bits}")
+        lineas.append(f"LDA {resto}")
+        lineas.append(f"ADD {constantes[1]}")
+        # 2 * resto + bit >= divisor  <=>  resto + bit >= divisor - resto
+        lineas.append(f"{etq_cmp} STA {parcial}")
+        lineas.append(f"SUB {falta}")
+        lineas.append(f"BRP {etq_resta}")
+        lineas.append(f"LDA {parcial}")
+        lineas.append(f"ADD {resto}")
+        lineas.append(f"STA {resto}")
+        lineas.append(f"BRA {etq_sig}")
+        lineas.append(f"{etq_resta} STA {resto}")
+        lineas.append(f"LDA {cociente}")
+        lineas.append(f"ADD {constantes[1]}")
+        lineas.append(f"STA {cociente}")
+        # Avanzar a la siguiente potencia; terminar después de la potencia 1
+        lineas.append(f"{etq_sig} LDA {etq_pot}")
+        lineas.append(f"ADD {constantes[1]}")
+        lineas.append(f"STA {etq_pot}")
+        lineas.append(f"LDA {potencia}")
+        lineas.append(f"SUB {constantes[1]}")
+        lineas.append(f"BRZ {etq_fin}")
+        lineas.append(f"BRA {etq_loop}")
+        if not constante:
+            lineas.append(f"{etq_cero} LDA {dividendo}")
+            lineas.append(f"STA {resto}")
+            lineas.append(f"LDA {constantes[0]}")
+            lineas.append(f"STA {cociente}")
+        lineas.append(f"{etq_fin} LDA {cociente}")
+        lineas.append(f"STA {destino}")
+        return lineas
 
-def _adjuntar_etiqueta_pendiente(lineas: List[str]) -> List[str]:
-    if _gen_op._etiquetas_pendientes and lineas:
-        etq = _gen_op._etiquetas_pendientes.pop(0)
-        lineas[0] = f"{etq} {lineas[0]}"
-    return lineas
+    def _gen_llamada(self, rutina: str, op: Calculo, constantes: Dict[int, str]) -> List[str]:
+        # LMC no tiene instrucción de llamada: se copian los argumentos, se escribe
+        # en la celda de retorno de la rutina un "BRA" hacia la vuelta (tomado de
+        # una celda RETn que lo contiene ya ensamblado) y se salta a la rutina.
+        # La rutina deja el resultado en el acumulador.
+        idx = self.ix_etq
+        self.ix_etq += 1
+        etq_ret = f"RET{idx}"
+        etq_vuelta = f"VUELTA{idx}"
+        self.retornos.append((etq_ret, etq_vuelta))
+        self.rutinas_usadas.add(rutina)
+        return [
+            f"LDA {_etiqueta_mem(op.izquierda, constantes)}",
+            f"STA {rutina}ARG1",
+            f"LDA {_etiqueta_mem(op.derecha, constantes)}",
+            f"STA {rutina}ARG2",
+            f"LDA {etq_ret}",
+            f"STA {rutina}RET",
+            f"BRA SUB{rutina}",
+            f"{etq_vuelta} STA {_etiqueta_mem(op.destino, constantes)}",
+        ]
+
+    def _gen_rutinas(self, constantes: Dict[int, str]) -> List[str]:
+        lineas: List[str] = []
+        for operador in sorted(self.compartidas):
+            rutina, metodo = _RUTINAS[operador]
+            if rutina not in self.rutinas_usadas:
+                continue
+            arg1, arg2 = f"{rutina}ARG1", f"{rutina}ARG2"
+            self.vars_tmp.update((arg1, arg2))
+            # El resultado se deja en ARG1 (y en el acumulador al volver)
+            cuerpo = getattr(self, metodo)(Operacion(operador, arg1, arg1, arg2), constantes)
+            cuerpo[0] = f"SUB{rutina} {cuerpo[0]}"
+            lineas.extend(cuerpo)
+            # Celda de retorno: la llamada la sobrescribe con "BRA VUELTAn"
+            lineas.append(f"{rutina}RET HLT")
+        return lineas
 
 
-def generar_lmc(operaciones: List[Dict[str, Any]]) -> str:
-    conjunto_vars, constantes = _recolectar_simbolos(operaciones)
-    _gen_op._ix_etq = 1
-    _gen_op._etiquetas_pendientes = []
-    _gen_op._vars_tmp = set()
-    codigo: List[str] = []
-    for op in operaciones:
-        codigo.extend(_gen_op(op, constantes))
-    codigo.append("HLT")
-    # Incluir temporales si se usaron
-    conjunto_total = set(conjunto_vars) | set(_gen_op._vars_tmp)
-    for v in sorted(conjunto_total):
-        codigo.append(f"{v} DAT")
-    for valor, etq in sorted(constantes.items()):
-        codigo.append(f"{etq} DAT {valor}")
-    return "\n".join(codigo)
+def generar_lmc(
+    operaciones: Iterable[Union[Instruccion, Token]],
+    multiplicacion: str = "compacta",
+    division: str = "compacta",
+    subrutinas: str = "auto",
+    presupuesto_buzones: int = TAM_MEMORIA,
+    presupuesto_ciclos: Optional[int] = None,
+    rotar_bucles: bool = True,
+    plegar_constantes: bool = True,
+) -> str:
+    return generar_con_mapa(
+        operaciones, multiplicacion, division, subrutinas, presupuesto_buzones, presupuesto_ciclos, rotar_bucles, plegar_constantes
+    )[0]
+
+
+def generar_con_mapa(
+    operaciones: Iterable[Union[Instruccion, Token]],
+    multiplicacion: str = "compacta",
+    division: str = "compacta",
+    subrutinas: str = "auto",
+    presupuesto_buzones: int = TAM_MEMORIA,
+    presupuesto_ciclos: Optional[int] = None,
+    rotar_bucles: bool = True,
+    plegar_constantes: bool = True,
+) -> Tuple[str, List[Optional[int]]]:
+    # Como generar_lmc, junto con el mapa de fuente: para cada buzón, la línea
+    # del pseudocódigo que lo produjo (None en las rutinas compartidas y los datos)
+    if multiplicacion not in MODOS_MULTIPLICACION:
+        raise ValueError(f"Modo de multiplicación desconocido: {multiplicacion}")
+    if division not in MODOS_DIVISION:
+        raise ValueError(f"Modo de división desconocido: {division}")
+    if subrutinas not in MODOS_SUBRUTINAS:
+        raise ValueError(f"Modo de subrutinas desconocido: {subrutinas}")
+    if presupuesto_ciclos is not None and presupuesto_ciclos < 0:
+        raise ValueError(f"Presupuesto de ciclos negativo: {presupuesto_ciclos}")
+    # Los tokens en el formato anterior (dicts) se convierten a nodos
+    operaciones = como_nodos(operaciones)
+    if plegar_constantes:
+        operaciones = propagar_constantes(operaciones)
+
+    def generar(compartidas: set) -> Tuple[str, List[Optional[int]]]:
+        # Modelo de costo de las multiplicaciones por constante: desenrolladas
+        # cuestan un ciclo por buzón, así que se desenrollan todas si el
+        # programa cabe en el presupuesto; si no, solo las que no ocupan más
+        # que el bucle
+        generador = GeneradorLMC(multiplicacion, division, compartidas, TAM_MEMORIA)
+        codigo = generador.generar(operaciones, rotar_bucles)
+        if len(codigo.splitlines()) <= presupuesto_buzones or not ajustable:
+            return codigo, generador.mapa
+        ajustado = GeneradorLMC(multiplicacion, division, compartidas, limite)
+        variantes = [(codigo, generador.mapa), (ajustado.generar(operaciones, rotar_bucles), ajustado.mapa)]
+        return min(variantes, key=lambda v: len(v[0].splitlines()))
+
+    limite = BUZONES_MULTIPLICACION_BUCLE[multiplicacion]
+    # Solo conviene compartir un operador que aparece más de una vez
+    cuenta = _contar_operadores(operaciones, limite)
+    # Con el límite ajustado cambia el código solo si alguna multiplicación
+    # por constante deja de desenrollarse
+    ajustable = cuenta["*"] != _contar_operadores(operaciones, TAM_MEMORIA)["*"]
+    candidatas = {operador for operador, n in cuenta.items() if n >= 2}
+    if subrutinas == "en_linea" or not candidatas:
+        return generar(set())
+    if subrutinas == "compartidas":
+        return generar(candidatas)
+    # auto: en línea si cabe en el presupuesto de buzones (es lo más rápido).
+    # Si no, se comparten los operadores que hagan falta: entre las variantes
+    # cuyas llamadas no superan el presupuesto de ciclos, la que cabe en los
+    # buzones con menos ciclos extra, o si ninguna cabe la más pequeña
+    en_linea = generar(set())
+    if len(en_linea[0].splitlines()) <= presupuesto_buzones:
+        return en_linea
+    # Compartir un solo operador cuesta menos ciclos y a veces también menos
+    # buzones (la rutina del otro puede ocupar más de lo que ahorra)
+    variantes = [en_linea, generar(candidatas)]
+    if len(candidatas) > 1:
+        variantes += [generar({operador}) for operador in sorted(candidatas)]
+    extra: Dict[int, int] = {0: 0}
+
+    def ciclos_extra(k: int) -> int:
+        # Solo se estima cuando hace falta (la estimación recorre todo el LMC)
+        if k not in extra:
+            extra[k] = ciclos_llamadas(variantes[k][0])
+        return extra[k]
+
+    indices = range(len(variantes))
+    if presupuesto_ciclos is not None:
+        indices = [k for k in indices if ciclos_extra(k) <= presupuesto_ciclos]
+    buzones = [len(v[0].splitlines()) for v in variantes]
+    caben = [k for k in indices if buzones[k] <= presupuesto_buzones]
+    if caben:
+        return variantes[min(caben, key=lambda k: (ciclos_extra(k), buzones[k]))]
+    return variantes[min(indices, key=lambda k: buzones[k])]
@@ -1,9 +1,11 @@
 import os
 import sys
+import time
 from datetime import datetime
-from typing import Optional
+from typing import Dict, List, Optional, Tuple
 
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, QObject, QRect, QRunnable, QThreadPool, QTimer, pyqtSignal
+from PyQt5.QtGui import QColor, QFontDatabase, QPainter
 from PyQt5.QtWidgets import (
     QApplication,
     QMainWindow,
@@ -19,20 +21,166 @@ from PyQt5.QtWidgets import (
     QMessageBox,
     QStatusBar,
     QComboBox,
+    QCheckBox,
+    QSpinBox,
 )
 
-from parser import analizar_pseudocodigo
-from generator import generar_lmc
+from batch import compilar_fuente
+from cache import CacheCompilacion
+from incremental import AnalisisIncremental
+from nodes import Instruccion
+from profiling import perfilar
+from simulator_panel import PanelSimulador
+from sourcemap import perfilar_lineas
 from utils import escribir_texto, asegurar_directorio
 
+# Espera desde la última tecla antes de recompilar
+RETARDO_COMPILACION_MS = 400
+
+
+class SenalesCompilacion(QObject):
+    # (versión del texto, LMC, segundos) o (versión, mensaje de error); con el
+    # perfil activo, antes de terminada llega (versión, tabla del perfil)
+    terminada = pyqtSignal(int, str, float)
+    fallida = pyqtSignal(int, str)
+    perfilada = pyqtSignal(int, str)
+    # (versión, ciclos por línea, total de ciclos) del perfil por línea
+    ciclos_por_linea = pyqtSignal(int, object, int)
+
+
+class TrabajoCompilacion(QRunnable):
+    # Compila en un hilo del pool; el resultado vuelve al hilo de la interfaz
+    # por las señales, junto con la versión del texto que se compiló
+    def __init__(
+        self,
+        version: int,
+        lineas: List[str],
+        tokens: List[Instruccion],
+        cache: CacheCompilacion,
+        senales: SenalesCompilacion,
+        medir: bool = False,
+    ):
+        super().__init__()
+        self.version = version
+        self.lineas = lineas
+        self.tokens = tokens
+        self.cache = cache
+        self.senales = senales
+        self.medir = medir
+
+    def run(self):
+        inicio = time.perf_counter()
+        try:
+            if self.medir:
+                # Compilación completa sin caché, fase por fase
+                with perfilar() as perfil:
+                    lmc = compilar_fuente(self.lineas, {}, perfil=perfil)
+                self.senales.perfilada.emit(self.version, perfil.tabla())
+            else:
+                lmc = self.cache.compilar(self.lineas, tokens=self.tokens)
+        except Exception as e:
+            self.senales.fallida.emit(self.version, str(e))
+            return
+        self.senales.terminada.emit(self.version, lmc, time.perf_counter() - inicio)
+
+
+class TrabajoCiclos(QRunnable):
+    # Ejecuta el programa con las entradas dadas y cuenta los ciclos de cada
+    # línea del pseudocódigo
+    def __init__(self, version: int, lineas: List[str], entradas: List[int], senales: SenalesCompilacion):
+        super().__init__()
+        self.version = version
+        self.lineas = lineas
+        self.entradas = entradas
+        self.senales = senales
+
+    def run(self):
+        try:
+            perfil = perfilar_lineas(self.lineas, self.entradas)
+        except Exception as e:
+            self.senales.fallida.emit(self.version, str(e))
+            return
+        self.senales.ciclos_por_linea.emit(self.version, perfil.ciclos, perfil.total)
+
+
+class MargenCalor(QWidget):
+    # Columna a la izquierda del editor con los ciclos de cada línea: el fondo
+    # es más intenso cuanto más ciclos gastó la línea
+    def __init__(self, editor: QPlainTextEdit):
+        super().__init__()
+        self.editor = editor
+        self.ciclos: Dict[int, int] = {}
+        self.setFixedWidth(self.fontMetrics().horizontalAdvance("9999999") + 8)
+        editor.updateRequest.connect(lambda *_: self.update())
+
+    def mostrar(self, ciclos: Dict[int, int]) -> None:
+        self.ciclos = {linea: n for linea, n in ciclos.items() if linea is not None}
+        self.update()
+
+    def paintEvent(self, event):
+        pintor = QPainter(self)
+        pintor.fillRect(event.rect(), self.palette().window())
+        if not self.ciclos:
+            return
+        maximo = max(self.ciclos.values())
+        editor = self.editor
+        # Las posiciones de los bloques son relativas al área visible del editor
+        desplazamiento = editor.geometry().top() - self.geometry().top() + editor.viewport().y()
+        bloque = editor.firstVisibleBlock()
+        arriba = editor.blockBoundingGeometry(bloque).translated(editor.contentOffset()).top() + desplazamiento
+        while bloque.isValid() and arriba <= event.rect().bottom():
+            alto = editor.blockBoundingRect(bloque).height()
+            n = self.ciclos.get(bloque.blockNumber() + 1)
+            if bloque.isVisible() and n:
+                rect = QRect(0, int(arriba), self.width(), int(alto))
+                pintor.fillRect(rect, QColor(255, 64, 0, 40 + int(200 * n / maximo)))
+                pintor.drawText(rect.adjusted(0, 0, -4, 0), Qt.AlignRight | Qt.AlignVCenter, str(n))
+            bloque = bloque.next()
+            arriba += alto
+
 
 class VentanaPrincipal(QMainWindow):
-    def __init__(self):
+    def __init__(self, retardo_ms: int = RETARDO_COMPILACION_MS):
         super().__init__()
         self.setWindowTitle("Transpilador LMC")
         self.resize(1000, 600)
 
         self.current_input_path: Optional[str] = None
+        # Compilar de nuevo el mismo texto no repite el análisis ni la generación
+        self.cache = CacheCompilacion(directorio=os.path.join(self.raiz_proyecto(), ".cache_lmc"))
+        # Análisis del último texto compilado: cada edición reanaliza solo el
+        # bloque que la contiene. Es inmutable, así que el hilo de compilación
+        # puede usar sus tokens mientras aquí se analiza el texto siguiente
+        self.analisis = AnalisisIncremental.analizar([])
+
+        # Compilación fuera del hilo de la interfaz: un solo hilo, y cada texto
+        # nuevo descarta lo que esperaba en la cola. Los resultados de una
+        # versión anterior del texto se ignoran al llegar
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(1)
+        # El perfil de ciclos va en otro pool: una simulación larga no frena
+        # la compilación en vivo, y el clear() de cada edición no lo descarta
+        self.pool_ciclos = QThreadPool(self)
+        self.pool_ciclos.setMaxThreadCount(1)
+        # Cada edición cuenta: un perfil de un texto que ya cambió se descarta
+        self.ediciones = 0
+        self.senales_ciclos = SenalesCompilacion()
+        self.senales_ciclos.ciclos_por_linea.connect(self.ciclos_recibidos)
+        self.senales_ciclos.fallida.connect(self.ciclos_fallidos)
+        self.version = 0
+        # Texto que se mandó a compilar con la versión actual, y el último
+        # (texto, LMC) que llegó del hilo: "Guardar" lo reutiliza si el texto
+        # no cambió. Si hace falta compilar, la ruta espera aquí al resultado
+        self.texto_en_curso = ""
+        self.ultimo_compilado: Optional[Tuple[str, str]] = None
+        self.guardar_en: Optional[str] = None
+        self.senales = SenalesCompilacion()
+        self.senales.terminada.connect(self.compilacion_terminada)
+        self.senales.fallida.connect(self.compilacion_fallida)
+        self.senales.perfilada.connect(self.perfil_recibido)
+        self.temporizador = QTimer(self)
+        self.temporizador.setSingleShot(True)
+        self.temporizador.timeout.connect(self.generar)
 
         # Top controls
         self.load_btn = QPushButton("Cargar .txt")
@@ -45,6 +193,32 @@ class VentanaPrincipal(QMainWindow):
         self.generate_btn.setDefault(True)
         self.generate_btn.clicked.connect(self.generar)
 
+        self.save_btn = QPushButton("Guardar")
+        self.save_btn.clicked.connect(self.guardar)
+
+        # Recompilación mientras se escribe
+        self.live_check = QCheckBox("En vivo")
+        self.live_check.setChecked(True)
+        self.delay_spin = QSpinBox()
+        self.delay_spin.setRange(0, 5000)
+        self.delay_spin.setSingleStep(100)
+        self.delay_spin.setSuffix(" ms")
+        self.delay_spin.setValue(retardo_ms)
+
+        # Tiempo y memoria por fase de cada compilación
+        self.profile_check = QCheckBox("Perfil")
+        self.profile_check.toggled.connect(self.perfil_cambiado)
+
+        # Ciclos por línea con estas entradas, en el margen del editor
+        self.entradas_edit = QLineEdit()
+        self.entradas_edit.setPlaceholderText("Entradas (p. ej. 5 3)")
+        self.ciclos_btn = QPushButton("Ciclos por línea")
+        self.ciclos_btn.clicked.connect(self.perfilar_ciclos)
+
+        # Panel del simulador (ejecución del LMC generado)
+        self.sim_check = QCheckBox("Simulador")
+        self.sim_check.toggled.connect(self.simulador_cambiado)
+
         # Destino de guardado
         self.dest_combo = QComboBox()
         self.dest_combo.addItems(["Harry", "Juan", "Anthony", "Luis"])
@@ -55,26 +229,53 @@ class VentanaPrincipal(QMainWindow):
         top_bar.addWidget(self.output_name_edit, stretch=1)
         top_bar.addWidget(QLabel("Guardar en:"))
         top_bar.addWidget(self.dest_combo)
+        top_bar.addWidget(self.live_check)
+        top_bar.addWidget(self.delay_spin)
+        top_bar.addWidget(self.profile_check)
+        top_bar.addWidget(self.entradas_edit)
+        top_bar.addWidget(self.ciclos_btn)
+        top_bar.addWidget(self.sim_check)
         top_bar.addWidget(self.generate_btn)
+        top_bar.addWidget(self.save_btn)
 
         # Editors in splitter
         self.input_edit = QPlainTextEdit()
         self.input_edit.setPlaceholderText("Escribe tu pseudo-código aquí o carga un archivo .txt...")
+        self.input_edit.textChanged.connect(self.texto_cambiado)
         self.output_edit = QPlainTextEdit()
         self.output_edit.setReadOnly(True)
         self.output_edit.setPlaceholderText("Código LMC generado")
 
+        entrada = QWidget()
+        entrada_layout = QHBoxLayout(entrada)
+        entrada_layout.setContentsMargins(0, 0, 0, 0)
+        entrada_layout.setSpacing(0)
+        self.margen_calor = MargenCalor(self.input_edit)
+        entrada_layout.addWidget(self.margen_calor)
+        entrada_layout.addWidget(self.input_edit)
+
         splitter = QSplitter(Qt.Horizontal)
-        splitter.addWidget(self.input_edit)
+        splitter.addWidget(entrada)
         splitter.addWidget(self.output_edit)
         splitter.setStretchFactor(0, 1)
         splitter.setStretchFactor(1, 1)
 
+        self.perfil_edit = QPlainTextEdit()
+        self.perfil_edit.setReadOnly(True)
+        self.perfil_edit.setFont(QFontDatabase.systemFont(QFontDatabase.FixedFont))
+        self.perfil_edit.setMaximumHeight(180)
+        self.perfil_edit.setVisible(False)
+
+        self.simulador = PanelSimulador(self.output_edit.toPlainText)
+        self.simulador.setVisible(False)
+
         # Layout
         root = QWidget()
         layout = QVBoxLayout(root)
         layout.addLayout(top_bar)
         layout.addWidget(splitter)
+        layout.addWidget(self.perfil_edit)
+        layout.addWidget(self.simulador)
         self.setCentralWidget(root)
 
         # Status bar
@@ -104,31 +305,136 @@ class VentanaPrincipal(QMainWindow):
         except Exception as e:
             QMessageBox.critical(self, "Error", f"No se pudo cargar el archivo:\n{e}")
 
+    def texto_cambiado(self):
+        self.ediciones += 1
+        # Los ciclos por línea eran del texto anterior
+        self.margen_calor.mostrar({})
+        # Cada tecla reinicia la espera: se compila cuando se deja de escribir
+        if self.live_check.isChecked():
+            self.temporizador.start(self.delay_spin.value())
+
     def generar(self):
+        self.temporizador.stop()
         text = self.input_edit.toPlainText().strip()
+        self.version += 1
+        self.pool.clear()
         if not text:
-            QMessageBox.warning(self, "Vacío", "Ingresa pseudo-código o carga un archivo.")
+            self.output_edit.clear()
+            return
+        self.texto_en_curso = text
+        lineas = text.splitlines()
+        self.analisis = self.analisis.actualizar(lineas)
+        self.status.showMessage("Compilando...")
+        self.pool.start(
+            TrabajoCompilacion(
+                self.version, lineas, self.analisis.tokens, self.cache, self.senales, self.profile_check.isChecked()
+            )
+        )
+
+    def compilacion_terminada(self, version: int, lmc: str, segundos: float):
+        if version != self.version:
+            return
+        self.ultimo_compilado = (self.texto_en_curso, lmc)
+        self.output_edit.setPlainText(lmc)
+        if self.guardar_en is not None:
+            ruta, self.guardar_en = self.guardar_en, None
+            self.escribir_salida(ruta, lmc)
             return
+        stats = self.cache.estadisticas()
+        self.status.showMessage(
+            f"Compilado en {segundos * 1000:.1f} ms (caché: {stats['aciertos']} aciertos, {stats['fallos']} fallos)"
+        )
+
+    def perfil_cambiado(self, activo: bool):
+        self.perfil_edit.setVisible(activo)
+        if activo:
+            self.generar()
+
+    def simulador_cambiado(self, activo: bool):
+        self.simulador.setVisible(activo)
+
+    def perfil_recibido(self, version: int, tabla: str):
+        if version == self.version:
+            self.perfil_edit.setPlainText(tabla)
+
+    def perfilar_ciclos(self):
         try:
-            lines = text.splitlines()
-            ops = analizar_pseudocodigo(lines)
-            lmc = generar_lmc(ops)
-            self.output_edit.setPlainText(lmc)
+            entradas = [int(x) for x in self.entradas_edit.text().replace(",", " ").split()]
+        except ValueError:
+            self.status.showMessage("Las entradas deben ser números enteros separados por espacios")
+            return
+        # Sin quitar las líneas en blanco del principio: los números de línea
+        # deben coincidir con los del editor
+        lineas = self.input_edit.toPlainText().splitlines()
+        if not any(l.strip() for l in lineas):
+            return
+        self.status.showMessage("Ejecutando...")
+        # Pedirlo de nuevo reemplaza al que esperaba en la cola
+        self.pool_ciclos.clear()
+        self.pool_ciclos.start(TrabajoCiclos(self.ediciones, lineas, entradas, self.senales_ciclos))
 
-            asegurar_directorio(self.carpeta_salida())
-            # Determine output name
-            base = self.output_name_edit.text().strip()
-            if not base:
-                if self.current_input_path:
-                    base = os.path.splitext(os.path.basename(self.current_input_path))[0]
-                else:
-                    base = f"manual_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-            out_path = os.path.join(self.carpeta_salida(), f"{base}.lmc")
+    def ciclos_recibidos(self, edicion: int, ciclos: Dict[int, int], total: int):
+        if edicion != self.ediciones:
+            self.status.showMessage("Perfil de ciclos descartado: el texto cambió durante la ejecución", 5000)
+            return
+        self.margen_calor.mostrar(ciclos)
+        self.status.showMessage(f"Ciclos ejecutados: {total}")
+
+    def ciclos_fallidos(self, edicion: int, error: str):
+        if edicion != self.ediciones:
+            self.status.showMessage("Perfil de ciclos descartado: el texto cambió durante la ejecución", 5000)
+            return
+        self.status.showMessage(f"Error al ejecutar: {error}")
+
+    def compilacion_fallida(self, version: int, error: str):
+        # Mientras se escribe el texto suele estar incompleto: el error va a la
+        # barra de estado, sin diálogo
+        if version != self.version:
+            return
+        if self.guardar_en is not None:
+            self.guardar_en = None
+            QMessageBox.critical(self, "Error", f"Error al generar LMC:\n{error}")
+        self.status.showMessage(f"Error al generar LMC: {error}")
+
+    def guardar(self):
+        text = self.input_edit.toPlainText().strip()
+        if not text:
+            QMessageBox.warning(self, "Vacío", "Ingresa pseudo-código o carga un archivo.")
+            return
+        # Determine output name
+        base = self.output_name_edit.text().strip()
+        if not base:
+            if self.current_input_path:
+                base = os.path.splitext(os.path.basename(self.current_input_path))[0]
+            else:
+                base = f"manual_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        out_path = os.path.join(self.carpeta_salida(), f"{base}.lmc")
+        # Lo normal es que el texto ya se haya compilado en segundo plano; si
+        # no, se compila en el pool y se guarda al llegar el resultado, sin
+        # trabar la interfaz
+        if self.ultimo_compilado is not None and self.ultimo_compilado[0] == text:
+            self.escribir_salida(out_path, self.ultimo_compilado[1])
+            return
+        self.guardar_en = out_path
+        self.generar()
 
+    def escribir_salida(self, out_path: str, lmc: str):
+        try:
+            asegurar_directorio(self.carpeta_salida())
             escribir_texto(out_path, lmc)
-            self.status.showMessage(f"Generado y guardado en: {out_path}", 5000)
+            self.status.showMessage(f"Guardado en: {out_path}", 5000)
         except Exception as e:
-            QMessageBox.critical(self, "Error", f"Error al generar LMC:\n{e}")
+            QMessageBox.critical(self, "Error", f"No se pudo guardar el LMC:\n{e}")
+
+    def closeEvent(self, event):
+        # No cerrar con una compilación en curso en otro hilo
+        self.temporizador.stop()
+        self.pool.clear()
+        self.pool_ciclos.clear()
+        self.pool.waitForDone()
+        self.pool_ciclos.waitForDone()
+        self.simulador.cerrar()
+        super().closeEvent(event)
 
 
 def run():
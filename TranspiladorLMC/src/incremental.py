@@ -0,0 +1,236 @@
+from typing import List, Optional, Sequence, Tuple
+
+from lexer import Lexema, clasificar_linea
+from nodes import Instruccion
+from parser import Analizador, FueraDeContexto, Marco, Nodo
+
+# (posición entre los hermanos, nodo, línea de la cabecera)
+Paso = Tuple[int, Nodo, int]
+
+
+def _abiertos(hijos: Tuple[Nodo, ...], linea: int) -> List[Paso]:
+    # Bloques abiertos justo antes de procesar `linea`, de afuera hacia adentro
+    camino: List[Paso] = []
+    pos = 0
+    while True:
+        for ix, h in enumerate(hijos):
+            inicio = pos + h.antes
+            if inicio >= linea:
+                return camino
+            fin = inicio + h.lineas
+            if linea < fin or (linea == fin and not h.cierre_propio):
+                camino.append((ix, h, inicio))
+                hijos, pos = h.hijos, inicio + 1
+                break
+            pos = fin
+        else:
+            return camino
+
+
+def _reconstruir(nodo: Nodo, hijos: Tuple[Nodo, ...], lineas: int, sino: int) -> Nodo:
+    # Un bloque con otros hijos: su token se rearma con los de ellos, los demás
+    # tokens se comparten con el análisis anterior
+    if nodo.token.tipo == "mientras":
+        token = nodo.token._replace(cuerpo=[h.token for h in hijos])
+    else:
+        entonces: List[Instruccion] = []
+        otra: List[Instruccion] = []
+        pos = 1
+        for h in hijos:
+            pos += h.antes
+            (otra if sino and pos > sino else entonces).append(h.token)
+            pos += h.lineas
+        token = nodo.token._replace(entonces=entonces, sino=otra)
+    return nodo._replace(token=token, hijos=hijos, lineas=lineas, sino=sino)
+
+
+def _ubicado(nodo: Nodo, inicio: int) -> Nodo:
+    # El nodo con la línea de cada token según su posición: los tokens que se
+    # comparten con un análisis anterior conservan la línea que tenían, que
+    # queda vieja si la edición agregó o quitó líneas antes. Solo se copian
+    # los que cambian
+    hijos = nodo.hijos
+    if hijos:
+        pos = inicio + 1
+        nuevos = []
+        for h in hijos:
+            pos += h.antes
+            nuevos.append(_ubicado(h, pos))
+            pos += h.lineas
+        if any(n is not h for n, h in zip(nuevos, hijos)):
+            nodo = _reconstruir(nodo, tuple(nuevos), nodo.lineas, nodo.sino)
+    if nodo.token.linea != inicio + 1:
+        nodo = nodo._replace(token=nodo.token._replace(linea=inicio + 1))
+    return nodo
+
+
+class AnalisisIncremental:
+    # Resultado del análisis que se puede actualizar tras una edición sin volver
+    # a recorrer todo el texto: solo se reclasifican las líneas cambiadas y se
+    # reanaliza desde la edición dentro del bloque abierto más interno, hasta el
+    # primer punto en que el estado del analizador coincide con el anterior. Si
+    # la edición cierra o cambia de rama ese bloque, se sube al que lo contiene.
+    # Los objetos son inmutables: editar devuelve otro y los nodos y tokens que
+    # no se tocaron se comparten
+    def __init__(self, lineas: List[str], lexemas: List[Lexema], hijos: Tuple[Nodo, ...], lineas_al_dia: bool = True):
+        self.lineas = lineas
+        self.lexemas = lexemas
+        self.hijos = hijos
+        # Falso tras una edición que cambió la cantidad de líneas: los tokens
+        # compartidos que quedaron después tienen la línea vieja
+        self._lineas_al_dia = lineas_al_dia
+        self._tokens: Optional[List[Instruccion]] = None
+
+    @classmethod
+    def analizar(cls, lineas: Sequence[str]) -> "AnalisisIncremental":
+        lexemas = [clasificar_linea(linea, numero) for numero, linea in enumerate(lineas, start=1)]
+        raiz = Marco(None, [], -1, 0, 0)
+        analizador = Analizador([raiz])
+        for numero, lexema in enumerate(lexemas):
+            analizador.procesar(numero, lexema)
+        analizador.terminar(len(lexemas))
+        return cls(list(lineas), lexemas, tuple(raiz.hijos))
+
+    @property
+    def tokens(self) -> List[Instruccion]:
+        # Lo mismo que analizar_pseudocodigo(self.lineas), también en la línea de
+        # cada token
+        if self._tokens is None:
+            if not self._lineas_al_dia:
+                # Se corrigen una sola vez: el árbol queda con los nodos ubicados
+                hijos = []
+                pos = 0
+                for h in self.hijos:
+                    pos += h.antes
+                    hijos.append(_ubicado(h, pos))
+                    pos += h.lineas
+                self.hijos = tuple(hijos)
+                self._lineas_al_dia = True
+            self._tokens = [h.token for h in self.hijos]
+        return self._tokens
+
+    def actualizar(self, lineas: Sequence[str]) -> "AnalisisIncremental":
+        # Edita el tramo entre el prefijo y el sufijo que no cambiaron
+        viejas = self.lineas
+        comunes = min(len(viejas), len(lineas))
+        desde = 0
+        while desde < comunes and viejas[desde] == lineas[desde]:
+            desde += 1
+        if desde == len(viejas) == len(lineas):
+            return self
+        sufijo = 0
+        while sufijo < comunes - desde and viejas[-1 - sufijo] == lineas[-1 - sufijo]:
+            sufijo += 1
+        return self.editar(desde, len(viejas) - sufijo, lineas[desde:len(lineas) - sufijo])
+
+    def editar(self, desde: int, hasta: int, nuevas: Sequence[str]) -> "AnalisisIncremental":
+        # Reemplaza las líneas [desde, hasta) (contadas desde 0) por `nuevas`
+        if not 0 <= desde <= hasta <= len(self.lineas):
+            raise ValueError(f"Rango de edición inválido: {desde}-{hasta} en {len(self.lineas)} líneas")
+        # Los lexemas que se conservan mantienen su número de línea original;
+        # el analizador no lo usa
+        lexemas = self.lexemas[:desde] + [clasificar_linea(l, desde + k + 1) for k, l in enumerate(nuevas)] + self.lexemas[hasta:]
+        lineas = self.lineas[:desde] + list(nuevas) + self.lineas[hasta:]
+        camino = _abiertos(self.hijos, desde)
+        inicio = desde
+        while True:
+            try:
+                hijos = self._reanalizar(lexemas, camino, inicio, desde + len(nuevas), len(nuevas) - (hasta - desde))
+                al_dia = self._lineas_al_dia and len(nuevas) == hasta - desde
+                return AnalisisIncremental(lineas, lexemas, hijos, al_dia)
+            except FueraDeContexto:
+                # Se reanaliza el bloque entero desde su cabecera, dentro del padre
+                _, _, inicio = camino.pop()
+
+    def _reanalizar(self, lexemas: List[Lexema], camino: List[Paso], inicio: int, fin_edicion: int, delta: int) -> Tuple[Nodo, ...]:
+        # Reanaliza desde `inicio` dentro del último bloque de `camino` (o del
+        # texto completo si está vacío) y devuelve las instrucciones de primer
+        # nivel. Las líneas nuevas terminan en `fin_edicion`; las que siguen son
+        # las viejas corridas `delta` lugares
+        if camino:
+            _, contenedor, c_inicio = camino[-1]
+            viejos = contenedor.hijos
+            pos = c_inicio + 1
+        else:
+            contenedor, c_inicio = None, -1
+            viejos = self.hijos
+            pos = 0
+        # Hijos que terminan antes del reanálisis
+        previos = 0
+        while previos < len(viejos) and pos + viejos[previos].antes < inicio:
+            pos += viejos[previos].antes + viejos[previos].lineas
+            previos += 1
+
+        # Los bloques del camino entran como contexto, en la rama en que estaban
+        marcos = [Marco(None, [], -1, 0, pos)]
+        for _, nodo, cabecera in camino:
+            sino = cabecera + nodo.sino if nodo.sino and cabecera + nodo.sino < inicio else -1
+            marcos.append(Marco(nodo.token, [], cabecera, nodo.antes, pos, sino))
+        marco = marcos[-1]
+        analizador = Analizador(marcos, len(marcos))
+
+        # Primer hijo viejo que aún no terminó, con su cabecera en líneas viejas
+        k = previos
+        k_inicio = pos + viejos[k].antes if k < len(viejos) else 0
+
+        def sincroniza(viejo: int) -> bool:
+            # ¿Antes de la línea vieja `viejo` el analizador anterior estaba en
+            # el mismo estado: el contenedor arriba, en la misma rama y sin
+            # ningún hijo abierto?
+            nonlocal k, k_inicio
+            if contenedor is not None:
+                c_fin = c_inicio + contenedor.lineas
+                if not (viejo < c_fin or (viejo == c_fin and not contenedor.cierre_propio)):
+                    return False
+                en_sino = bool(contenedor.sino) and c_inicio + contenedor.sino < viejo
+                if en_sino != (marco.sino >= 0):
+                    return False
+            while k < len(viejos):
+                h = viejos[k]
+                h_fin = k_inicio + h.lineas
+                if h_fin < viejo or (h_fin == viejo and h.cierre_propio):
+                    k += 1
+                    if k < len(viejos):
+                        k_inicio = h_fin + viejos[k].antes
+                    continue
+                return k_inicio >= viejo
+            return True
+
+        total = len(lexemas)
+        linea = inicio
+        while True:
+            if linea >= fin_edicion and len(marcos) == analizador.base and sincroniza(linea - delta):
+                break
+            if linea == total:
+                analizador.terminar(total)
+                if contenedor is None:
+                    k = len(viejos)
+                elif not sincroniza(linea - delta):
+                    raise FueraDeContexto()
+                break
+            analizador.procesar(linea, lexemas[linea])
+            linea += 1
+
+        # Hijos viejos antes del reanálisis, los nuevos y los viejos que siguen
+        siguientes = viejos[k:]
+        if siguientes:
+            primero = siguientes[0]
+            siguientes = (primero._replace(antes=k_inicio + delta - marco.fin),) + siguientes[1:]
+        hijos = viejos[:previos] + tuple(marco.hijos) + siguientes
+        if contenedor is None:
+            return hijos
+
+        # El contenedor y sus ancestros cambian de tamaño y de hijos
+        viejo = linea - delta
+        nodo = contenedor
+        for j in range(len(camino) - 1, -1, -1):
+            _, nodo_viejo, cabecera = camino[j]
+            if j < len(camino) - 1:
+                ix = camino[j + 1][0]
+                hijos = nodo_viejo.hijos[:ix] + (nodo,) + nodo_viejo.hijos[ix + 1:]
+            sino = nodo_viejo.sino
+            if sino and cabecera + sino >= viejo:
+                sino += delta
+            nodo = _reconstruir(nodo_viejo, hijos, nodo_viejo.lineas + delta, sino)
+        ix = camino[0][0]
+        return self.hijos[:ix] + (nodo,) + self.hijos[ix + 1:]
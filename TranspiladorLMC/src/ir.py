@@ -0,0 +1,329 @@
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple, Union
+
+from nodes import Asignacion, Condicion, Imprimir, Instruccion, Leer, Mientras, Si, Token, como_nodos
+
+
+class Operacion(NamedTuple):
+    # Instrucción de tres direcciones: "destino = izquierda op derecha",
+    # o "leer"/"imprimir" sobre destino
+    op: str
+    destino: str
+    izquierda: Optional[str] = None
+    derecha: Optional[str] = None
+    # Línea del pseudocódigo (para el mapa de fuente del generador)
+    linea: Optional[int] = None
+
+
+class Terminador(NamedTuple):
+    # "ir" (a verdadero), "si" (verdadero o falso según la comparación) o "fin"
+    tipo: str
+    verdadero: Optional["Bloque"] = None
+    falso: Optional["Bloque"] = None
+    comparacion: Optional[Tuple[str, str, str]] = None  # (op, izquierda, derecha)
+    # Línea del SI o MIENTRAS que produjo los saltos
+    linea: Optional[int] = None
+
+
+class Bloque:
+    def __init__(self, etiqueta: str):
+        self.etiqueta = etiqueta
+        self.operaciones: List[Operacion] = []
+        self.terminador = Terminador("fin")
+        # Comprobación de un MIENTRAS: destino de un salto hacia atrás
+        self.cabecera = False
+
+    def sucesores(self) -> List["Bloque"]:
+        t = self.terminador
+        if t.tipo == "ir":
+            return [t.verdadero]
+        if t.tipo == "si":
+            return [t.verdadero, t.falso]
+        return []
+
+    def __repr__(self) -> str:
+        return f"Bloque({self.etiqueta})"
+
+
+class TablaSimbolos:
+    def __init__(self):
+        self.variables: Set[str] = set()
+        self.constantes: Dict[int, str] = {}
+
+    def registrar(self, token: str) -> None:
+        if token.isdigit():
+            self.constante(int(token))
+        else:
+            self.variables.add(token.upper())
+
+    def constante(self, valor: int) -> str:
+        if valor not in self.constantes:
+            self.constantes[valor] = f"CTE{valor}"
+        return self.constantes[valor]
+
+
+class ProgramaIR:
+    def __init__(self):
+        # En orden de creación: el de las instrucciones del pseudocódigo
+        self.bloques: List[Bloque] = []
+        self.simbolos = TablaSimbolos()
+        self._indice = 0
+
+    @property
+    def entrada(self) -> Bloque:
+        return self.bloques[0]
+
+    def nuevo_bloque(self, etiqueta: str) -> Bloque:
+        bloque = Bloque(etiqueta)
+        self.bloques.append(bloque)
+        return bloque
+
+    def nuevo_indice(self) -> int:
+        self._indice += 1
+        return self._indice
+
+
+# Saltos cuando se cumple "izq op der": si se resta al revés (der - izq) y qué
+# saltos se hacen sobre el resultado. Los que van a "siguiente" descartan el
+# caso y siguen por la rama falsa (BRP también salta con cero)
+SALTOS_CONDICION: Dict[str, Tuple[bool, List[Tuple[str, bool]]]] = {
+    ">": (False, [("BRZ", False), ("BRP", True)]),
+    "<": (True, [("BRZ", False), ("BRP", True)]),
+    ">=": (False, [("BRP", True)]),
+    "<=": (True, [("BRP", True)]),
+    "=": (False, [("BRZ", True)]),
+    "!=": (False, [("BRZ", False), ("BRA", True)]),
+}
+NEGACION = {">": "<=", "<": ">=", ">=": "<", "<=": ">", "=": "!=", "!=": "="}
+_ESPEJO = {">": "<", "<": ">", ">=": "<=", "<=": ">=", "=": "=", "!=": "!="}
+
+
+def _es_numero(token: str) -> bool:
+    return token.isdigit()
+
+
+def _es_cero(token: str) -> bool:
+    return _es_numero(token) and int(token) == 0
+
+
+def costo_salto(cmp: str, derecha: str) -> int:
+    # Saltos que cuesta probar la comparación (sin contar LDA/SUB)
+    if _es_cero(derecha):
+        # Contra 0: "<" nunca se cumple y ">=" siempre (un BRA)
+        return {"<": 0, ">=": 1}.get(cmp, len(SALTOS_CONDICION[cmp][1]))
+    return len(SALTOS_CONDICION[cmp][1])
+
+
+def _comparacion(condicion: Condicion, simbolos: TablaSimbolos) -> Tuple[str, str, str]:
+    cmp = condicion.op
+    izq, der = condicion.izquierda.upper(), condicion.derecha.upper()
+    if _es_cero(izq) and not _es_cero(der):
+        # El 0 a la derecha: "0 < b" es "b > 0"
+        izq, der, cmp = der, izq, _ESPEJO[cmp]
+    if _es_cero(der):
+        # Contra 0 no hace falta restar: "a > 0" es "a != 0" y "a <= 0" es
+        # "a = 0", que se prueban con BRZ directamente sobre a. También con una
+        # constante a la izquierda ("0 >= 7" queda "7 <= 0"): el generador
+        # descarta todo 0 a la derecha y no sabe probar ">" ni "<=" sin restar
+        simbolos.registrar(izq)
+        return {">": "!=", "<=": "="}.get(cmp, cmp), izq, "0"
+    if cmp in (">", "<"):
+        # Contra una constante, "a > k" equivale a "a >= k + 1" (y "k > b" a
+        # "k - 1 >= b"): la prueba queda en un solo BRP en lugar de BRZ + BRP
+        mayor, menor = (izq, der) if cmp == ">" else (der, izq)
+        if _es_numero(menor) and int(menor) < 999:
+            cmp, izq, der = ">=", mayor, str(int(menor) + 1)
+        elif _es_numero(mayor) and int(mayor) > 0:
+            cmp, izq, der = ">=", str(int(mayor) - 1), menor
+    simbolos.registrar(izq)
+    simbolos.registrar(der)
+    return cmp, izq, der
+
+
+def _es_neutro(izquierda: str, op: str, derecha: str) -> bool:
+    # "D = X + 0" o "D = X - 0": basta con copiar X
+    return op in ("+", "-") and _es_cero(derecha)
+
+
+def _construir(operaciones: List[Instruccion], actual: Bloque, programa: ProgramaIR) -> Bloque:
+    # Agrega las operaciones a partir del bloque actual; devuelve el bloque en
+    # el que sigue el control
+    simbolos = programa.simbolos
+    for op in operaciones:
+        if isinstance(op, (Leer, Imprimir)):
+            simbolos.registrar(op.var)
+            actual.operaciones.append(Operacion(op.tipo, op.var.upper(), linea=op.linea))
+        elif isinstance(op, Asignacion):
+            izquierda, derecha = op.izquierda.upper(), op.derecha.upper()
+            simbolos.registrar(op.destino)
+            simbolos.registrar(izquierda)
+            if not _es_neutro(izquierda, op.op, derecha):
+                simbolos.registrar(derecha)
+            actual.operaciones.append(Operacion(op.op, op.destino.upper(), izquierda, derecha, op.linea))
+        elif isinstance(op, Si):
+            n = programa.nuevo_indice()
+            condicion = _comparacion(op.condicion, simbolos)
+            entonces = programa.nuevo_bloque(f"ENTONCES{n}")
+            fin_entonces = _construir(op.entonces, entonces, programa)
+            sino = programa.nuevo_bloque(f"SINO{n}")
+            fin_sino = _construir(op.sino, sino, programa)
+            fin = programa.nuevo_bloque(f"FINSI{n}")
+            actual.terminador = Terminador("si", entonces, sino, condicion, op.linea)
+            fin_entonces.terminador = Terminador("ir", fin, linea=op.linea)
+            fin_sino.terminador = Terminador("ir", fin, linea=op.linea)
+            actual = fin
+        elif isinstance(op, Mientras):
+            n = programa.nuevo_indice()
+            condicion = _comparacion(op.condicion, simbolos)
+            prueba = programa.nuevo_bloque(f"MIENTRAS{n}")
+            prueba.cabecera = True
+            cuerpo = programa.nuevo_bloque(f"DO{n}")
+            fin_cuerpo = _construir(op.cuerpo, cuerpo, programa)
+            fin = programa.nuevo_bloque(f"FINMIENTRAS{n}")
+            actual.terminador = Terminador("ir", prueba, linea=op.linea)
+            prueba.terminador = Terminador("si", cuerpo, fin, condicion, op.linea)
+            fin_cuerpo.terminador = Terminador("ir", prueba, linea=op.linea)
+            actual = fin
+    return actual
+
+
+def construir_ir(operaciones: Iterable[Union[Instruccion, Token]]) -> ProgramaIR:
+    programa = ProgramaIR()
+    final = _construir(como_nodos(operaciones), programa.nuevo_bloque("INICIO"), programa)
+    final.terminador = Terminador("fin")
+    return programa
+
+
+def predecesores(programa: ProgramaIR) -> Dict[Bloque, List[Bloque]]:
+    preds: Dict[Bloque, List[Bloque]] = {b: [] for b in programa.bloques}
+    for b in programa.bloques:
+        for s in b.sucesores():
+            preds[s].append(b)
+    return preds
+
+
+def aristas_hacia_atras(programa: ProgramaIR) -> Set[Tuple[Bloque, Bloque]]:
+    # Recorrido en profundidad desde la entrada: una arista hacia un bloque que
+    # sigue en la pila cierra un bucle
+    atras: Set[Tuple[Bloque, Bloque]] = set()
+    en_pila: Set[Bloque] = set()
+    visitados: Set[Bloque] = set()
+    pila: List[Tuple[Bloque, int]] = [(programa.entrada, 0)]
+    en_pila.add(programa.entrada)
+    visitados.add(programa.entrada)
+    while pila:
+        b, i = pila[-1]
+        sucesores = b.sucesores()
+        if i == len(sucesores):
+            pila.pop()
+            en_pila.discard(b)
+            continue
+        pila[-1] = (b, i + 1)
+        s = sucesores[i]
+        if s in en_pila:
+            atras.add((b, s))
+        elif s not in visitados:
+            visitados.add(s)
+            en_pila.add(s)
+            pila.append((s, 0))
+    return atras
+
+
+def simplificar_saltos(programa: ProgramaIR) -> None:
+    # Los bloques vacíos que solo saltan a otro (ramas sin instrucciones, el
+    # final de un cuerpo) se eliminan redirigiendo los saltos hacia su destino
+    def destino_final(b: Bloque) -> Bloque:
+        vistos = {b}
+        while not b.operaciones and b.terminador.tipo == "ir" and b is not programa.entrada:
+            siguiente = b.terminador.verdadero
+            if siguiente in vistos:
+                break
+            vistos.add(siguiente)
+            b = siguiente
+        return b
+
+    for b in programa.bloques:
+        t = b.terminador
+        if t.tipo == "ir":
+            b.terminador = t._replace(verdadero=destino_final(t.verdadero))
+        elif t.tipo == "si":
+            verdadero, falso = destino_final(t.verdadero), destino_final(t.falso)
+            if verdadero is falso:
+                # Ambas ramas llegan al mismo lugar: la comparación sobra
+                b.terminador = Terminador("ir", verdadero, linea=t.linea)
+            else:
+                b.terminador = t._replace(verdadero=verdadero, falso=falso)
+    alcanzados = {s for b in programa.bloques for s in b.sucesores()}
+    programa.bloques = [
+        b for b in programa.bloques
+        if b is programa.entrada or b in alcanzados or b.operaciones or b.terminador.tipo != "ir"
+    ]
+    # Al quitar bloques puede quedar alguna cabecera sin su cuerpo
+    vivos = set(programa.bloques)
+    for b in programa.bloques:
+        for s in b.sucesores():
+            if s not in vivos:
+                raise AssertionError(f"Salto a un bloque eliminado: {s.etiqueta}")
+
+
+def disponer_bloques(programa: ProgramaIR, rotar_bucles: bool = True) -> List[Bloque]:
+    # Orden de los bloques en memoria. Se sigue el camino que cae por debajo
+    # (sin salto) mientras el siguiente bloque tenga colocados todos sus
+    # predecesores; en un SI cae la rama que pide menos saltos (a igual costo,
+    # ENTONCES). Con rotación, al entrar a un MIENTRAS se coloca primero el
+    # cuerpo: la comprobación queda al final y salta hacia atrás.
+    atras = aristas_hacia_atras(programa)
+    pendientes_por_bloque = {b: 0 for b in programa.bloques}
+    for b in programa.bloques:
+        for s in b.sucesores():
+            if (b, s) not in atras:
+                pendientes_por_bloque[s] += 1
+    colocados: Set[Bloque] = set()
+    orden: List[Bloque] = []
+
+    def listo(b: Bloque) -> bool:
+        return b not in colocados and pendientes_por_bloque[b] == 0
+
+    def colocar(b: Bloque) -> None:
+        colocados.add(b)
+        orden.append(b)
+        for s in b.sucesores():
+            if (b, s) not in atras:
+                pendientes_por_bloque[s] -= 1
+
+    def rotado(x: Bloque) -> Bloque:
+        # Con rotación, al llegar a la comprobación de un MIENTRAS se coloca
+        # antes su cuerpo
+        if rotar_bucles and x.cabecera and x.terminador.tipo == "si":
+            cuerpo = x.terminador.verdadero
+            if cuerpo not in colocados and cuerpo is not x:
+                return rotado(cuerpo)
+        return x
+
+    def siguiente(b: Bloque) -> Optional[Bloque]:
+        t = b.terminador
+        if t.tipo == "ir":
+            x = t.verdadero
+            return rotado(x) if listo(x) else None
+        if t.tipo == "si":
+            verdadero, falso = t.verdadero, t.falso
+            if not listo(verdadero):
+                return rotado(falso) if listo(falso) else None
+            if not listo(falso) or b.cabecera:
+                return rotado(verdadero)
+            cmp, _, derecha = t.comparacion
+            # Caer en falso = saltar si se cumple; caer en verdadero = saltar si no
+            if costo_salto(cmp, derecha) < costo_salto(NEGACION[cmp], derecha):
+                return rotado(falso)
+            return rotado(verdadero)
+        return None
+
+    ix = 0
+    bloques = programa.bloques
+    while len(orden) < len(bloques):
+        while bloques[ix] in colocados:
+            ix += 1
+        b: Optional[Bloque] = rotado(bloques[ix])
+        while b is not None:
+            colocar(b)
+            b = siguiente(b)
+    return orden
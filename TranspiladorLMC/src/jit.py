@@ -0,0 +1,212 @@
+# Segundo motor de ejecución: cada bloque del programa se traduce una sola vez
+# a una función de Python (código fuente generado y compilado con exec) que
+# ejecuta todas sus instrucciones de corrido, sin decodificar ni despachar en
+# cada ciclo. El límite de pasos se revisa una vez por bloque. Las salidas,
+# los ciclos y los errores son los mismos que los de MaquinaLMC, que sigue
+# siendo la referencia: las instrucciones que no se compilan (INP, OUT, HLT,
+# inválidas y buzones que el programa sobrescribe) se ejecutan con su paso()
+from typing import Callable, Dict, List, Optional, Sequence, Set, Tuple, Union
+
+from assembler import TAM_MEMORIA, ensamblar
+from simulator import MAX_PASOS, LimitePasosExcedido, MaquinaLMC, Resultado, simular
+
+# Función del bloque y su largo (el camino más largo): recibe (memoria,
+# acumulador, negativo) y devuelve (siguiente pc, acumulador, negativo, ciclos
+# ejecutados, si terminó en un salto hacia atrás tomado)
+Bloque = Tuple[Callable, int]
+
+# Instrucciones por bloque, sumando todos los caminos
+MAX_INSTRUCCIONES = 64
+
+_SIN_COMPILAR = object()
+
+
+class MaquinaCompilada(MaquinaLMC):
+    def __init__(self, memoria: Sequence[int]):
+        super().__init__(memoria)
+        # None: en esa dirección no empieza ningún bloque (se interpreta)
+        self._bloques: Dict[int, Optional[Bloque]] = {}
+        # Para cada buzón, los bloques compilados que lo incluyen
+        self._cubre: List[List[int]] = [[] for _ in range(TAM_MEMORIA)]
+        # Buzones que alguna STA puede escribir: nunca se compilan, así un
+        # bloque no queda desactualizado (código automodificable, DAT de
+        # retorno). Se completa al compilar y al interpretar cada STA
+        self._volatiles: Set[int] = {d for op, d in zip(self.ops, self.dirs) if op == 3}
+
+    def _escrito(self, d: int) -> None:
+        # d pasa a ser volátil: se descartan los bloques que lo tenían compilado
+        self._volatiles.add(d)
+        for inicio in self._cubre[d]:
+            self._bloques.pop(inicio, None)
+        self._cubre[d] = []
+
+    def _traducir(self, inicio: int) -> Optional[Tuple[List[str], int, Set[int]]]:
+        # Se sigue el programa desde inicio. Los saltos hacia adelante se
+        # copian dentro del bloque (el condicional como un if); los saltos
+        # hacia atrás, la primera instrucción que no se compila o el tope de
+        # instrucciones cierran el camino con un return. None: una STA del
+        # bloque escribe en el propio bloque, hay que traducirlo de nuevo
+        memoria = self.memoria
+        cuerpo: List[str] = []
+        cubiertos: Set[int] = set()
+        largo = 0
+        emitidas = 0
+
+        def camino(x: int, k: int, sangria: str, n_falso: bool, en_memoria: Set[int]) -> bool:
+            # n_falso: se sabe que el negativo está apagado (no hace falta
+            # guardarlo); en_memoria: buzones que tienen el valor del acumulador
+            nonlocal largo, emitidas
+            while True:
+                n = "False" if n_falso else "n"
+                if x >= TAM_MEMORIA or x in self._volatiles or emitidas >= MAX_INSTRUCCIONES or memoria[x] // 100 in (0, 4, 9):
+                    cuerpo.append(f"{sangria}return {x}, a, {n}, {k}, False")
+                    largo = max(largo, k)
+                    return True
+                op, d = divmod(memoria[x], 100)
+                cubiertos.add(x)
+                emitidas += 1
+                k += 1
+                if op == 5:
+                    if d not in en_memoria:
+                        cuerpo.append(f"{sangria}a = m[{d}]")
+                        en_memoria = {d}
+                    n_falso = True
+                elif op == 1:
+                    cuerpo.append(f"{sangria}a = (a + m[{d}]) % 1000")
+                    n_falso = True
+                    en_memoria = set()
+                elif op == 2:
+                    cuerpo.extend([f"{sangria}a -= m[{d}]", f"{sangria}n = a < 0", f"{sangria}a %= 1000"])
+                    n_falso = False
+                    en_memoria = set()
+                elif op == 3:
+                    if d not in self._volatiles:
+                        self._escrito(d)
+                        if d in cubiertos:
+                            return False
+                    cuerpo.append(f"{sangria}m[{d}] = a")
+                    en_memoria = en_memoria | {d}
+                else:
+                    siempre = op == 6 or (op == 8 and n_falso)
+                    if d <= x:
+                        # Hacia atrás: sale del bloque (el intérprete compara
+                        # estados para detectar bucles infinitos)
+                        salto = f"return {d}, a, {n}, {k}, True"
+                        if siempre:
+                            cuerpo.append(f"{sangria}{salto}")
+                            largo = max(largo, k)
+                            return True
+                        cuerpo.append(f"{sangria}if {'a == 0' if op == 7 else 'not n'}: {salto}")
+                        largo = max(largo, k)
+                    elif siempre:
+                        x = d
+                        continue
+                    else:
+                        cuerpo.append(f"{sangria}if {'a == 0' if op == 7 else 'not n'}:")
+                        if not camino(d, k, sangria + "    ", n_falso, en_memoria):
+                            return False
+                x += 1
+
+        if not camino(inicio, 0, "    ", False, set()):
+            return None
+        return cuerpo, largo, cubiertos
+
+    def _compilar(self, inicio: int) -> Optional[Bloque]:
+        traducido = None
+        while traducido is None:
+            traducido = self._traducir(inicio)
+        cuerpo, largo, cubiertos = traducido
+        bloque: Optional[Bloque] = None
+        if largo:
+            fuente = "def bloque(m, a, n):\n" + "".join(f"{linea}\n" for linea in cuerpo)
+            espacio: Dict[str, Callable] = {}
+            exec(compile(fuente, f"<bloque LMC {inicio}>", "exec"), espacio)
+            bloque = (espacio["bloque"], largo)
+        self._bloques[inicio] = bloque
+        for x in cubiertos | {inicio}:
+            self._cubre[x].append(inicio)
+        return bloque
+
+    def _interpretar(self, max_pasos: int) -> None:
+        if self.ciclos >= max_pasos:
+            raise LimitePasosExcedido(f"Se alcanzó el límite de {max_pasos} pasos sin llegar a HLT")
+        pc = self.pc
+        escrito = None
+        if pc < TAM_MEMORIA:
+            # Los bloques escriben solo la memoria: se decodifica este buzón
+            v = self.memoria[pc]
+            self.ops[pc] = v // 100
+            self.dirs[pc] = v % 100
+            if v // 100 == 3:
+                escrito = v % 100
+        self.paso()
+        if escrito is not None and escrito not in self._volatiles:
+            self._escrito(escrito)
+
+    def ejecutar(self, entradas: Sequence[int] = (), max_pasos: int = MAX_PASOS, detectar_bucles: bool = True) -> Resultado:
+        self.entradas = list(entradas)
+        self.detectar_bucles = detectar_bucles
+        memoria = self.memoria
+        bloques = self._bloques
+        while not self.detenido:
+            pc = self.pc
+            bloque = bloques.get(pc, _SIN_COMPILAR)
+            if bloque is _SIN_COMPILAR:
+                bloque = self._compilar(pc) if pc < TAM_MEMORIA else None
+            # Si el bloque entero no entra en el límite, se sigue de a un paso
+            # para fallar en el mismo ciclo que el intérprete
+            if bloque is None or self.ciclos + bloque[1] > max_pasos:
+                self._interpretar(max_pasos)
+                continue
+            # Bucle interno con el estado en variables locales hasta que haga
+            # falta la máquina (paso interpretado, bloque sin compilar o fin)
+            a = self.acumulador
+            n = self.negativo
+            ciclos = self.ciclos
+            ix = self.ix_entrada
+            guardado = self._estado_guardado
+            ventana = self._ventana
+            en_ventana = self._en_ventana
+            while True:
+                destino, a, n, k, atras = bloque[0](memoria, a, n)
+                ciclos += k
+                if atras and detectar_bucles:
+                    # Salto hacia atrás tomado: el mismo Brent que
+                    # _comprobar_bucle, pero la memoria se copia solo si el
+                    # resto del estado coincide o toca guardarlo
+                    if (guardado is not None and destino == guardado[0] and a == guardado[1] and n == guardado[2]
+                            and ix == guardado[3] and memoria.tobytes() == guardado[4]):
+                        self.acumulador = a
+                        self.negativo = n
+                        self.ciclos = ciclos
+                        self._comprobar_bucle(destino)
+                    en_ventana += 1
+                    if en_ventana >= ventana:
+                        guardado = (destino, a, n, ix, memoria.tobytes())
+                        self._estado_guardado = guardado
+                        self._hash_guardado = hash(guardado)
+                        ventana *= 2
+                        en_ventana = 0
+                pc = destino
+                bloque = bloques.get(pc, _SIN_COMPILAR)
+                if bloque is _SIN_COMPILAR or bloque is None or ciclos + bloque[1] > max_pasos:
+                    break
+            self.acumulador = a
+            self.negativo = n
+            self.ciclos = ciclos
+            self.pc = pc
+            self._ventana = ventana
+            self._en_ventana = en_ventana
+        return Resultado(self.salidas, self.ciclos, self.acumulador, self.pc)
+
+
+def simular_compilado(programa: Union[str, Sequence[int]], entradas: Sequence[int] = (), max_pasos: int = MAX_PASOS, detectar_bucles: bool = True) -> Resultado:
+    # Misma interfaz que simulator.simular
+    memoria = ensamblar(programa)[0] if isinstance(programa, str) else programa
+    return MaquinaCompilada(memoria).ejecutar(entradas, max_pasos, detectar_bucles)
+
+
+MOTORES: Dict[str, Callable[..., Resultado]] = {
+    "interprete": simular,
+    "compilado": simular_compilado,
+}
@@ -0,0 +1,63 @@
+import re
+from typing import Iterable, Iterator, NamedTuple, Tuple
+
+from profiling import contar
+
+
+class Lexema(NamedTuple):
+    tipo: str
+    valores: Tuple[str, ...]
+    linea: int
+    columna: int
+
+
+_ID = r"[A-Za-z]\w*"
+_OPERANDO = rf"(?:{_ID}|\d+)"
+_COMPARADOR = r">=|<=|!=|=|>|<"
+
+# Una sola expresión precompilada clasifica la línea completa. El orden de las
+# alternativas define la prioridad (por ejemplo, "SI = A + B" es una asignación).
+_PATRON_LINEA = re.compile(
+    rf"""^\s*(?:
+        (?P<leer>LEER\s+({_ID}))
+      | (?P<imprimir>IMPRIMIR\s+({_ID}))
+      | (?P<asignacion>({_ID})\s*=\s*({_OPERANDO})\s*([+\-*/])\s*({_OPERANDO}))
+      | (?P<si>SI\s+(\w+)\s*({_COMPARADOR})\s*(\w+)\s+ENTONCES)
+      | (?P<mientras>MIENTRAS\s+(\w+)\s*({_COMPARADOR})\s*(\w+)\s+HACER)
+      | (?P<sino>SINO)
+      | (?P<fin_mientras>FIN\s+MIENTRAS)
+      | (?P<fin_si>FIN\s+SI)
+    )\s*$""",
+    re.IGNORECASE | re.VERBOSE,
+)
+
+# Cantidad de grupos internos que siguen al grupo con nombre de cada alternativa
+_ARIDAD = {
+    "leer": 1,
+    "imprimir": 1,
+    "asignacion": 4,
+    "si": 3,
+    "mientras": 3,
+    "sino": 0,
+    "fin_mientras": 0,
+    "fin_si": 0,
+}
+
+
+def clasificar_linea(linea: str, numero: int = 1) -> Lexema:
+    if not linea or linea.isspace():
+        return Lexema("blanco", (), numero, 1)
+    m = _PATRON_LINEA.match(linea)
+    contar("evaluaciones_regex")
+    if m is None:
+        columna = len(linea) - len(linea.lstrip()) + 1
+        return Lexema("desconocido", (linea.strip(),), numero, columna)
+    tipo = m.lastgroup
+    ix = m.lastindex
+    grupos = m.groups()
+    return Lexema(tipo, grupos[ix:ix + _ARIDAD[tipo]], numero, m.start(ix) + 1)
+
+
+def tokenizar(lineas: Iterable[str]) -> Iterator[Lexema]:
+    for numero, linea in enumerate(lineas, start=1):
+        yield clasificar_linea(linea, numero)
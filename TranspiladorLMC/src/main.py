@@ -1,33 +1,134 @@
 import argparse
 import os
+from contextlib import nullcontext
+from typing import Optional
 from parser import analizar_pseudocodigo
-from generator import generar_lmc
+from generator import generar_lmc, MODOS_MULTIPLICACION, MODOS_DIVISION, MODOS_SUBRUTINAS
+from assembler import TAM_MEMORIA, ErrorEnsamblado, ensamblar, imagen_json, cargar_imagen
+from simulator import ErrorSimulacion, MAX_PASOS
+from optimizer import optimizar_lmc, informe_optimizacion
+from allocator import asignar_buzones
 from utils import leer_lineas, escribir_texto, asegurar_directorio
+from batch import compilar_fuente, compilar_lote, expandir_entradas, tabla_resumen
+from cache import CacheCompilacion
+from profiling import Perfil, contar, perfilar
+from costs import estimar_costos, informe_costos, comentar_costos
+from sourcemap import perfilar_lineas, tabla_lineas
+from jit import MOTORES
 
 
 OPCIONES_DESTINO = ["Harry", "Juan", "Anthony", "Luis"]
 
 
-def main():
-    ap = argparse.ArgumentParser(description="Transpilador de pseudo-código a LMC")
-    ap.add_argument("--input", required=True, help="Ruta del archivo de pseudo-código de entrada")
-    ap.add_argument("--output", required=False, help="Ruta del archivo LMC de salida")
-    ap.add_argument("--dest", choices=OPCIONES_DESTINO, help="Carpeta destino dentro del proyecto")
-    args = ap.parse_args()
+def ejecutar(args) -> None:
+    ruta = args.programa
+    if not os.path.isfile(ruta):
+        raise FileNotFoundError(f"No existe el programa: {ruta}")
+    try:
+        if ruta.endswith(".mem"):
+            programa = cargar_imagen(ruta)[0]
+        else:
+            programa = "\n".join(leer_lineas(ruta))
+        # Un .lmc se ensambla al ejecutarlo: sus errores llegan de aquí
+        resultado = MOTORES[args.motor](programa, args.entradas, args.max_pasos)
+    except ErrorEnsamblado as e:
+        raise SystemExit(f"Error de ensamblado: {e}")
+    except ErrorSimulacion as e:
+        raise SystemExit(f"Error de ejecución: {e}")
+    for valor in resultado.salidas:
+        print(valor)
+    print(f"Ciclos ejecutados: {resultado.ciclos}")
+
+
+def perfilar_programa(args, opciones) -> None:
+    ruta = args.programa
+    if not os.path.isfile(ruta):
+        raise FileNotFoundError(f"No existe el programa: {ruta}")
+    lineas = leer_lineas(ruta)
+    try:
+        perfil = perfilar_lineas(lineas, args.entradas, opciones, args.optimizar, args.max_pasos)
+    except ErrorEnsamblado as e:
+        raise SystemExit(f"Error de ensamblado: {e}")
+    except ErrorSimulacion as e:
+        raise SystemExit(f"Error de ejecución: {e}")
+    for valor in perfil.salidas:
+        print(valor)
+    print(tabla_lineas(perfil, lineas))
+
+
+def raiz_proyecto() -> str:
+    return os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def directorio_cache(args) -> Optional[str]:
+    if args.sin_cache:
+        return None
+    return args.cache or os.path.join(raiz_proyecto(), ".cache_lmc")
+
+
+def compilar_en_lote(args, opciones) -> None:
+    rutas = expandir_entradas(args.lote)
+    if not rutas:
+        raise SystemExit(f"No hay archivos de entrada en: {args.lote}")
+    if args.output:
+        out_dir = args.output
+    else:
+        # Sin preguntar: sin --dest se usa la primera carpeta
+        out_dir = os.path.join(raiz_proyecto(), "output_lmc", args.dest or OPCIONES_DESTINO[0])
+    resultados = compilar_lote(rutas, out_dir, opciones, args.optimizar, args.procesos, directorio_cache(args))
+    print(tabla_resumen(resultados))
+    print(f"Salida en: {out_dir}")
+    if any(r.estado == "error" for r in resultados):
+        raise SystemExit(1)
 
+
+def _sin_medir(nombre: str):
+    return nullcontext()
+
+
+def compilar_archivo(args, opciones, perfil: Optional[Perfil] = None) -> None:
+    # Con un perfil se mide cada fase (y se compila sin caché)
+    fase = perfil.fase if perfil is not None else _sin_medir
     in_path = args.input
     if not os.path.isfile(in_path):
         raise FileNotFoundError(f"No existe el archivo de entrada: {in_path}")
 
-    lineas = leer_lineas(in_path)
-    operaciones = analizar_pseudocodigo(lineas)
-    lmc = generar_lmc(operaciones)
-
+    with fase("leer_lineas"):
+        lineas = leer_lineas(in_path)
+    dir_cache = directorio_cache(args)
+    if perfil is not None:
+        lmc = compilar_fuente(lineas, opciones, perfil=perfil)
+    elif dir_cache is not None:
+        cache = CacheCompilacion(directorio=dir_cache)
+        lmc = cache.compilar(lineas, opciones)
+        if cache.aciertos:
+            print("Resultado tomado de la caché de compilación")
+    else:
+        lmc = generar_lmc(analizar_pseudocodigo(lineas), **opciones)
+    if args.optimizar:
+        # La asignación de buzones deja copias redundantes (STA X / STA X) que
+        # la segunda pasada de mirilla elimina
+        with fase("optimizar"):
+            optimizado = optimizar_lmc(asignar_buzones(optimizar_lmc(lmc)))
+        informe = informe_optimizacion(lmc, optimizado, args.entradas_medicion)
+        print(f"Buzones: {informe['buzones_antes']} -> {informe['buzones_despues']}")
+        if "ciclos_antes" in informe:
+            print(f"Ciclos: {informe['ciclos_antes']} -> {informe['ciclos_despues']}")
+        lmc = optimizado
+    if args.costs:
+        print(informe_costos(estimar_costos(lmc)))
+    # Ensamblar antes de escribir: si no cabe en 100 buzones es un error
+    with fase("ensamblar"):
+        try:
+            memoria, simbolos = ensamblar(lmc)
+        except ErrorEnsamblado as e:
+            raise SystemExit(f"Error de ensamblado: {e}")
+    contar("buzones", len(lmc.splitlines()))
     if args.output:
         out_path = args.output
     else:
         base = os.path.splitext(os.path.basename(in_path))[0]
-        project_root = os.path.dirname(os.path.dirname(__file__))
+        project_root = raiz_proyecto()
         # Elegir carpeta destino
         if args.dest:
             dest_folder = args.dest
@@ -50,8 +151,101 @@ def main():
         asegurar_directorio(out_dir)
         out_path = os.path.join(out_dir, f"{base}.lmc")
 
-    escribir_texto(out_path, lmc)
+    mem_path = os.path.splitext(out_path)[0] + ".mem"
+    with fase("escribir_texto"):
+        # Los comentarios van solo en el .lmc: la imagen se arma con el texto sin ellos
+        escribir_texto(out_path, comentar_costos(lmc) if args.comentar_costos else lmc)
+        escribir_texto(mem_path, imagen_json(memoria, simbolos))
     print(f"Archivo LMC generado en: {out_path}")
+    print(f"Imagen de memoria generada en: {mem_path}")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Transpilador de pseudo-código a LMC")
+    ap.add_argument("--input", required=False, help="Ruta del archivo de pseudo-código de entrada")
+    ap.add_argument("--output", required=False, help="Ruta del archivo LMC de salida (con --lote, carpeta de salida)")
+    ap.add_argument("--lote", help="Carpeta o patrón glob (p. ej. 'input_scripts/*.txt'): compila todos los archivos en paralelo")
+    ap.add_argument("--procesos", type=int, default=None,
+                    help="Con --lote, cantidad de procesos (por defecto, uno por CPU)")
+    ap.add_argument("--dest", choices=OPCIONES_DESTINO, help="Carpeta destino dentro del proyecto")
+    ap.add_argument("--multiplicacion", choices=MODOS_MULTIPLICACION, default="compacta",
+                    help="compacta: sumas sucesivas (menos buzones); rapida: desplazamiento y suma (menos ciclos)")
+    ap.add_argument("--division", choices=MODOS_DIVISION, default="compacta",
+                    help="compacta: restas sucesivas (menos buzones); rapida: división larga binaria (menos ciclos)")
+    ap.add_argument("--subrutinas", choices=MODOS_SUBRUTINAS, default="auto",
+                    help="en_linea: cada * y / lleva su bucle; compartidas: una rutina por operador; auto: compartir solo si no cabe en 100 buzones")
+    ap.add_argument("--presupuesto-buzones", type=int, default=TAM_MEMORIA,
+                    help=f"Con --subrutinas auto, se comparten rutinas solo si el programa en línea ocupa más buzones que esto (por defecto {TAM_MEMORIA})")
+    ap.add_argument("--presupuesto-ciclos", type=int, default=None,
+                    help="Con --subrutinas auto, máximo de ciclos extra que pueden agregar las llamadas a rutinas compartidas en el peor caso "
+                         "(cada llamada por las vueltas de los bucles que la contienen); por defecto sin límite")
+    ap.add_argument("--sin-rotar-bucles", dest="rotar_bucles", action="store_false",
+                    help="Comprueba la condición de MIENTRAS al comienzo de cada vuelta en lugar de al final")
+    ap.add_argument("--sin-plegado", dest="plegar_constantes", action="store_false",
+                    help="No calcula en compilación las operaciones con valores conocidos")
+    ap.add_argument("--cache", default=None,
+                    help="Carpeta de la caché de compilación en disco (por defecto, .cache_lmc en el proyecto)")
+    ap.add_argument("--sin-cache", action="store_true", help="Compila siempre, sin leer ni escribir la caché")
+    ap.add_argument("--optimizar", action="store_true",
+                    help="Aplica el optimizador de mirilla y la asignación de buzones por tiempo de vida")
+    ap.add_argument("--profile", action="store_true",
+                    help="Muestra el tiempo y la memoria de cada fase y los contadores del compilador (compila sin caché)")
+    ap.add_argument("--profile-json", metavar="RUTA", default=None,
+                    help="Guarda el mismo perfil en un archivo JSON")
+    ap.add_argument("--costs", action="store_true",
+                    help="Estima los ciclos de cada bloque, bucle y llamada del LMC generado (cotas simbólicas)")
+    ap.add_argument("--comentar-costos", action="store_true",
+                    help="Anota en el .lmc los costos estimados como comentarios //")
+    ap.add_argument("--entradas-medicion", nargs="*", type=int, default=None,
+                    help="Con --optimizar, entradas para medir los ciclos antes y después")
+    sub = ap.add_subparsers(dest="comando")
+    ap_ejecutar = sub.add_parser("ejecutar", help="Ejecuta un programa .lmc o .mem en el simulador")
+    ap_ejecutar.add_argument("programa", help="Ruta del archivo .lmc o .mem")
+    ap_ejecutar.add_argument("--entradas", nargs="*", type=int, default=[], help="Valores para INP, en orden")
+    ap_ejecutar.add_argument("--max-pasos", type=int, default=MAX_PASOS, help="Máximo de instrucciones a ejecutar")
+    ap_ejecutar.add_argument("--motor", choices=list(MOTORES), default="interprete",
+                             help="interprete (de a una instrucción) o compilado (bloques traducidos a Python, más rápido en programas largos)")
+    ap_perfilar = sub.add_parser("perfilar", help="Compila y ejecuta un programa de pseudo-código y muestra los ciclos de cada línea")
+    ap_perfilar.add_argument("programa", help="Ruta del archivo de pseudo-código")
+    ap_perfilar.add_argument("--entradas", nargs="*", type=int, default=[], help="Valores para LEER, en orden")
+    ap_perfilar.add_argument("--max-pasos", type=int, default=MAX_PASOS, help="Máximo de instrucciones a ejecutar")
+    args = ap.parse_args()
+
+    if args.comando == "ejecutar":
+        ejecutar(args)
+        return
+    opciones = dict(
+        multiplicacion=args.multiplicacion,
+        division=args.division,
+        subrutinas=args.subrutinas,
+        presupuesto_buzones=args.presupuesto_buzones,
+        presupuesto_ciclos=args.presupuesto_ciclos,
+        rotar_bucles=args.rotar_bucles,
+        plegar_constantes=args.plegar_constantes,
+    )
+    if args.comando == "perfilar":
+        perfilar_programa(args, opciones)
+        return
+    if args.lote:
+        if args.profile or args.profile_json:
+            ap.error("--profile mide la compilación de un solo archivo; no se combina con --lote")
+        if args.costs or args.comentar_costos:
+            ap.error("--costs y --comentar-costos analizan un solo archivo; no se combinan con --lote")
+        compilar_en_lote(args, opciones)
+        return
+    if not args.input:
+        ap.error("se requiere --input o --lote")
+
+    if args.profile or args.profile_json:
+        with perfilar() as perfil:
+            compilar_archivo(args, opciones, perfil)
+        if args.profile:
+            print(perfil.tabla())
+        if args.profile_json:
+            escribir_texto(os.path.abspath(args.profile_json), perfil.a_json())
+            print(f"Perfil guardado en: {args.profile_json}")
+    else:
+        compilar_archivo(args, opciones)
 
 
 if __name__ == "__main__":
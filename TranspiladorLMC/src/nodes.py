@@ -0,0 +1,141 @@
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+# Formato anterior de los tokens: un dict con "tipo" y los campos de cada
+# instrucción. Sigue aceptándose en la entrada (ver como_nodos) y se usa para
+# guardarlos en JSON
+Token = Dict[str, Any]
+
+
+class _Nodo:
+    # Campos en __slots__: sin __dict__ por nodo, y el acceso es por atributo.
+    # `linea` (desde 1, None si el nodo no viene de un texto) es la del
+    # pseudocódigo que lo produjo: es la ubicación, no parte de la instrucción,
+    # así que no cuenta para la igualdad
+    __slots__ = ("linea",)
+    tipo = ""
+
+    def _replace(self, **cambios: Any) -> "_Nodo":
+        # Como en NamedTuple: una copia con algunos campos distintos
+        campos = (cambios.get(c, getattr(self, c)) for c in self.__slots__)
+        return type(self)(*campos, linea=cambios.get("linea", self.linea))
+
+    def __eq__(self, otro: object) -> bool:
+        return type(self) is type(otro) and all(getattr(self, c) == getattr(otro, c) for c in self.__slots__)
+
+    __hash__ = None  # los bloques tienen listas
+
+    def __repr__(self) -> str:
+        campos = ", ".join(f"{c}={getattr(self, c)!r}" for c in self.__slots__)
+        return f"{type(self).__name__}({campos})"
+
+
+class Condicion(_Nodo):
+    __slots__ = ("izquierda", "op", "derecha")
+
+    def __init__(self, izquierda: str, op: str, derecha: str, linea: Optional[int] = None):
+        self.izquierda = izquierda
+        self.op = op
+        self.derecha = derecha
+        self.linea = linea
+
+
+class Leer(_Nodo):
+    __slots__ = ("var",)
+    tipo = "leer"
+
+    def __init__(self, var: str, linea: Optional[int] = None):
+        self.var = var
+        self.linea = linea
+
+
+class Imprimir(_Nodo):
+    __slots__ = ("var",)
+    tipo = "imprimir"
+
+    def __init__(self, var: str, linea: Optional[int] = None):
+        self.var = var
+        self.linea = linea
+
+
+class Asignacion(_Nodo):
+    __slots__ = ("destino", "izquierda", "op", "derecha")
+    tipo = "asignacion"
+
+    def __init__(self, destino: str, izquierda: str, op: str, derecha: str, linea: Optional[int] = None):
+        self.destino = destino
+        self.izquierda = izquierda
+        self.op = op
+        self.derecha = derecha
+        self.linea = linea
+
+
+class Si(_Nodo):
+    __slots__ = ("condicion", "entonces", "sino")
+    tipo = "si"
+
+    def __init__(self, condicion: Condicion, entonces: List["Instruccion"], sino: List["Instruccion"], linea: Optional[int] = None):
+        self.condicion = condicion
+        self.entonces = entonces
+        self.sino = sino
+        self.linea = linea
+
+
+class Mientras(_Nodo):
+    __slots__ = ("condicion", "cuerpo")
+    tipo = "mientras"
+
+    def __init__(self, condicion: Condicion, cuerpo: List["Instruccion"], linea: Optional[int] = None):
+        self.condicion = condicion
+        self.cuerpo = cuerpo
+        self.linea = linea
+
+
+Instruccion = Union[Leer, Imprimir, Asignacion, Si, Mientras]
+
+
+def _condicion_dict(condicion: Condicion) -> Dict[str, str]:
+    return {"izquierda": condicion.izquierda, "op": condicion.op, "derecha": condicion.derecha}
+
+
+def _campos_dict(nodo: Instruccion) -> Token:
+    if isinstance(nodo, (Leer, Imprimir)):
+        return {"tipo": nodo.tipo, "var": nodo.var}
+    if isinstance(nodo, Asignacion):
+        return {"tipo": "asignacion", "destino": nodo.destino, "izquierda": nodo.izquierda, "op": nodo.op, "derecha": nodo.derecha}
+    if isinstance(nodo, Si):
+        return {"tipo": "si", "condicion": _condicion_dict(nodo.condicion), "entonces": a_dicts(nodo.entonces), "sino": a_dicts(nodo.sino)}
+    return {"tipo": "mientras", "condicion": _condicion_dict(nodo.condicion), "cuerpo": a_dicts(nodo.cuerpo)}
+
+
+def a_dict(nodo: Instruccion) -> Token:
+    token = _campos_dict(nodo)
+    if nodo.linea is not None:
+        token["linea"] = nodo.linea
+    return token
+
+
+def a_dicts(nodos: Iterable[Instruccion]) -> List[Token]:
+    return [a_dict(n) for n in nodos]
+
+
+def desde_dict(token: Token) -> Instruccion:
+    t = token["tipo"]
+    linea = token.get("linea")
+    if t == "leer":
+        return Leer(token["var"], linea)
+    if t == "imprimir":
+        return Imprimir(token["var"], linea)
+    if t == "asignacion":
+        return Asignacion(token["destino"], token["izquierda"], token["op"], token["derecha"], linea)
+    c = token["condicion"]
+    condicion = Condicion(c["izquierda"], c["op"], c["derecha"])
+    if t == "si":
+        return Si(condicion, como_nodos(token["entonces"]), como_nodos(token.get("sino", [])), linea)
+    if t == "mientras":
+        return Mientras(condicion, como_nodos(token["cuerpo"]), linea)
+    raise ValueError(f"Tipo de instrucción desconocido: {t}")
+
+
+def como_nodos(operaciones: Iterable[Union[Instruccion, Token]]) -> List[Instruccion]:
+    # Acepta tanto nodos como tokens en el formato anterior
+    return [desde_dict(op) if isinstance(op, dict) else op for op in operaciones]
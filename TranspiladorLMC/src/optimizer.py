@@ -0,0 +1,224 @@
+from typing import Dict, List, Optional, Sequence, Set
+
+from assembler import Instruccion, formatear_lmc, parsear_lmc
+
+SALTOS = ("BRA", "BRZ", "BRP")
+
+
+def etiquetas_referenciadas(instrucciones: List[Instruccion]) -> Set[str]:
+    return {ins.operando for ins in instrucciones if ins.operando is not None and ins.mnemonico != "DAT"}
+
+
+def celdas_protegidas(instrucciones: List[Instruccion]) -> Set[str]:
+    # Celdas de código que no se pueden tocar: las que se sobrescriben en
+    # tiempo de ejecución (destino de STA) y las que se leen como datos
+    codigo = {ins.etiqueta for ins in instrucciones if ins.etiqueta is not None and ins.mnemonico != "DAT"}
+    return {ins.operando for ins in instrucciones if ins.mnemonico in ("STA", "LDA", "ADD", "SUB") and ins.operando in codigo}
+
+
+def eliminar_instrucciones(instrucciones: List[Instruccion], borrar: Set[int]) -> List[Instruccion]:
+    # Borra instrucciones trasladando sus etiquetas a la siguiente que se
+    # conserva; si esta ya tiene etiqueta, las referencias se redirigen a ella
+    resultado: List[Instruccion] = []
+    alias: Dict[str, str] = {}
+    pendientes: List[str] = []
+    for i, ins in enumerate(instrucciones):
+        if i in borrar:
+            if ins.etiqueta is not None:
+                pendientes.append(ins.etiqueta)
+            continue
+        if pendientes:
+            if ins.etiqueta is None:
+                ins = ins._replace(etiqueta=pendientes.pop(0))
+            for etq in pendientes:
+                alias[etq] = ins.etiqueta
+            pendientes = []
+        resultado.append(ins)
+    if alias:
+        resultado = [
+            ins._replace(operando=alias[ins.operando]) if ins.mnemonico != "DAT" and ins.operando in alias else ins
+            for ins in resultado
+        ]
+    return resultado
+
+
+def _colapsar_saltos(instrucciones: List[Instruccion], protegidas: Set[str]) -> List[Instruccion]:
+    # Un salto hacia un "BRA X" puede ir directamente a X
+    por_etiqueta = {ins.etiqueta: ins for ins in instrucciones if ins.etiqueta is not None}
+
+    def destino_final(etq: str) -> str:
+        vistos = {etq}
+        while True:
+            ins = por_etiqueta.get(etq)
+            if ins is None or ins.mnemonico != "BRA" or etq in protegidas or ins.operando in vistos:
+                return etq
+            etq = ins.operando
+            vistos.add(etq)
+
+    resultado: List[Instruccion] = []
+    for ins in instrucciones:
+        if ins.mnemonico in SALTOS and ins.etiqueta not in protegidas:
+            final = destino_final(ins.operando)
+            if final != ins.operando:
+                ins = ins._replace(operando=final)
+        resultado.append(ins)
+    return resultado
+
+
+def _eliminar_saltos_redundantes(instrucciones: List[Instruccion], protegidas: Set[str]) -> List[Instruccion]:
+    borrar: Set[int] = set()
+    referenciadas = etiquetas_referenciadas(instrucciones)
+    n = len(instrucciones)
+    for i, ins in enumerate(instrucciones):
+        if ins.mnemonico not in SALTOS or ins.etiqueta in protegidas or i + 1 >= n:
+            continue
+        sig = instrucciones[i + 1]
+        if sig.etiqueta is not None and sig.etiqueta == ins.operando:
+            # Salto a la instrucción siguiente
+            borrar.add(i)
+        elif sig.mnemonico in SALTOS and sig.operando == ins.operando and sig.etiqueta not in protegidas:
+            if ins.mnemonico == "BRZ" and sig.mnemonico in ("BRP", "BRA"):
+                # Con acumulador en cero BRP también salta: el BRZ sobra
+                borrar.add(i)
+            elif ins.mnemonico == "BRP" and sig.mnemonico == "BRA":
+                borrar.add(i)
+            elif ins.mnemonico == "BRP" and sig.mnemonico == "BRZ" and sig.etiqueta not in referenciadas:
+                # Si BRP no saltó el resultado es negativo y no puede ser cero
+                borrar.add(i + 1)
+    # Nunca se borra la última instrucción (no hay a quién pasar la etiqueta)
+    borrar.discard(n - 1)
+    return eliminar_instrucciones(instrucciones, borrar) if borrar else instrucciones
+
+
+def _negativo_vivo(instrucciones: List[Instruccion], protegidas: Set[str]) -> List[bool]:
+    # Para cada instrucción (y el final del programa), si algún BRP puede leer
+    # el indicador de negativo que tiene al llegar ahí antes de que LDA, ADD,
+    # INP o SUB lo reemplacen. Análisis hacia atrás hasta un punto fijo; las
+    # celdas que cambian en ejecución y los saltos a etiquetas desconocidas
+    # cuentan como lecturas
+    n = len(instrucciones)
+    indice = {ins.etiqueta: i for i, ins in enumerate(instrucciones) if ins.etiqueta is not None}
+    vivo = [False] * n + [True]
+    cambios = True
+    while cambios:
+        cambios = False
+        for i in range(n - 1, -1, -1):
+            ins = instrucciones[i]
+            m = ins.mnemonico
+            if m == "BRP" or m == "DAT" or (ins.etiqueta is not None and ins.etiqueta in protegidas):
+                v = True
+            elif m in ("LDA", "ADD", "INP", "SUB", "HLT"):
+                v = False
+            elif m in ("BRA", "BRZ"):
+                destino = indice.get(ins.operando)
+                v = True if destino is None else vivo[destino]
+                if m == "BRZ":
+                    v = v or vivo[i + 1]
+            else:
+                v = vivo[i + 1]
+            if v and not vivo[i]:
+                vivo[i] = True
+                cambios = True
+    return vivo
+
+
+def _eliminar_cargas_redundantes(instrucciones: List[Instruccion], protegidas: Set[str]) -> List[Instruccion]:
+    # Sigue qué celdas tienen el mismo valor que el acumulador en código lineal
+    # y si el indicador de negativo está limpio. Un LDA que repite el valor del
+    # acumulador solo cambia el indicador (lo limpia): sobra si ya estaba
+    # limpio o si ningún BRP lo lee antes de que se reemplace
+    borrar: Set[int] = set()
+    referenciadas = etiquetas_referenciadas(instrucciones)
+    vivo = _negativo_vivo(instrucciones, protegidas)
+    conocidas: Set[str] = set()
+    limpio = False
+    for i, ins in enumerate(instrucciones):
+        if ins.etiqueta is not None and ins.etiqueta in referenciadas:
+            # Punto de entrada de un salto: no se sabe nada del acumulador
+            conocidas = set()
+            limpio = False
+        if ins.etiqueta is not None and ins.etiqueta in protegidas and ins.mnemonico != "DAT":
+            # Su contenido cambia en ejecución: no se puede razonar sobre ella
+            conocidas = set()
+            limpio = False
+            continue
+        m = ins.mnemonico
+        if m == "LDA":
+            if ins.operando in conocidas and (limpio or not vivo[i + 1]) and ins.operando not in protegidas:
+                borrar.add(i)
+            else:
+                conocidas = {ins.operando}
+                limpio = True
+        elif m == "STA":
+            if ins.operando in conocidas:
+                borrar.add(i)
+            else:
+                conocidas.add(ins.operando)
+        elif m == "ADD" or m == "INP":
+            conocidas = set()
+            limpio = True
+        elif m == "SUB":
+            conocidas = set()
+            limpio = False
+        elif m in ("BRA", "HLT", "DAT"):
+            conocidas = set()
+            limpio = False
+    borrar.discard(len(instrucciones) - 1)
+    return eliminar_instrucciones(instrucciones, borrar) if borrar else instrucciones
+
+
+def _eliminar_codigo_muerto(instrucciones: List[Instruccion], protegidas: Set[str]) -> List[Instruccion]:
+    # Instrucciones tras un BRA/HLT que ningún salto alcanza
+    borrar: Set[int] = set()
+    referenciadas = etiquetas_referenciadas(instrucciones)
+    muerto = False
+    for i, ins in enumerate(instrucciones):
+        if ins.mnemonico == "DAT" or (ins.etiqueta is not None and ins.etiqueta in referenciadas):
+            muerto = False
+        elif muerto:
+            borrar.add(i)
+            continue
+        if ins.mnemonico in ("BRA", "HLT") and ins.etiqueta not in protegidas:
+            muerto = True
+    borrar.discard(len(instrucciones) - 1)
+    return eliminar_instrucciones(instrucciones, borrar) if borrar else instrucciones
+
+
+_PASADAS = (
+    _colapsar_saltos,
+    _eliminar_saltos_redundantes,
+    _eliminar_cargas_redundantes,
+    _eliminar_codigo_muerto,
+)
+
+
+def optimizar_instrucciones(instrucciones: List[Instruccion]) -> List[Instruccion]:
+    # Con direcciones numéricas en el código no se pueden mover instrucciones
+    if any(ins.mnemonico != "DAT" and ins.operando is not None and ins.operando.isdigit() for ins in instrucciones):
+        return instrucciones
+    cambios = True
+    while cambios:
+        cambios = False
+        for pasada in _PASADAS:
+            nuevas = pasada(instrucciones, celdas_protegidas(instrucciones))
+            if nuevas != instrucciones:
+                instrucciones = nuevas
+                cambios = True
+    return instrucciones
+
+
+def optimizar_lmc(texto: str) -> str:
+    return formatear_lmc(optimizar_instrucciones(parsear_lmc(texto)))
+
+
+def informe_optimizacion(original: str, optimizado: str, entradas: Optional[Sequence[int]] = None) -> Dict[str, int]:
+    informe = {
+        "buzones_antes": len(parsear_lmc(original)),
+        "buzones_despues": len(parsear_lmc(optimizado)),
+    }
+    if entradas is not None:
+        from simulator import simular
+
+        informe["ciclos_antes"] = simular(original, entradas).ciclos
+        informe["ciclos_despues"] = simular(optimizado, entradas).ciclos
+    return informe
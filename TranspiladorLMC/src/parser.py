@@ -1,202 +1,145 @@
-import re
-from typing import List, Dict, Any
-
-Token = Dict[str, Any]
-
-
-def _es_asignacion(linea: str) -> bool:
-    return re.match(r"^\s*[A-Za-z][\w]*\s*=\s*(?:[A-Za-z][\w]*|\d+)\s*[+\-*/]\s*(?:[A-Za-z][\w]*|\d+)\s*$", linea) is not None
-
-
-def _parsear_asignacion(linea: str) -> Token:
-    m = re.match(r"^\s*([A-Za-z][\w]*)\s*=\s*([A-Za-z][\w]*|\d+)\s*([+\-*/])\s*([A-Za-z][\w]*|\d+)\s*$", linea)
-    assert m
-    destino, izquierda, op, derecha = m.groups()
-    return {"tipo": "asignacion", "destino": destino.upper(), "izquierda": izquierda.upper(), "op": op, "derecha": derecha.upper()}
-
-
-def _es_leer(linea: str) -> bool:
-    return re.match(r"^\s*LEER\s+[A-Za-z][\w]*\s*$", linea, re.IGNORECASE) is not None
-
-
-def _parsear_leer(linea: str) -> Token:
-    var = re.findall(r"LEER\s+([A-Za-z][\w]*)", linea, flags=re.IGNORECASE)[0]
-    return {"tipo": "leer", "var": var.upper()}
-
-
-def _es_imprimir(linea: str) -> bool:
-    return re.match(r"^\s*IMPRIMIR\s+[A-Za-z][\w]*\s*$", linea, re.IGNORECASE) is not None
-
-
-def _parsear_imprimir(linea: str) -> Token:
-    var = re.findall(r"IMPRIMIR\s+([A-Za-z][\w]*)", linea, flags=re.IGNORECASE)[0]
-    return {"tipo": "imprimir", "var": var.upper()}
-
-
-def _es_si(linea: str) -> bool:
-    return re.match(r"^\s*SI\s+\w+\s*(>=|<=|!=|=|>|<)\s*\w+\s+ENTONCES\s*$", linea, re.IGNORECASE) is not None
-
-
-def _parsear_encabezado_si(linea: str) -> Dict[str, str]:
-    m = re.match(r"^\s*SI\s+(\w+)\s*(>=|<=|!=|=|>|<)\s*(\w+)\s+ENTONCES\s*$", linea, re.IGNORECASE)
-    assert m
-    izquierda, op, derecha = m.groups()
-    return {"izquierda": izquierda.upper(), "op": op, "derecha": derecha.upper()}
-
-
-def _es_mientras(linea: str) -> bool:
-    return re.match(r"^\s*MIENTRAS\s+\w+\s*(>=|<=|!=|=|>|<)\s*\w+\s+HACER\s*$", linea, re.IGNORECASE) is not None
-
-
-def _parsear_encabezado_mientras(linea: str) -> Dict[str, str]:
-    m = re.match(r"^\s*MIENTRAS\s+(\w+)\s*(>=|<=|!=|=|>|<)\s*(\w+)\s+HACER\s*$", linea, re.IGNORECASE)
-    assert m
-    izquierda, op, derecha = m.groups()
-    return {"izquierda": izquierda.upper(), "op": op, "derecha": derecha.upper()}
-
-
-def analizar_pseudocodigo(lineas: List[str]) -> List[Token]:
-    tokens: List[Token] = []
-    i = 0
-    n = len(lineas)
-    while i < n:
-        linea = lineas[i].strip()
-        if not linea:
-            i += 1
-            continue
-        if _es_leer(linea):
-            tokens.append(_parsear_leer(linea))
-            i += 1
-            continue
-        if _es_imprimir(linea):
-            tokens.append(_parsear_imprimir(linea))
-            i += 1
-            continue
-        if _es_asignacion(linea):
-            tokens.append(_parsear_asignacion(linea))
-            i += 1
-            continue
-        if _es_si(linea):
-            condicion = _parsear_encabezado_si(linea)
-            i += 1
-            entonces_ops: List[Token] = []
-            while i < n and not re.match(r"^\s*SINO\s*$", lineas[i], re.IGNORECASE):
-                interior = lineas[i].strip()
-                if not interior:
-                    i += 1
-                    continue
-                if _es_leer(interior):
-                    entonces_ops.append(_parsear_leer(interior))
-                elif _es_imprimir(interior):
-                    entonces_ops.append(_parsear_imprimir(interior))
-                elif _es_asignacion(interior):
-                    entonces_ops.append(_parsear_asignacion(interior))
-                elif _es_mientras(interior):
-                    # Parse nested 'mientras' bloque completo
-                    # Encontrar el cierre correspondiente 'FIN MIENTRAS'
-                    depth = 1
-                    j = i + 1
-                    while j < n and depth > 0:
-                        linea_j = lineas[j].strip()
-                        if _es_mientras(linea_j):
-                            depth += 1
-                        elif re.match(r"^\s*FIN\s+MIENTRAS\s*$", linea_j, re.IGNORECASE):
-                            depth -= 1
-                        j += 1
-                    sub_tokens = analizar_pseudocodigo(lineas[i:j])
-                    entonces_ops.extend(sub_tokens)
-                    i = j
-                    continue
-                elif _es_si(interior):
-                    anidado = analizar_pseudocodigo(lineas[i:])
-                    entonces_ops.extend(anidado)
-                    i = n
-                    break
-                else:
+from typing import List, Iterable, NamedTuple, Optional, Tuple
+
+from lexer import Lexema, tokenizar
+from nodes import Asignacion, Condicion, Imprimir, Instruccion, Leer, Mientras, Si
+
+
+class Nodo(NamedTuple):
+    # Instrucción junto con las líneas que ocupa (ver incremental.py). Las
+    # posiciones son relativas para que editar una parte no obligue a mover el
+    # resto: `antes` cuenta las líneas desde el final del hermano anterior (o
+    # desde la cabecera del padre) y `sino` es la línea del SINO contada desde
+    # la cabecera del SI (0 si no tiene)
+    token: Instruccion
+    antes: int
+    lineas: int
+    hijos: Tuple["Nodo", ...] = ()
+    sino: int = 0
+    # Falso si lo cerró el final del texto o una línea que es de un bloque
+    # exterior (el SINO o el FIN MIENTRAS de afuera)
+    cierre_propio: bool = True
+
+
+class FueraDeContexto(Exception):
+    # Un análisis parcial tuvo que cerrar o cambiar de rama un bloque que no
+    # estaba reanalizando
+    pass
+
+
+class Marco:
+    # Bloque abierto: dónde van sus instrucciones y sus hijos ya cerrados
+    __slots__ = ("tipo", "token", "destino", "cabecera", "antes", "fin", "sino", "hijos")
+
+    def __init__(self, token: Optional[Instruccion], destino: List[Instruccion], cabecera: int, antes: int, fin: int, sino: int = -1):
+        self.tipo = token.tipo if token is not None else "raiz"
+        self.token = token
+        self.destino = destino
+        self.cabecera = cabecera
+        self.antes = antes
+        # Final del último hijo (o de la cabecera) y línea del SINO (-1 en ENTONCES)
+        self.fin = fin
+        self.sino = sino
+        self.hijos: List[Nodo] = []
+
+
+def _condicion(lexema: Lexema) -> Condicion:
+    izquierda, op, derecha = lexema.valores
+    return Condicion(izquierda.upper(), op, derecha.upper())
+
+
+class Analizador:
+    # Analizador de una sola pasada: cada lexema se visita una vez y los bloques
+    # abiertos (SI/MIENTRAS) se guardan en una pila explícita, sin recursión ni
+    # copias de la lista de líneas. Los marcos por debajo de `base` vienen de un
+    # análisis anterior: solo reciben instrucciones nuevas
+    def __init__(self, marcos: List[Marco], base: int = 1):
+        self.marcos = marcos
+        self.base = base
+        self.mientras_abiertos = sum(1 for m in marcos if m.tipo == "mientras")
+
+    def _agregar(self, numero: int, token: Instruccion) -> None:
+        arriba = self.marcos[-1]
+        arriba.destino.append(token)
+        arriba.hijos.append(Nodo(token, numero - arriba.fin, 1))
+        arriba.fin = numero + 1
+
+    def _apilar(self, numero: int, token: Instruccion, destino: List[Instruccion]) -> None:
+        arriba = self.marcos[-1]
+        arriba.destino.append(token)
+        self.marcos.append(Marco(token, destino, numero, numero - arriba.fin, numero + 1))
+
+    def _desapilar(self, numero: int, propio: bool) -> str:
+        # `propio`: la línea que cierra el bloque es parte de él
+        if len(self.marcos) <= self.base:
+            raise FueraDeContexto()
+        marco = self.marcos.pop()
+        if marco.tipo == "mientras":
+            self.mientras_abiertos -= 1
+        fin = numero + 1 if propio else numero
+        sino = marco.sino - marco.cabecera if marco.sino >= 0 else 0
+        padre = self.marcos[-1]
+        padre.hijos.append(Nodo(marco.token, marco.antes, fin - marco.cabecera, tuple(marco.hijos), sino, propio))
+        padre.fin = fin
+        return marco.tipo
+
+    def procesar(self, numero: int, lexema: Lexema) -> None:
+        # `numero` cuenta desde 0; los tokens guardan la línea desde 1
+        tipo = lexema.tipo
+        arriba = self.marcos[-1]
+        if tipo == "blanco":
+            # Una línea en blanco termina la rama SINO abierta más interna
+            if arriba.sino >= 0:
+                self._desapilar(numero, True)
+        elif tipo == "leer":
+            self._agregar(numero, Leer(lexema.valores[0].upper(), numero + 1))
+        elif tipo == "imprimir":
+            self._agregar(numero, Imprimir(lexema.valores[0].upper(), numero + 1))
+        elif tipo == "asignacion":
+            dest, izquierda, op, derecha = lexema.valores
+            self._agregar(numero, Asignacion(dest.upper(), izquierda.upper(), op, derecha.upper(), numero + 1))
+        elif tipo == "si":
+            si = Si(_condicion(lexema), [], [], numero + 1)
+            self._apilar(numero, si, si.entonces)
+        elif tipo == "mientras":
+            mientras = Mientras(_condicion(lexema), [], numero + 1)
+            self._apilar(numero, mientras, mientras.cuerpo)
+            self.mientras_abiertos += 1
+        elif tipo == "sino":
+            # SINO corresponde al SI más interno que aún esté en su rama ENTONCES
+            while self.marcos[-1].sino >= 0:
+                self._desapilar(numero, False)
+            arriba = self.marcos[-1]
+            if arriba.tipo == "si":
+                if len(self.marcos) <= self.base:
+                    raise FueraDeContexto()
+                arriba.sino = numero
+                arriba.destino = arriba.token.sino
+        elif tipo == "fin_mientras":
+            # Cierra los SI abiertos dentro del bucle y luego el propio MIENTRAS,
+            # que es el dueño de la línea
+            if self.mientras_abiertos:
+                while self._desapilar(numero, self.marcos[-1].tipo == "mientras") != "mientras":
                     pass
-                i += 1
-            sino_ops: List[Token] = []
-            if i < n and re.match(r"^\s*SINO\s*$", lineas[i], re.IGNORECASE):
-                i += 1
-                while i < n:
-                    interior = lineas[i].strip()
-                    if not interior:
-                        break
-                    if _es_leer(interior):
-                        sino_ops.append(_parsear_leer(interior))
-                        i += 1
-                        continue
-                    if _es_imprimir(interior):
-                        sino_ops.append(_parsear_imprimir(interior))
-                        i += 1
-                        continue
-                    if _es_asignacion(interior):
-                        sino_ops.append(_parsear_asignacion(interior))
-                        i += 1
-                        continue
-                    if _es_mientras(interior):
-                        depth = 1
-                        j = i + 1
-                        while j < n and depth > 0:
-                            linea_j = lineas[j].strip()
-                            if _es_mientras(linea_j):
-                                depth += 1
-                            elif re.match(r"^\s*FIN\s+MIENTRAS\s*$", linea_j, re.IGNORECASE):
-                                depth -= 1
-                            j += 1
-                        sub_tokens = analizar_pseudocodigo(lineas[i:j])
-                        sino_ops.extend(sub_tokens)
-                        i = j
-                        continue
-                    if _es_si(interior):
-                        anidado = analizar_pseudocodigo(lineas[i:])
-                        sino_ops.extend(anidado)
-                        i = n
-                        break
-                    break
-            tokens.append({"tipo": "si", "condicion": condicion, "entonces": entonces_ops, "sino": sino_ops})
-            continue
-        if _es_mientras(linea):
-            condicion = _parsear_encabezado_mientras(linea)
-            i += 1
-            cuerpo_ops: List[Token] = []
-            while i < n and not re.match(r"^\s*FIN\s+MIENTRAS\s*$", lineas[i], re.IGNORECASE):
-                interior = lineas[i].strip()
-                if not interior:
-                    i += 1
-                    continue
-                if _es_leer(interior):
-                    cuerpo_ops.append(_parsear_leer(interior))
-                elif _es_imprimir(interior):
-                    cuerpo_ops.append(_parsear_imprimir(interior))
-                elif _es_asignacion(interior):
-                    cuerpo_ops.append(_parsear_asignacion(interior))
-                elif _es_si(interior):
-                    # Parse nested 'si' usando analizar_pseudocodigo desde aquí hasta fin del bloque si
-                    anidado = analizar_pseudocodigo(lineas[i:])
-                    cuerpo_ops.extend(anidado)
-                    i = n
-                    break
-                elif _es_mientras(interior):
-                    # Soportar anidamiento de mientras
-                    depth = 1
-                    j = i + 1
-                    while j < n and depth > 0:
-                        linea_j = lineas[j].strip()
-                        if _es_mientras(linea_j):
-                            depth += 1
-                        elif re.match(r"^\s*FIN\s+MIENTRAS\s*$", linea_j, re.IGNORECASE):
-                            depth -= 1
-                        j += 1
-                    sub_tokens = analizar_pseudocodigo(lineas[i:j])
-                    cuerpo_ops.extend(sub_tokens)
-                    i = j
-                    continue
-                i += 1
-            # Saltar 'FIN MIENTRAS'
-            if i < n and re.match(r"^\s*FIN\s+MIENTRAS\s*$", lineas[i], re.IGNORECASE):
-                i += 1
-            tokens.append({"tipo": "mientras", "condicion": condicion, "cuerpo": cuerpo_ops})
-            continue
-        i += 1
-    return tokens
+        elif tipo == "fin_si":
+            if arriba.tipo == "si":
+                self._desapilar(numero, True)
+        elif arriba.sino >= 0:
+            # Una línea no reconocida termina la rama SINO abierta
+            self._desapilar(numero, True)
+
+    def terminar(self, total: int) -> None:
+        # Lo que sigue abierto al final del texto se cierra ahí
+        while len(self.marcos) > self.base:
+            self._desapilar(total, False)
+
+
+def analizar_lexemas(lexemas: Iterable[Lexema]) -> List[Instruccion]:
+    raiz = Marco(None, [], -1, 0, 0)
+    analizador = Analizador([raiz])
+    for numero, lexema in enumerate(lexemas):
+        analizador.procesar(numero, lexema)
+    return raiz.destino
+
+
+def analizar_pseudocodigo(lineas: List[str]) -> List[Instruccion]:
+    return analizar_lexemas(tokenizar(lineas))
@@ -0,0 +1,128 @@
+import json
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional
+
+
+class Fase(NamedTuple):
+    nombre: str
+    segundos: float
+    # Bytes: el máximo reservado durante la fase y lo que quedó reservado al
+    # terminar, ambos respecto del comienzo
+    memoria_pico: int
+    memoria_neta: int
+
+
+# Perfil activo en cada hilo: los contadores del compilador (contar) van a él.
+# Sin ningún perfil activo, contar solo mira _activos
+_local = threading.local()
+_activos = 0
+_cerrojo = threading.Lock()
+# Si tracemalloc lo inició un perfil: se detiene al terminar el último
+_traza_propia = False
+_observadores: List[Callable[["Perfil"], None]] = []
+
+
+def contar(nombre: str, n: int = 1) -> None:
+    if not _activos:
+        return
+    perfil = getattr(_local, "perfil", None)
+    if perfil is not None:
+        perfil.contadores[nombre] = perfil.contadores.get(nombre, 0) + n
+
+
+def agregar_observador(funcion: Callable[["Perfil"], None]) -> None:
+    # Se llama con cada perfil al terminar (por ejemplo, desde un benchmark)
+    _observadores.append(funcion)
+
+
+def quitar_observador(funcion: Callable[["Perfil"], None]) -> None:
+    _observadores.remove(funcion)
+
+
+class Perfil:
+    # Tiempo y memoria por fase, y contadores (evaluaciones de la expresión del
+    # lexer, instrucciones emitidas). La memoria se mide con tracemalloc, que
+    # también cuenta lo que reservan otros hilos y hace más lenta la ejecución
+    def __init__(self, memoria: bool = True):
+        self.memoria = memoria
+        self.fases: List[Fase] = []
+        self.contadores: Dict[str, int] = {}
+
+    @contextmanager
+    def fase(self, nombre: str) -> Iterator[None]:
+        medir = self.memoria and tracemalloc.is_tracing()
+        if medir:
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            segundos = time.perf_counter() - inicio
+            pico = neta = 0
+            if medir and tracemalloc.is_tracing():
+                actual, maximo = tracemalloc.get_traced_memory()
+                pico, neta = maximo - base, actual - base
+            self.fases.append(Fase(nombre, segundos, pico, neta))
+
+    def total(self) -> float:
+        return sum(f.segundos for f in self.fases)
+
+    def a_dict(self) -> Dict[str, Any]:
+        return {
+            "fases": [f._asdict() for f in self.fases],
+            "total_segundos": self.total(),
+            "contadores": dict(self.contadores),
+        }
+
+    def a_json(self) -> str:
+        return json.dumps(self.a_dict(), indent=2, ensure_ascii=False)
+
+    def tabla(self) -> str:
+        filas = [("Fase", "Tiempo (ms)", "Memoria pico (KiB)", "Memoria neta (KiB)")]
+        for f in self.fases:
+            if self.memoria:
+                pico, neta = f"{f.memoria_pico / 1024:.1f}", f"{f.memoria_neta / 1024:.1f}"
+            else:
+                pico = neta = "-"
+            filas.append((f.nombre, f"{f.segundos * 1000:.2f}", pico, neta))
+        filas.append(("total", f"{self.total() * 1000:.2f}", "", ""))
+        anchos = [max(len(fila[i]) for fila in filas) for i in range(4)]
+        lineas = []
+        for k, fila in enumerate(filas):
+            if k == len(filas) - 1:
+                lineas.append("  ".join("-" * a for a in anchos))
+            lineas.append("  ".join(c.ljust(a) if i == 0 else c.rjust(a) for i, (c, a) in enumerate(zip(fila, anchos))).rstrip())
+            if k == 0:
+                lineas.append("  ".join("-" * a for a in anchos))
+        for nombre, valor in sorted(self.contadores.items()):
+            lineas.append(f"{nombre}: {valor}")
+        return "\n".join(lineas)
+
+
+@contextmanager
+def perfilar(memoria: bool = True) -> Iterator[Perfil]:
+    # Activa un perfil en el hilo actual mientras dura el bloque
+    global _activos, _traza_propia
+    perfil = Perfil(memoria)
+    anterior: Optional[Perfil] = getattr(_local, "perfil", None)
+    with _cerrojo:
+        _activos += 1
+        if memoria and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _traza_propia = True
+    _local.perfil = perfil
+    try:
+        yield perfil
+    finally:
+        _local.perfil = anterior
+        with _cerrojo:
+            _activos -= 1
+            if _activos == 0 and _traza_propia:
+                tracemalloc.stop()
+                _traza_propia = False
+    for funcion in list(_observadores):
+        funcion(perfil)
@@ -0,0 +1,177 @@
+from array import array
+from typing import List, NamedTuple, Optional, Sequence, Union
+
+from assembler import TAM_MEMORIA, ensamblar
+
+MAX_PASOS = 1_000_000
+
+
+class ErrorSimulacion(RuntimeError):
+    pass
+
+
+class LimitePasosExcedido(ErrorSimulacion):
+    pass
+
+
+class BucleInfinito(ErrorSimulacion):
+    pass
+
+
+class Resultado(NamedTuple):
+    salidas: List[int]
+    ciclos: int
+    acumulador: int
+    pc: int
+
+
+class MaquinaLMC:
+    def __init__(self, memoria: Sequence[int]):
+        if len(memoria) > TAM_MEMORIA:
+            raise ErrorSimulacion(f"La imagen ocupa {len(memoria)} buzones; el máximo es {TAM_MEMORIA}")
+        for direccion, valor in enumerate(memoria):
+            # Las imágenes .mem se cargan tal cual: un valor inválido rompería la decodificación
+            if not isinstance(valor, int) or not 0 <= valor <= 999:
+                raise ErrorSimulacion(f"Valor fuera de rango (0-999) en la dirección {direccion}: {valor!r}")
+        self.memoria = array("h", memoria)
+        self.memoria.extend([0] * (TAM_MEMORIA - len(self.memoria)))
+        # Decodificación anticipada: código de operación y dirección de cada buzón
+        self.ops = array("b", (v // 100 for v in self.memoria))
+        self.dirs = array("b", (v % 100 for v in self.memoria))
+        self.acumulador = 0
+        self.negativo = False
+        self.pc = 0
+        self.ciclos = 0
+        self.salidas: List[int] = []
+        self.entradas: List[int] = []
+        self.ix_entrada = 0
+        self.detenido = False
+        self.detectar_bucles = True
+        # Detección de bucles (algoritmo de Brent): estado guardado y ventana actual
+        self._estado_guardado: Optional[tuple] = None
+        self._hash_guardado = 0
+        self._ventana = 1
+        self._en_ventana = 0
+        self._despacho = [
+            self._hlt,  # 0xx
+            self._add,  # 1xx
+            self._sub,  # 2xx
+            self._sta,  # 3xx
+            None,       # 4xx no existe
+            self._lda,  # 5xx
+            self._bra,  # 6xx
+            self._brz,  # 7xx
+            self._brp,  # 8xx
+            self._io,   # 9xx
+        ]
+
+    def _hlt(self, _d: int) -> None:
+        self.detenido = True
+
+    def _add(self, d: int) -> None:
+        self.acumulador = (self.acumulador + self.memoria[d]) % 1000
+        self.negativo = False
+
+    def _sub(self, d: int) -> None:
+        r = self.acumulador - self.memoria[d]
+        self.negativo = r < 0
+        self.acumulador = r % 1000
+
+    def _sta(self, d: int) -> None:
+        v = self.acumulador
+        self.memoria[d] = v
+        # Código automodificable: volver a decodificar el buzón escrito
+        self.ops[d] = v // 100
+        self.dirs[d] = v % 100
+
+    def _lda(self, d: int) -> None:
+        self.acumulador = self.memoria[d]
+        self.negativo = False
+
+    def _bra(self, d: int) -> None:
+        self._saltar(d)
+
+    def _brz(self, d: int) -> None:
+        if self.acumulador == 0:
+            self._saltar(d)
+
+    def _brp(self, d: int) -> None:
+        if not self.negativo:
+            self._saltar(d)
+
+    def _io(self, d: int) -> None:
+        if d == 1:
+            if self.ix_entrada >= len(self.entradas):
+                raise ErrorSimulacion(f"Entrada agotada en la dirección {self.pc - 1}")
+            valor = self.entradas[self.ix_entrada]
+            if not 0 <= valor <= 999:
+                raise ErrorSimulacion(f"Entrada fuera de rango (0-999): {valor}")
+            self.ix_entrada += 1
+            self.acumulador = valor
+            self.negativo = False
+        elif d == 2:
+            self.salidas.append(self.acumulador)
+        else:
+            raise ErrorSimulacion(f"Instrucción inválida {900 + d} en la dirección {self.pc - 1}")
+
+    def _saltar(self, d: int) -> None:
+        if d < self.pc and self.detectar_bucles:
+            self._comprobar_bucle(d)
+        self.pc = d
+
+    def _comprobar_bucle(self, destino: int) -> None:
+        # Solo en saltos hacia atrás: si la máquina repite un estado completo,
+        # al ser determinista nunca terminará
+        estado = (destino, self.acumulador, self.negativo, self.ix_entrada, self.memoria.tobytes())
+        h = hash(estado)
+        if h == self._hash_guardado and estado == self._estado_guardado:
+            raise BucleInfinito(f"Bucle infinito detectado en la dirección {destino} tras {self.ciclos} ciclos")
+        self._en_ventana += 1
+        if self._en_ventana >= self._ventana:
+            self._estado_guardado = estado
+            self._hash_guardado = h
+            self._ventana *= 2
+            self._en_ventana = 0
+
+    def paso(self) -> None:
+        # Una sola instrucción, para recorrer el programa de a un paso (ejecutar
+        # hace lo mismo en su propio bucle); las entradas van en self.entradas
+        pc = self.pc
+        if pc >= TAM_MEMORIA:
+            raise ErrorSimulacion(f"El contador de programa salió de la memoria ({pc})")
+        manejador = self._despacho[self.ops[pc]]
+        if manejador is None:
+            raise ErrorSimulacion(f"Instrucción inválida {self.memoria[pc]} en la dirección {pc}")
+        self.pc = pc + 1
+        self.ciclos += 1
+        manejador(self.dirs[pc])
+
+    def ejecutar(self, entradas: Sequence[int] = (), max_pasos: int = MAX_PASOS, detectar_bucles: bool = True) -> Resultado:
+        self.entradas = list(entradas)
+        self.detectar_bucles = detectar_bucles
+        ops = self.ops
+        dirs = self.dirs
+        despacho = self._despacho
+        while not self.detenido:
+            if self.ciclos >= max_pasos:
+                raise LimitePasosExcedido(f"Se alcanzó el límite de {max_pasos} pasos sin llegar a HLT")
+            pc = self.pc
+            if pc >= TAM_MEMORIA:
+                raise ErrorSimulacion(f"El contador de programa salió de la memoria ({pc})")
+            manejador = despacho[ops[pc]]
+            if manejador is None:
+                raise ErrorSimulacion(f"Instrucción inválida {self.memoria[pc]} en la dirección {pc}")
+            self.pc = pc + 1
+            self.ciclos += 1
+            manejador(dirs[pc])
+        return Resultado(self.salidas, self.ciclos, self.acumulador, self.pc)
+
+
+def simular(programa: Union[str, Sequence[int]], entradas: Sequence[int] = (), max_pasos: int = MAX_PASOS, detectar_bucles: bool = True) -> Resultado:
+    # Acepta texto LMC (se ensambla) o una imagen de memoria ya ensamblada
+    memoria = ensamblar(programa)[0] if isinstance(programa, str) else programa
+    return MaquinaLMC(memoria).ejecutar(entradas, max_pasos, detectar_bucles)
+
+
+def ejecutar_lmc(programa: Union[str, Sequence[int]], entradas: Sequence[int] = (), max_pasos: int = MAX_PASOS) -> List[int]:
+    return simular(programa, entradas, max_pasos).salidas
@@ -0,0 +1,306 @@
+import time
+from typing import Callable, Dict, NamedTuple, Optional, Set, Tuple
+
+from PyQt5.QtCore import Qt, QThread, pyqtSignal
+from PyQt5.QtGui import QBrush, QColor, QFontDatabase
+from PyQt5.QtWidgets import (
+    QAbstractItemView,
+    QGridLayout,
+    QHBoxLayout,
+    QHeaderView,
+    QLabel,
+    QLineEdit,
+    QPushButton,
+    QSpinBox,
+    QTableWidget,
+    QTableWidgetItem,
+    QVBoxLayout,
+    QWidget,
+)
+
+from assembler import TAM_MEMORIA, ErrorEnsamblado, ensamblar, parsear_lmc
+from simulator import MAX_PASOS, ErrorSimulacion, MaquinaLMC
+
+# Como mucho una actualización de la pantalla cada tanto: una ejecución de
+# millones de ciclos no llena la cola de eventos de Qt
+INTERVALO_ACTUALIZACION_S = 0.05
+# Instrucciones entre dos consultas del reloj y del pedido de pausa
+PASOS_POR_TANDA = 2000
+
+_COLOR_PC = QColor(255, 220, 120)
+_COLOR_PUNTO = QColor(240, 130, 130)
+
+
+class EstadoMaquina(NamedTuple):
+    # Copia del estado: la máquina sigue cambiando en el hilo de ejecución
+    acumulador: int
+    pc: int
+    ciclos: int
+    memoria: Tuple[int, ...]
+    salidas: Tuple[int, ...]
+    detenido: bool
+
+
+def instantanea(maquina: MaquinaLMC) -> EstadoMaquina:
+    return EstadoMaquina(
+        maquina.acumulador, maquina.pc, maquina.ciclos, tuple(maquina.memoria), tuple(maquina.salidas), maquina.detenido
+    )
+
+
+class HiloSimulacion(QThread):
+    # Ejecuta hasta HLT, un punto de parada, el límite de pasos o una pausa.
+    # Mientras corre, solo este hilo toca la máquina; la interfaz recibe copias
+    # del estado por `avance`, a lo sumo una cada INTERVALO_ACTUALIZACION_S
+    avance = pyqtSignal(object)
+    # (estado final, motivo: "hlt", "punto", "pausa", "limite" o el error)
+    terminado = pyqtSignal(object, str)
+
+    def __init__(self, maquina: MaquinaLMC, puntos: Set[int], max_pasos: int, parent=None):
+        super().__init__(parent)
+        self.maquina = maquina
+        self.puntos = frozenset(puntos)
+        self.max_pasos = max_pasos
+        self._pausa = False
+
+    def pausar(self) -> None:
+        self._pausa = True
+
+    def _correr(self) -> str:
+        maquina = self.maquina
+        puntos = self.puntos
+        paso = maquina.paso
+        # La instrucción en la que se paró antes no vuelve a detener
+        primera = True
+        proxima = time.perf_counter() + INTERVALO_ACTUALIZACION_S
+        while True:
+            for _ in range(PASOS_POR_TANDA):
+                if maquina.detenido:
+                    return "hlt"
+                if maquina.pc in puntos and not primera:
+                    return "punto"
+                if maquina.ciclos >= self.max_pasos:
+                    return "limite"
+                paso()
+                primera = False
+            if self._pausa:
+                return "pausa"
+            ahora = time.perf_counter()
+            if ahora >= proxima:
+                self.avance.emit(instantanea(maquina))
+                proxima = ahora + INTERVALO_ACTUALIZACION_S
+
+    def run(self):
+        try:
+            motivo = self._correr()
+        except ErrorSimulacion as e:
+            motivo = str(e)
+        self.terminado.emit(instantanea(self.maquina), motivo)
+
+
+class PanelSimulador(QWidget):
+    # Carga el LMC ensamblado y lo ejecuta con las entradas dadas: de corrido
+    # en otro hilo, de a un paso, o hasta un punto de parada (doble clic en un
+    # buzón). Muestra acumulador, PC, ciclos, salidas y los 100 buzones.
+    # `obtener_lmc` da el texto a cargar (el LMC generado)
+    def __init__(self, obtener_lmc: Callable[[], str], parent=None):
+        super().__init__(parent)
+        self.obtener_lmc = obtener_lmc
+        self.maquina: Optional[MaquinaLMC] = None
+        self.hilo: Optional[HiloSimulacion] = None
+        self.puntos: Set[int] = set()
+        self.nombres: Dict[int, str] = {}
+
+        self.entradas_edit = QLineEdit()
+        self.entradas_edit.setPlaceholderText("Entradas (p. ej. 5 3)")
+        self.cargar_btn = QPushButton("Cargar")
+        self.cargar_btn.setToolTip("Ensambla el LMC generado y reinicia la máquina con estas entradas")
+        self.ejecutar_btn = QPushButton("Ejecutar")
+        self.paso_btn = QPushButton("Paso")
+        self.pausa_btn = QPushButton("Pausa")
+        self.max_spin = QSpinBox()
+        self.max_spin.setRange(1, 1_000_000_000)
+        self.max_spin.setValue(MAX_PASOS)
+        self.max_spin.setPrefix("máx. ")
+        self.max_spin.setSuffix(" pasos")
+
+        barra = QHBoxLayout()
+        barra.addWidget(QLabel("Simulador:"))
+        barra.addWidget(self.entradas_edit, stretch=1)
+        for w in (self.cargar_btn, self.ejecutar_btn, self.paso_btn, self.pausa_btn, self.max_spin):
+            barra.addWidget(w)
+
+        fija = QFontDatabase.systemFont(QFontDatabase.FixedFont)
+        self.acumulador_lbl = QLabel()
+        self.pc_lbl = QLabel()
+        self.ciclos_lbl = QLabel()
+        self.estado_lbl = QLabel()
+        self.estado_lbl.setWordWrap(True)
+        self.salidas_lbl = QLabel()
+        self.salidas_lbl.setWordWrap(True)
+        self.salidas_lbl.setTextInteractionFlags(Qt.TextSelectableByMouse)
+        for lbl in (self.acumulador_lbl, self.pc_lbl, self.ciclos_lbl, self.salidas_lbl):
+            lbl.setFont(fija)
+        registros = QGridLayout()
+        for fila, (nombre, lbl) in enumerate(
+            (("Acumulador", self.acumulador_lbl), ("PC", self.pc_lbl), ("Ciclos", self.ciclos_lbl), ("Salidas", self.salidas_lbl))
+        ):
+            registros.addWidget(QLabel(f"{nombre}:"), fila, 0, Qt.AlignTop)
+            registros.addWidget(lbl, fila, 1)
+        registros.addWidget(self.estado_lbl, 4, 0, 1, 2)
+        registros.setRowStretch(5, 1)
+        registros.setColumnStretch(1, 1)
+
+        # Buzones en una grilla de 10 x 10: la fila son las decenas
+        self.buzones = QTableWidget(10, 10)
+        self.buzones.setFont(fija)
+        self.buzones.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.buzones.setSelectionMode(QAbstractItemView.NoSelection)
+        self.buzones.setHorizontalHeaderLabels([str(c) for c in range(10)])
+        self.buzones.setVerticalHeaderLabels([f"{f}0" for f in range(10)])
+        self.buzones.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.buzones.verticalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        for d in range(TAM_MEMORIA):
+            item = QTableWidgetItem("000")
+            item.setTextAlignment(Qt.AlignCenter)
+            self.buzones.setItem(d // 10, d % 10, item)
+        self.buzones.cellDoubleClicked.connect(self.alternar_punto)
+        self.buzones.setToolTip("Doble clic: punto de parada")
+
+        cuerpo = QHBoxLayout()
+        cuerpo.addLayout(registros, stretch=1)
+        cuerpo.addWidget(self.buzones, stretch=2)
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addLayout(barra)
+        layout.addLayout(cuerpo)
+
+        self.cargar_btn.clicked.connect(self.cargar)
+        self.ejecutar_btn.clicked.connect(self.ejecutar)
+        self.paso_btn.clicked.connect(self.paso)
+        self.pausa_btn.clicked.connect(self.pausar)
+        self._pc_anterior = 0
+        self._botones()
+        self._mostrar_vacio()
+
+    def _botones(self) -> None:
+        corriendo = self.hilo is not None
+        listo = self.maquina is not None and not self.maquina.detenido
+        self.cargar_btn.setEnabled(not corriendo)
+        self.entradas_edit.setEnabled(not corriendo)
+        self.ejecutar_btn.setEnabled(listo and not corriendo)
+        self.paso_btn.setEnabled(listo and not corriendo)
+        self.pausa_btn.setEnabled(corriendo)
+
+    def _mostrar_vacio(self) -> None:
+        self.acumulador_lbl.setText("-")
+        self.pc_lbl.setText("-")
+        self.ciclos_lbl.setText("-")
+        self.salidas_lbl.setText("")
+        self.estado_lbl.setText("Cargue el LMC generado")
+
+    def cargar(self) -> None:
+        texto = self.obtener_lmc()
+        if not texto.strip():
+            self.estado_lbl.setText("No hay LMC generado para cargar")
+            return
+        try:
+            entradas = [int(x) for x in self.entradas_edit.text().replace(",", " ").split()]
+            memoria, simbolos = ensamblar(texto)
+            maquina = MaquinaLMC(memoria)
+        except ValueError as e:
+            # ErrorEnsamblado es un ValueError, igual que una entrada no numérica
+            mensaje = str(e) if isinstance(e, ErrorEnsamblado) else "Las entradas deben ser números enteros"
+            self.estado_lbl.setText(f"No se pudo cargar: {mensaje}")
+            return
+        except ErrorSimulacion as e:
+            self.estado_lbl.setText(f"No se pudo cargar: {e}")
+            return
+        maquina.entradas = entradas
+        self.maquina = maquina
+        self.nombres = {d: etq for etq, d in simbolos.items()}
+        # Los puntos de parada se conservan entre cargas
+        for d in range(TAM_MEMORIA):
+            item = self.buzones.item(d // 10, d % 10)
+            item.setToolTip(f"{d}: {self.nombres[d]}" if d in self.nombres else str(d))
+        self.mostrar(instantanea(maquina))
+        self.estado_lbl.setText(f"Cargado: {len(parsear_lmc(texto))} buzones, {len(entradas)} entradas")
+        self._botones()
+
+    def mostrar(self, estado: EstadoMaquina) -> None:
+        self.acumulador_lbl.setText(f"{estado.acumulador:03d}")
+        etq = self.nombres.get(estado.pc)
+        self.pc_lbl.setText(f"{estado.pc:02d}" + (f" ({etq})" if etq else ""))
+        self.ciclos_lbl.setText(str(estado.ciclos))
+        self.salidas_lbl.setText(" ".join(str(s) for s in estado.salidas))
+        for d, valor in enumerate(estado.memoria):
+            item = self.buzones.item(d // 10, d % 10)
+            texto = f"{valor:03d}"
+            if item.text() != texto:
+                item.setText(texto)
+        self._pintar(self._pc_anterior)
+        self._pc_anterior = estado.pc
+        self._pintar(estado.pc)
+
+    def _pintar(self, d: int) -> None:
+        if not 0 <= d < TAM_MEMORIA:
+            return
+        item = self.buzones.item(d // 10, d % 10)
+        if self.maquina is not None and d == self.maquina.pc and self.hilo is None:
+            item.setBackground(QBrush(_COLOR_PC))
+        elif d in self.puntos:
+            item.setBackground(QBrush(_COLOR_PUNTO))
+        else:
+            item.setBackground(QBrush())
+
+    def alternar_punto(self, fila: int, columna: int) -> None:
+        d = fila * 10 + columna
+        self.puntos.symmetric_difference_update({d})
+        self._pintar(d)
+
+    def paso(self) -> None:
+        maquina = self.maquina
+        if maquina is None or maquina.detenido or self.hilo is not None:
+            return
+        try:
+            maquina.paso()
+        except ErrorSimulacion as e:
+            self.estado_lbl.setText(f"Error: {e}")
+        else:
+            self.estado_lbl.setText("Detenido en HLT" if maquina.detenido else "")
+        self.mostrar(instantanea(maquina))
+        self._botones()
+
+    def ejecutar(self) -> None:
+        if self.maquina is None or self.maquina.detenido or self.hilo is not None:
+            return
+        self.hilo = HiloSimulacion(self.maquina, self.puntos, self.max_spin.value(), self)
+        self.hilo.avance.connect(self.mostrar)
+        self.hilo.terminado.connect(self.ejecucion_terminada)
+        self.estado_lbl.setText("Ejecutando...")
+        self._botones()
+        self._pintar(self._pc_anterior)
+        self.hilo.start()
+
+    def pausar(self) -> None:
+        if self.hilo is not None:
+            self.hilo.pausar()
+
+    def ejecucion_terminada(self, estado: EstadoMaquina, motivo: str) -> None:
+        self.hilo.wait()
+        self.hilo = None
+        mensajes = {
+            "hlt": "Detenido en HLT",
+            "punto": f"Punto de parada en {estado.pc:02d}",
+            "pausa": "En pausa",
+            "limite": f"Se alcanzó el límite de {self.max_spin.value()} pasos",
+        }
+        self.estado_lbl.setText(mensajes.get(motivo, f"Error: {motivo}"))
+        self.mostrar(estado)
+        self._botones()
+
+    def cerrar(self) -> None:
+        # Al cerrar la ventana: no dejar el hilo corriendo
+        if self.hilo is not None:
+            self.hilo.pausar()
+            self.hilo.wait()
+
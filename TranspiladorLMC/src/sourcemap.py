@@ -0,0 +1,85 @@
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+from allocator import asignar_instrucciones
+from assembler import ensamblar, formatear_lmc, parsear_lmc
+from generator import generar_con_mapa
+from optimizer import optimizar_instrucciones
+from parser import analizar_pseudocodigo
+from simulator import MAX_PASOS, LimitePasosExcedido, MaquinaLMC
+
+# Mapa de fuente (ver generar_con_mapa): línea del pseudocódigo de cada buzón
+MapaFuente = List[Optional[int]]
+
+
+class PerfilLineas(NamedTuple):
+    # Ciclos ejecutados por línea del pseudocódigo (desde 1). Los de las rutinas
+    # compartidas se cuentan en la línea que las llamó y el HLT final en la
+    # última línea ejecutada; None junta lo que corrió antes de cualquier línea
+    ciclos: Dict[Optional[int], int]
+    total: int
+    salidas: List[int]
+
+    def por_ciclos(self) -> List[Any]:
+        # (línea, ciclos) de la más costosa a la menos
+        return sorted(self.ciclos.items(), key=lambda c: (-c[1], c[0] or 0))
+
+
+def optimizar_con_mapa(lmc: str, mapa: MapaFuente) -> Tuple[str, MapaFuente]:
+    # Las mismas pasadas que --optimizar, llevando la línea de cada instrucción
+    instrucciones = [ins._replace(fuente=linea) for ins, linea in zip(parsear_lmc(lmc), mapa)]
+    instrucciones = optimizar_instrucciones(asignar_instrucciones(optimizar_instrucciones(instrucciones)))
+    return formatear_lmc(instrucciones), [ins.fuente for ins in instrucciones]
+
+
+def ciclos_por_linea(
+    programa: Union[str, Sequence[int]],
+    mapa: MapaFuente,
+    entradas: Sequence[int] = (),
+    max_pasos: int = MAX_PASOS,
+) -> PerfilLineas:
+    # Ejecuta de a un paso: un buzón sin línea (una rutina compartida, la
+    # celda de retorno) se cuenta en la última línea con código que se ejecutó,
+    # que es la de la llamada
+    memoria = ensamblar(programa)[0] if isinstance(programa, str) else programa
+    maquina = MaquinaLMC(memoria)
+    maquina.entradas = list(entradas)
+    ciclos: Dict[Optional[int], int] = {}
+    actual: Optional[int] = None
+    while not maquina.detenido:
+        if maquina.ciclos >= max_pasos:
+            raise LimitePasosExcedido(f"Se alcanzó el límite de {max_pasos} pasos sin llegar a HLT")
+        pc = maquina.pc
+        if pc < len(mapa) and mapa[pc] is not None:
+            actual = mapa[pc]
+        maquina.paso()
+        ciclos[actual] = ciclos.get(actual, 0) + 1
+    return PerfilLineas(ciclos, maquina.ciclos, maquina.salidas)
+
+
+def perfilar_lineas(
+    lineas: List[str],
+    entradas: Sequence[int] = (),
+    opciones: Optional[Dict[str, Any]] = None,
+    optimizar: bool = False,
+    max_pasos: int = MAX_PASOS,
+) -> PerfilLineas:
+    # Compila (con el optimizador, como --optimizar) y ejecuta
+    lmc, mapa = generar_con_mapa(analizar_pseudocodigo(lineas), **(opciones or {}))
+    if optimizar:
+        lmc, mapa = optimizar_con_mapa(lmc, mapa)
+    return ciclos_por_linea(lmc, mapa, entradas, max_pasos)
+
+
+def tabla_lineas(perfil: PerfilLineas, lineas: List[str]) -> str:
+    filas = [("Línea", "Ciclos", "%", "Pseudocódigo")]
+    for linea, ciclos in perfil.por_ciclos():
+        texto = lineas[linea - 1].strip() if linea is not None and 0 < linea <= len(lineas) else ""
+        filas.append(("-" if linea is None else str(linea), str(ciclos), f"{100 * ciclos / perfil.total:.1f}", texto))
+    anchos = [max(len(f[i]) for f in filas) for i in range(4)]
+    resultado = []
+    for k, fila in enumerate(filas):
+        resultado.append("  ".join(c.ljust(a) if i == 3 else c.rjust(a) for i, (c, a) in enumerate(zip(fila, anchos))).rstrip())
+        if k == 0:
+            resultado.append("  ".join("-" * a for a in anchos))
+    resultado.append(f"Total: {perfil.total} ciclos")
+    return "\n".join(resultado)